@@ -0,0 +1,63 @@
+"""Benchmark page-parallel PDF extraction throughput.
+
+Replicates the bundled control PDF to a large page count (requires ``pypdf``)
+and reports pages/sec for several worker counts.
+
+Usage:
+    PYTHONPATH=src python scripts/bench_extract.py --pages 800 --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from ktflow.ingest.pdf import _count_pages, extract_text_from_pdf
+
+
+def replicate_pdf(src: Path, out: Path, n_pages: int) -> int:
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except Exception as e:  # pragma: no cover - benchmark helper only
+        raise SystemExit("pypdf is required to build the benchmark PDF") from e
+
+    reader = PdfReader(str(src))
+    writer = PdfWriter()
+    while len(writer.pages) < n_pages:
+        for page in reader.pages:
+            if len(writer.pages) >= n_pages:
+                break
+            writer.add_page(page)
+    with out.open("wb") as f:
+        writer.write(f)
+    return len(writer.pages)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--src", default="data/raw/kt_control_v1.pdf")
+    p.add_argument("--pages", type=int, default=800)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        big = Path(tmpdir) / "bench.pdf"
+        replicate_pdf(Path(args.src), big, args.pages)
+        n_pages = _count_pages(big)
+        print(f"{big.name}: {n_pages} pages")
+
+        baseline: str | None = None
+        for w in args.workers:
+            t0 = time.perf_counter()
+            text = extract_text_from_pdf(str(big), workers=w)
+            dt = time.perf_counter() - t0
+            if baseline is None:
+                baseline = text
+            same = "ok" if text == baseline else "MISMATCH"
+            print(f"workers={w:<3d} {dt:8.2f}s  {n_pages / dt:8.1f} pages/s  [{same}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark HF tagger inference backends on CPU.
+
+Reports sentences/sec per core for the PyTorch path (fp32 and dynamic int8)
+and the ONNX export (fp32 and int8), plus argmax agreement with PyTorch fp32.
+Each backend is pinned to ``--threads`` intra-op threads, so the numbers are
+per core for the default of 1.
+
+Usage:
+    python src/cli/export_hf.py --model-dir models/hf_tagger --int8
+    PYTHONPATH=src python scripts/bench_hf_backends.py \
+      --model-dir models/hf_tagger --onnx-dir models/hf_tagger/onnx --n 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from ktflow.ingest.pdf import extract_text_from_pdf
+from ktflow.segment.sentence import split_sentences
+from ktflow.tag.hf import ONNX_INT8_FILE, HFTagger, ONNXTagger
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--model-dir", required=True)
+    p.add_argument("--onnx-dir", help="Directory written by export_hf.py")
+    p.add_argument("--src", default="data/raw/kt_control_v1.pdf")
+    p.add_argument("--n", type=int, default=2000)
+    p.add_argument("--batch-size", type=int, default=64)
+    p.add_argument("--threads", type=int, default=1)
+    args = p.parse_args()
+
+    torch.set_num_threads(args.threads)
+    pool = split_sentences(extract_text_from_pdf(args.src))
+    sents = list(itertools.islice(itertools.cycle(pool), args.n))
+
+    backends: dict[str, HFTagger | ONNXTagger] = {
+        "torch": HFTagger(args.model_dir, batch_size=args.batch_size, device="cpu"),
+        "torch-int8": HFTagger(args.model_dir, batch_size=args.batch_size, int8=True),
+    }
+    if args.onnx_dir:
+        backends["onnx"] = ONNXTagger(
+            args.onnx_dir, batch_size=args.batch_size, threads=args.threads
+        )
+        if (Path(args.onnx_dir) / ONNX_INT8_FILE).exists():
+            backends["onnx-int8"] = ONNXTagger(
+                args.onnx_dir, batch_size=args.batch_size, int8=True, threads=args.threads
+            )
+
+    reference: np.ndarray | None = None
+    for name, tagger in backends.items():
+        tagger.logits(sents[: args.batch_size])  # warm-up
+        t0 = time.perf_counter()
+        pred = tagger.logits(sents).argmax(axis=1)
+        dt = time.perf_counter() - t0
+        if reference is None:
+            reference = pred
+        agree = float((pred == reference).mean())
+        rate = len(sents) / dt / args.threads
+        print(f"{name:<11s} {rate:9.1f} sents/s/core  argmax agreement {agree:.4f}")
+
+
+if __name__ == "__main__":
+    main()
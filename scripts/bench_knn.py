@@ -0,0 +1,62 @@
+"""Benchmark k-NN tagger search latency as the example index grows.
+
+Uses synthetic clustered vectors, so it runs without torch: search cost does
+not depend on the encoder, and sentence embeddings cluster by topic. For each
+index size it reports per-query latency of the exact blocked-matmul search and
+of the IVF search (``n_lists ~ sqrt(n)``), plus IVF recall@k against the exact
+neighbours.
+
+Usage:
+    PYTHONPATH=src python scripts/bench_knn.py --sizes 1000 10000 100000 --dim 384
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from ktflow.tag.knn import KNNIndex
+
+
+def _timed(index: KNNIndex, Q: np.ndarray, k: int) -> tuple[float, np.ndarray]:
+    index.search(Q[:8], k)  # warm-up
+    t0 = time.perf_counter()
+    _, rows = index.search(Q, k)
+    return (time.perf_counter() - t0) / len(Q) * 1e3, rows
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    p.add_argument("--dim", type=int, default=384)
+    p.add_argument("--queries", type=int, default=1000)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--n-probe", type=int, default=8)
+    p.add_argument("--clusters", type=int, default=200, help="Synthetic topic clusters")
+    args = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Cluster centres sit slightly farther apart than the within-cluster noise
+    centers = 1.25 * rng.normal(size=(args.clusters, args.dim))
+    Q = centers[rng.integers(len(centers), size=args.queries)]
+    Q = Q + rng.normal(size=(args.queries, args.dim))
+    print(f"{'n':>8s} {'exact ms/q':>11s} {'ivf ms/q':>9s} {'lists':>6s} {'recall':>7s}")
+    for n in args.sizes:
+        index = KNNIndex.empty(args.dim)
+        X = centers[rng.integers(len(centers), size=n)] + rng.normal(size=(n, args.dim))
+        index.add(X, [str(i % 6) for i in range(n)])
+        exact_ms, exact = _timed(index, Q, args.k)
+
+        n_lists = max(1, int(np.sqrt(n)))
+        index.build_ivf(n_lists, n_probe=args.n_probe)
+        ivf_ms, ivf = _timed(index, Q, args.k)
+        recall = np.mean(
+            [len(np.intersect1d(a, b)) / args.k for a, b in zip(exact, ivf, strict=True)]
+        )
+        print(f"{n:8d} {exact_ms:11.3f} {ivf_ms:9.3f} {n_lists:6d} {recall:7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Microbenchmark rule tagging throughput.
+
+Compares the original per-keyword ``in`` scans (reproduced below) with the
+compiled ``tag_sentence_rules`` on sentences from the control PDF plus a
+synthetic set that exercises every layer, and checks the labels match.
+
+Usage:
+    PYTHONPATH=src python scripts/bench_rules.py --n 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import re
+import time
+from collections.abc import Callable
+
+from ktflow.ingest.pdf import extract_text_from_pdf
+from ktflow.segment.sentence import split_sentences
+from ktflow.tag.rulepack import DEFAULT_RULEPACK
+from ktflow.tag.rules import KTLabel, tag_sentence_rules
+
+# --- legacy implementation ---------------------------------------------------
+
+
+def _has(patterns: list[str], s_lower: str) -> bool:
+    return any(p in s_lower for p in patterns)
+
+
+def _has_regex(regexes: list[str], text: str) -> bool:
+    return any(re.search(rx, text, flags=re.IGNORECASE) for rx in regexes)
+
+
+def _is_bare_term_list(s: str) -> bool:
+    s_lower = s.lower()
+    if ":" in s_lower and "," in s_lower:
+        return True
+    MIN_LIST_ITEMS = 2
+    MAX_LIST_SENTENCE_LEN = 160
+    if s.count(",") >= MIN_LIST_ITEMS and len(s) < MAX_LIST_SENTENCE_LEN:
+        # If there are many commas and no obvious verbs, treat as list
+        if not re.search(
+            r"\b(is|are|was|were|be|am|being|been|do|does|did|has|have|had)\b", s_lower
+        ):
+            return True
+    return False
+
+
+def legacy_tag_sentence_rules(s: str) -> KTLabel:  # noqa: PLR0911
+    if not s or not s.strip():
+        return "UNK"
+
+    s_lower = s.strip().lower()
+
+    # M: Meta (assumptions/reframing)
+    if _has(
+        [
+            "assume",
+            "assumption",
+            "assumptions",
+            "what if",
+            "reframe",
+            "hidden",
+            "bias",
+            "perspective",
+            "premise",
+            "underlying",
+            "frame",
+            "meta",
+        ],
+        s_lower,
+    ):
+        return "M"
+
+    # G: Generative (principles/transfer)
+    if _has(
+        [
+            "in general",
+            "the principle",
+            "principle of",
+            "the rule",
+            "applies to",
+            "can be applied",
+            "generalize",
+            "generalise",
+            "transfer to",
+            "in other domains",
+        ],
+        s_lower,
+    ):
+        return "G"
+
+    # St: Structural (systems/feedbacks)
+    if _has(
+        [
+            "overall",
+            "system works",
+            "integrat",
+            "feedback",
+            "loop",
+            "component",
+            "components",
+            "interact",
+            "structure",
+            "subsystem",
+            "dynamics",
+            "flows",
+            "flow of",
+            "architecture",
+        ],
+        s_lower,
+    ):
+        return "St"
+
+    # R: Relational (causal/associative links)
+    if _has(
+        [
+            "because",
+            "therefore",
+            "thus",
+            "hence",
+            "affects",
+            "causes",
+            "leads to",
+            "results in",
+            "due to",
+            "impact",
+            "impacts",
+            "affect",
+            "drives",
+        ],
+        s_lower,
+    ) or _has_regex([r"\bif\b.*\bthen\b"], s):
+        return "R"
+
+    # L: Literal (definitions)
+    if _has(
+        [
+            "means",
+            "is defined as",
+            "defined as",
+            "refers to",
+            "is a ",
+            "is an ",
+            "is the ",
+        ],
+        s_lower,
+    ):
+        return "L"
+
+    # S: Symbol (form/terms)
+    if _has(
+        [
+            "what is",
+            "list",
+            "term",
+            "terms",
+        ],
+        s_lower,
+    ) or _is_bare_term_list(s):
+        return "S"
+
+    return "UNK"
+
+
+# -----------------------------------------------------------------------------
+
+
+def _synthetic() -> list[str]:
+    # Pair every keyword with every other one so overlaps and priority ties occur
+    kws = [k for layer in DEFAULT_RULEPACK["layers"].values() for k in layer["keywords"]]
+    out = [f"The {a.strip()} here {b.strip()} there." for a, b in itertools.product(kws, kws)]
+    out += [
+        "If pressure increases then volume decreases.",
+        "Terms: mass, energy, momentum.",
+        "red, green, blue",
+        "What is a frame?",
+        "",
+        "   ",
+    ]
+    return out
+
+
+def _time(fn: Callable[[str], str], sents: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for s in sents:
+            fn(s)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--src", default="data/raw/kt_control_v1.pdf")
+    p.add_argument("--n", type=int, default=200_000)
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    control = split_sentences(extract_text_from_pdf(args.src))
+    pool = control + _synthetic()
+    mismatches = [s for s in pool if legacy_tag_sentence_rules(s) != tag_sentence_rules(s)]
+    print(f"parity: {len(pool)} distinct sentences, {len(mismatches)} mismatches")
+    for s in mismatches[:5]:
+        print(f"  {legacy_tag_sentence_rules(s)} != {tag_sentence_rules(s)}: {s!r}")
+
+    for name, src in (("control", control), ("control+synthetic", pool)):
+        sents = list(itertools.islice(itertools.cycle(src), args.n))
+        base = _time(legacy_tag_sentence_rules, sents, args.repeat)
+        new = _time(tag_sentence_rules, sents, args.repeat)
+        print(f"{name}:")
+        print(f"  legacy  {len(sents) / base:10.0f} sents/s")
+        print(f"  current {len(sents) / new:10.0f} sents/s  x{base / new:.2f}")
+
+
+if __name__ == "__main__":
+    main()
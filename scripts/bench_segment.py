@@ -0,0 +1,67 @@
+"""Microbenchmark the sentence splitter on multi-MB text.
+
+Compares the original three-pass ``split_sentences`` (reproduced below) with
+the current wrapper and with ``iter_sentences(normalized=True)`` on text that
+is already normalized, as produced by ``ktflow.ingest``.
+
+Usage:
+    PYTHONPATH=src python scripts/bench_segment.py --mb 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from collections.abc import Callable
+
+from ktflow.ingest.pdf import extract_text_from_pdf
+from ktflow.segment.sentence import _SPLIT_REGEX, iter_sentences, split_sentences
+
+
+def legacy_split_sentences(text: str) -> list[str]:
+    if not text:
+        return []
+    normalized = text.replace("\r", " ").replace("\n", " ")
+    normalized = re.sub(r"\s+", " ", normalized).strip()
+    if not re.search(r"[.!?]", normalized):
+        return [normalized] if normalized else []
+    return [p.strip() for p in _SPLIT_REGEX.split(normalized) if p.strip()]
+
+
+def _time(fn: Callable[[], int], repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    n = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, n
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--src", default="data/raw/kt_control_v1.pdf")
+    p.add_argument("--mb", type=float, default=8.0)
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    base = extract_text_from_pdf(args.src)
+    reps = max(1, int(args.mb * 1e6 / (len(base) + 1)))
+    text = " ".join([base] * reps)
+    print(f"text: {len(text) / 1e6:.1f} MB")
+
+    cases: dict[str, Callable[[], int]] = {
+        "legacy split_sentences": lambda: len(legacy_split_sentences(text)),
+        "split_sentences": lambda: len(split_sentences(text)),
+        "iter_sentences(normalized)": lambda: sum(1 for _ in iter_sentences(text)),
+    }
+    baseline = None
+    for name, fn in cases.items():
+        dt, n = _time(fn, args.repeat)
+        baseline = baseline or dt
+        print(f"{name:<28s} {dt * 1e3:8.1f} ms  {n:>8d} sents  x{baseline / dt:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark per-worker memory of the TF-IDF tagger in a run_corpus-style pool.
+
+Each worker loads the model in the pool initializer (as ``run_corpus.py``
+does) and tags a batch of sentences. It then reports its anonymous (private) and
+file-backed resident memory, plus its proportional share (PSS), from
+``/proc/self/smaps_rollup``. A joblib bundle is unpickled into every worker.
+The compact artifact is memory-mapped, so its pages are file-backed and shared.
+Workers are spawned rather than forked, so they do not inherit the parent's
+pages. Linux only.
+
+Usage:
+    PYTHONPATH=src python scripts/bench_worker_rss.py --model models/tfidf_lr.joblib \
+      --sentences data/processed/kt_control_v1_sentences.jsonl --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from ktflow.io.model import load_joblib
+
+_MODEL: Any = None
+
+
+def _init(path: str) -> None:
+    global _MODEL  # noqa: PLW0603
+    from ktflow.tag.compact import load_model
+
+    _MODEL = load_model(path)
+
+
+def _rss_mb() -> dict[str, float]:
+    rollup = Path("/proc/self/smaps_rollup").read_text().splitlines()[1:]
+    fields = dict(line.split(":", 1) for line in rollup)
+    mb = {k: int(v.split()[0]) / 1024 for k, v in fields.items()}
+    return {"anon": mb["Anonymous"], "file": mb["Rss"] - mb["Anonymous"], "pss": mb["Pss"]}
+
+
+def _tag(texts: list[str]) -> dict[str, float]:
+    from ktflow.tag.hybrid import tag_sentences_hybrid
+
+    tag_sentences_hybrid(texts, model=_MODEL, rules_first=False)
+    return _rss_mb()
+
+
+def _baseline(_: int) -> dict[str, float]:
+    return _rss_mb()
+
+
+def _measure(path: str, texts: list[str], workers: int) -> list[dict[str, float]]:
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(workers, ctx, initializer=_init, initargs=(path,)) as ex:
+        return list(ex.map(_tag, [texts] * workers))
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--model", required=True, help="Joblib TF-IDF bundle")
+    p.add_argument("--sentences", required=True, help="JSONL with a text field")
+    p.add_argument("--workers", type=int, default=4)
+    args = p.parse_args()
+
+    with open(args.sentences, encoding="utf-8") as f:
+        texts = [json.loads(line)["text"] for line in f if line.strip()]
+    with ProcessPoolExecutor(1, mp.get_context("spawn")) as ex:
+        base = ex.submit(_baseline, 0).result()
+    print(f"empty worker: anon {base['anon']:.1f} MB, file {base['file']:.1f} MB")
+
+    from ktflow.tag.compact import export_compact
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compact = str(export_compact(load_joblib(args.model), Path(tmp) / "compact"))
+        print(f"{'model':<8s} {'anon MB':>8s} {'file MB':>8s} {'PSS MB':>8s}  (per worker)")
+        for name, path in (("joblib", args.model), ("compact", compact)):
+            stats = _measure(path, texts, args.workers)
+            anon, file_backed, pss = (max(s[k] for s in stats) for k in ("anon", "file", "pss"))
+            print(f"{name:<8s} {anon:8.1f} {file_backed:8.1f} {pss:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ import json
 from pathlib import Path
 
 from ktflow.io.model import load_joblib
-from ktflow.tag.hybrid import tag_sentence_hybrid
+from ktflow.tag.hybrid import tag_sentences_hybrid
 
 
 def _read_jsonl(path: Path) -> list[dict]:
@@ -70,17 +70,34 @@ def main(argv: list[str] | None = None) -> int:
         "--csv",
         help="Optional CSV path for manual review (sentence,layer_suggested,layer_final)",
     )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1024,
+        help="Sentences tagged per batch when seeding suggestions",
+    )
     args = parser.parse_args(argv)
+    chunk_size = max(1, int(args.chunk_size))
 
     rows = _read_jsonl(Path(args.input))
     model = load_joblib(args.model) if args.model else None
 
-    seed_rows: list[dict] = []
-    for r in rows:
-        text = r["text"]
-        # Seed with rules first, then ML if provided
-        label = tag_sentence_hybrid(text, model=model, rules_first=True, confidence_gap=0.25)
-        seed_rows.append({"text": text, "layer_suggested": label})
+    texts = [r["text"] for r in rows]
+    # Seed with rules first, then ML if provided (only where rules give UNK)
+    suggested: list[str] = []
+    for start in range(0, len(texts), chunk_size):
+        suggested.extend(
+            tag_sentences_hybrid(
+                texts[start : start + chunk_size],
+                model=model,
+                rules_first=True,
+                confidence_gap=0.25,
+            )
+        )
+    seed_rows = [
+        {"text": text, "layer_suggested": label}
+        for text, label in zip(texts, suggested, strict=True)
+    ]
 
     # Option (a): CSV + TUI
     csv_path = Path(args.csv) if args.csv else Path("data/interim/answer_keys/seed.csv")
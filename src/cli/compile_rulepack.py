@@ -0,0 +1,48 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Compile a rulepack spec (JSON) into a versioned artifact for the taggers.
+
+Usage:
+    # Start from the built-in rules
+    python src/cli/compile_rulepack.py --dump-spec rulepacks/default.json
+    # Edit the JSON, then compile it
+    python src/cli/compile_rulepack.py --spec rulepacks/default.json \
+      --out models/rulepacks/default.joblib
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from ktflow.tag.rulepack import DEFAULT_RULEPACK, compile_rulepack, save_rulepack
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile a KTFlow rulepack")
+    parser.add_argument("--spec", help="Rulepack JSON spec (default: built-in rules)")
+    parser.add_argument("--out", help="Output path for the compiled rulepack (.joblib)")
+    parser.add_argument("--dump-spec", help="Write the built-in spec as JSON to this path")
+    args = parser.parse_args(argv)
+
+    if args.dump_spec:
+        out = Path(args.dump_spec)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(DEFAULT_RULEPACK, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {out}")
+    if not args.out:
+        return 0
+
+    if args.spec:
+        with open(args.spec, encoding="utf-8") as f:
+            spec = json.load(f)
+    else:
+        spec = DEFAULT_RULEPACK
+    pack = compile_rulepack(spec)
+    save_rulepack(pack, args.out)
+    print(f"Wrote {args.out}: {pack.name} v{pack.version} sha256={pack.sha256}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Distill the HF tagger into the TF-IDF + LR tagger via soft labels.
+
+The HF model (teacher) runs once over an unlabeled sentence corpus; its
+probabilities train the char-n-gram TF-IDF + LogisticRegression student,
+which is saved as a regular ``ModelBundle`` for retag/run_corpus.
+
+Usage:
+    python src/cli/distill.py --corpus data/processed/*_sentences.jsonl \
+      --hf-model-dir models/hf_tagger --out models/tfidf_lr_distilled.joblib \
+      --gold data/interim/answer_keys/kt_control_v1_sentences.jsonl \
+      --soft-labels data/interim/soft_labels.joblib
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Iterator
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from ktflow.io.model import load_joblib, save_joblib
+from ktflow.tag.ml import distill_tfidf_lr, predict_proba
+
+
+def _iter_corpus(paths: list[str], text_col: str) -> Iterator[str]:
+    """Distinct non-empty sentences across the corpus files, in order."""
+    seen: set[str] = set()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                text = json.loads(line).get(text_col, "").strip()
+                if text and text not in seen:
+                    seen.add(text)
+                    yield text
+
+
+def _teacher_soft_labels(
+    args: argparse.Namespace,
+) -> tuple[list[str], np.ndarray, list[str]]:
+    """Score the corpus with the HF teacher in chunks; returns (texts, probs, labels)."""
+    from ktflow.tag.hf import load_hf_tagger
+
+    tagger = load_hf_tagger(args.hf_model_dir, args.hf_backend)
+    tagger.batch_size = args.hf_batch_size
+    sentences = _iter_corpus(args.corpus, args.text_col)
+    if args.max_sentences:
+        sentences = islice(sentences, args.max_sentences)
+    texts: list[str] = []
+    probs: list[np.ndarray] = []
+    t0 = time.perf_counter()
+    while chunk := list(islice(sentences, args.chunk_size)):
+        logits = tagger.logits(chunk) / args.temperature
+        e_x = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs.append((e_x / e_x.sum(axis=1, keepdims=True)).astype(np.float16))
+        texts.extend(chunk)
+    dt = time.perf_counter() - t0
+    print(f"Teacher scored {len(texts)} sentences in {dt:.1f}s ({len(texts) / dt:.0f}/s)")
+    soft = np.vstack(probs) if probs else np.empty((0, len(tagger.labels)), dtype=np.float16)
+    return texts, soft, list(tagger.labels)
+
+
+def _read_gold(path: str, text_col: str, label_col: str) -> tuple[list[str], list[str]]:
+    texts: list[str] = []
+    labels: list[str] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get(label_col) and row[label_col] != "UNK":
+                texts.append(row[text_col])
+                labels.append(row[label_col])
+    return texts, labels
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Distill the HF tagger into a TF-IDF LR tagger")
+    p.add_argument("--corpus", nargs="+", required=True, help="Unlabeled sentence JSONL files")
+    p.add_argument("--hf-model-dir", help="Teacher model (not needed with cached --soft-labels)")
+    p.add_argument(
+        "--hf-backend", choices=["torch", "torch-int8", "onnx", "onnx-int8"], default="torch"
+    )
+    p.add_argument("--hf-batch-size", type=int, default=64)
+    p.add_argument("--out", required=True, help="Output student model path (.joblib)")
+    p.add_argument(
+        "--soft-labels",
+        help="Teacher soft labels (.joblib): reused if present, otherwise written here",
+    )
+    p.add_argument("--gold", help="Labeled JSONL mixed in as hard labels")
+    p.add_argument("--gold-weight", type=float, default=1.0, help="Sample weight of gold rows")
+    p.add_argument("--temperature", type=float, default=1.0, help="Teacher softmax temperature")
+    p.add_argument(
+        "--min-prob",
+        type=float,
+        default=0.01,
+        help="Drop teacher classes below this probability",
+    )
+    p.add_argument("--holdout", type=float, default=0.05, help="Fraction held out to compare")
+    p.add_argument("--max-sentences", type=int, help="Cap on distinct corpus sentences")
+    p.add_argument("--chunk-size", type=int, default=4096, help="Sentences per teacher call")
+    p.add_argument("--text-col", default="text")
+    p.add_argument("--label-col", default="layer")
+    args = p.parse_args(argv)
+
+    if args.soft_labels and Path(args.soft_labels).exists():
+        cached = load_joblib(args.soft_labels)
+        texts, soft, classes = cached["texts"], cached["probs"], cached["labels"]
+        print(f"Loaded {len(texts)} soft labels from {args.soft_labels}")
+    else:
+        if not args.hf_model_dir:
+            p.error("--hf-model-dir is required unless --soft-labels points to a cached file")
+        texts, soft, classes = _teacher_soft_labels(args)
+        if args.soft_labels:
+            save_joblib({"texts": texts, "probs": soft, "labels": classes}, args.soft_labels)
+    if not texts:
+        p.error("No sentences found in --corpus")
+
+    order = np.random.default_rng(0).permutation(len(texts))
+    n_hold = int(len(texts) * args.holdout) if len(texts) > 1 else 0
+    hold, train = order[:n_hold], order[n_hold:]
+    gold_texts, gold_labels = (
+        _read_gold(args.gold, args.text_col, args.label_col) if args.gold else ([], [])
+    )
+    model = distill_tfidf_lr(
+        [texts[i] for i in train],
+        soft[train],
+        classes,
+        gold_texts=gold_texts,
+        gold_labels=gold_labels,
+        gold_weight=args.gold_weight,
+        min_prob=args.min_prob,
+    )
+    save_joblib(model, args.out)
+    print(f"Saved student to {args.out} ({len(train)} soft + {len(gold_texts)} gold rows)")
+
+    if n_hold:
+        hold_texts = [texts[i] for i in hold]
+        t0 = time.perf_counter()
+        student = model.label_encoder.classes_[predict_proba(model, hold_texts).argmax(axis=1)]
+        dt = time.perf_counter() - t0
+        teacher = np.asarray(classes)[soft[hold].argmax(axis=1)]
+        agree = float((student == teacher).mean())
+        print(
+            f"Held-out agreement with teacher: {agree:.4f} on {n_hold} sentences; "
+            f"student {n_hold / dt:.0f} sentences/s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
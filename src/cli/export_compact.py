@@ -0,0 +1,55 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Export a TF-IDF tagger bundle as a compact, scikit-learn-free artifact.
+
+Usage:
+    python src/cli/export_compact.py --model models/tfidf_lr.joblib \
+      --out models/tfidf_lr_compact
+    python src/cli/retag.py --input ... --out ... --model models/tfidf_lr_compact
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ktflow.io.model import load_joblib
+from ktflow.tag.compact import export_compact, load_compact
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Export a TF-IDF tagger as a compact artifact")
+    p.add_argument("--model", required=True, help="Trained bundle from train_tagger.py")
+    p.add_argument("--out", required=True, help="Output artifact directory")
+    p.add_argument(
+        "--check",
+        nargs="*",
+        metavar="TEXT",
+        help="Sentences to score with both models; fails if probabilities differ",
+    )
+    args = p.parse_args(argv)
+
+    model = load_joblib(args.model)
+    out = export_compact(model, args.out)
+    size = sum(f.stat().st_size for f in Path(out).iterdir())
+    print(
+        f"Wrote {out} ({size / 1e6:.2f} MB; joblib {Path(args.model).stat().st_size / 1e6:.2f} MB)"
+    )
+
+    t0 = time.perf_counter()
+    compact = load_compact(out)
+    print(f"Loads in {1e3 * (time.perf_counter() - t0):.1f} ms")
+    if args.check:
+        from ktflow.tag.ml import predict_proba
+
+        diff = np.abs(compact.predict_proba(args.check) - predict_proba(model, args.check)).max()
+        print(f"Max probability difference: {diff:.2e}")
+        if diff > 1e-5:  # noqa: PLR2004
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,37 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Export a fine-tuned HF classifier to ONNX (and optionally int8) for CPU inference.
+
+Usage:
+    python src/cli/export_hf.py --model-dir models/hf_tagger --int8
+    python src/cli/retag.py --input ... --out ... \
+      --hf-model-dir models/hf_tagger/onnx --hf-backend onnx-int8
+"""
+
+import argparse
+from pathlib import Path
+
+from ktflow.tag.hf import export_onnx
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Export a KTFlow HF classifier to ONNX")
+    p.add_argument("--model-dir", required=True, help="Directory from train_tagger_hf.py")
+    p.add_argument("--out", help="Export directory (default: <model-dir>/onnx)")
+    p.add_argument(
+        "--int8",
+        action="store_true",
+        help="Also write a dynamically quantized int8 graph (needs onnxruntime)",
+    )
+    p.add_argument("--opset", type=int, default=17)
+    args = p.parse_args(argv)
+
+    out_dir = Path(args.out) if args.out else Path(args.model_dir) / "onnx"
+    for path in export_onnx(args.model_dir, out_dir, int8=args.int8, opset=args.opset):
+        print(f"Wrote {path} ({path.stat().st_size / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
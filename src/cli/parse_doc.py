@@ -14,15 +14,30 @@ Usage:
 import argparse
 import logging
 import sys
+from array import array
+from collections.abc import Iterator
+from itertools import islice
 from pathlib import Path
 
+import numpy as np
+
 from ktflow.config import Settings, setup_logging
-from ktflow.ingest.pdf import extract_text_from_pdf
+from ktflow.ingest.cache import ExtractionCache
+from ktflow.ingest.pdf import iter_pages
 from ktflow.io.jsonl import write_jsonl
-from ktflow.map.graph import build_flow_counts, find_motifs, to_edge_list_csv
+from ktflow.map.graph import (
+    build_flow_matrix,
+    find_motifs,
+    flow_matrix_to_counts,
+    to_edge_list_csv,
+)
 from ktflow.map.viz import draw_flow_graph
-from ktflow.segment.sentence import split_sentences
-from ktflow.tag.rules import tag_sentence_rules
+from ktflow.segment.sentence import iter_sentences
+from ktflow.tag.rulepack import load_rulepack
+from ktflow.tag.rules import LABELS, decode_labels, tag_sentences_rules
+
+# Units are tagged in batches of this size as they stream in
+TAG_BATCH_SIZE = 1024
 
 
 def _infer_doc_id(input_path: Path) -> str:
@@ -52,6 +67,32 @@ def main(argv: list[str] | None = None) -> int:  # noqa: PLR0912, PLR0915
         default="sentence",
         help="Segmentation mode",
     )
+    parser.add_argument(
+        "--seg-workers",
+        type=int,
+        default=1,
+        help="Processes for chunk-parallel EDU segmentation (--seg edu only)",
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=settings.extract_workers,
+        help="Processes for page-parallel PDF extraction (1 = serial)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(settings.extract_cache_dir),
+        help="Directory for the extracted-text cache",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always extract from scratch; do not read or write the cache",
+    )
+    parser.add_argument(
+        "--rulepack",
+        help="Rulepack to tag with: a JSON spec or a compiled artifact (default: built-in)",
+    )
     parser.add_argument(
         "--viz",
         help="Optional path to write a PNG of the flow graph",
@@ -87,32 +128,56 @@ def main(argv: list[str] | None = None) -> int:  # noqa: PLR0912, PLR0915
             raise FileNotFoundError(f"Input PDF not found: {input_path}")
 
         doc_id = _infer_doc_id(input_path)
+        rulepack = load_rulepack(args.rulepack) if args.rulepack else None
+        if rulepack is not None:
+            log.info(
+                "Using rulepack %s v%d (%s)", rulepack.name, rulepack.version, rulepack.sha256[:12]
+            )
 
-        text = extract_text_from_pdf(str(input_path))
+        cache = (
+            None
+            if args.no_cache
+            else ExtractionCache(args.cache_dir, max_bytes=settings.extract_cache_max_bytes)
+        )
+        # Pages are decoded, segmented and tagged incrementally
+        pages = iter_pages(str(input_path), workers=max(1, int(args.extract_workers)), cache=cache)
         if args.seg == "edu":
-            from ktflow.segment.edu import split_edus
+            from ktflow.segment.edu import EduSegmenter
 
-            sentences = [s for s in split_edus(text) if s.strip()]
+            # One warm segmenter for the whole run (plus one per pool worker)
+            segmenter = EduSegmenter(workers=max(1, int(args.seg_workers)))
+            units = segmenter.stream(pages)
         else:
-            sentences = [s for s in split_sentences(text) if s.strip()]
-
-        records = []
-        labels: list[str] = []
-        for i, s in enumerate(sentences):
-            label = tag_sentence_rules(s)
-            labels.append(label)
-            records.append(
-                {
-                    "doc_id": doc_id,
-                    "i": i,
-                    "text": s,
-                    "layer": label,
-                }
-            )
-
-        write_jsonl(out_sentences, records)
-
-        counts = build_flow_counts(labels, window=window)
+            segmenter = None
+            units = iter_sentences(pages)
+
+        codes = array("b")
+
+        def _records() -> Iterator[dict]:
+            i = 0
+            stream = (seg for seg in units if seg.text.strip())
+            while batch := list(islice(stream, TAG_BATCH_SIZE)):
+                batch_codes = tag_sentences_rules([seg.text for seg in batch], rulepack=rulepack)
+                codes.extend(batch_codes.tolist())
+                for seg, code in zip(batch, batch_codes.tolist(), strict=True):
+                    yield {
+                        "doc_id": doc_id,
+                        "i": i,
+                        "page": seg.page,
+                        "span": [seg.start, seg.end],
+                        "text": seg.text,
+                        "layer": LABELS[code],
+                    }
+                    i += 1
+
+        try:
+            write_jsonl(out_sentences, _records())
+        finally:
+            if segmenter is not None:
+                segmenter.close()
+
+        matrix = build_flow_matrix(np.frombuffer(codes, dtype=np.int8), len(LABELS), window)
+        counts = flow_matrix_to_counts(matrix, LABELS)
         to_edge_list_csv(doc_id=doc_id, counts=counts, path=str(out_flows))
 
         if args.viz:
@@ -138,7 +203,7 @@ def main(argv: list[str] | None = None) -> int:  # noqa: PLR0912, PLR0915
                 log.warning("Failed to render chord: %s", e)
 
         if args.motifs:
-            motif_counts = find_motifs(labels)
+            motif_counts = find_motifs(decode_labels(codes))
             motif_rows = [
                 {"doc_id": doc_id, "motif": k, "count": v} for k, v in sorted(motif_counts.items())
             ]
@@ -154,7 +219,7 @@ def main(argv: list[str] | None = None) -> int:  # noqa: PLR0912, PLR0915
                     writer.writerow([row["doc_id"], row["motif"], row["count"]])
 
         # Basic acceptance: ensure at least some content
-        if len(sentences) == 0:
+        if len(codes) == 0:
             print("No sentences produced from input.", file=sys.stderr)
             return 2
 
@@ -3,9 +3,9 @@ from __future__ import annotations
 
 """Preflight evaluation CLI: compare predicted sentence labels to a gold key.
 
-Aligns by exact sentence text and computes accuracy, macro/micro F1, per-label
-precision/recall, and a confusion matrix. Writes a human-readable report and
-optionally a CSV of the confusion matrix.
+Aligns by exact sentence text (or by ``(doc_id, span)`` offsets) and computes
+accuracy, macro/micro F1, per-label precision/recall, and a confusion matrix.
+Writes a human-readable report and optionally a CSV of the confusion matrix.
 """
 
 import argparse
@@ -43,6 +43,23 @@ def _align_by_text(pred_rows: list[dict], gold_rows: list[dict]) -> tuple[list[s
     return y_true, y_pred
 
 
+def _align_by_span(pred_rows: list[dict], gold_rows: list[dict]) -> tuple[list[str], list[str]]:
+    """Align rows on ``(doc_id, span)``; rows without a span are skipped."""
+    gold_by_span: dict[tuple[str, int, int], str] = {
+        (r.get("doc_id", ""), *r["span"]): r["layer"] for r in gold_rows if r.get("span")
+    }
+    y_true: list[str] = []
+    y_pred: list[str] = []
+    for r in pred_rows:
+        if not r.get("span"):
+            continue
+        key = (r.get("doc_id", ""), *r["span"])
+        if key in gold_by_span:
+            y_true.append(gold_by_span[key])
+            y_pred.append(r["layer"])
+    return y_true, y_pred
+
+
 from typing import Any
 
 
@@ -61,6 +78,12 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument("--gold", required=True, help="Gold JSONL path")
     parser.add_argument("--report", required=True, help="Path to write report")
     parser.add_argument("--csv", help="Optional CSV path for confusion matrix")
+    parser.add_argument(
+        "--align",
+        choices=["text", "span"],
+        default="text",
+        help="Match pred/gold rows by exact text or by (doc_id, span) offsets",
+    )
     args = parser.parse_args(argv)
 
     pred_path = Path(args.pred)
@@ -71,7 +94,8 @@ def main(argv: list[str] | None = None) -> int:
     pred_rows = _read_jsonl(pred_path)
     gold_rows = _read_jsonl(gold_path)
 
-    y_true, y_pred = _align_by_text(pred_rows, gold_rows)
+    align = _align_by_span if args.align == "span" else _align_by_text
+    y_true, y_pred = align(pred_rows, gold_rows)
     if not y_true:
         report = "No overlapping sentences between pred and gold."
         report_path.parent.mkdir(parents=True, exist_ok=True)
@@ -5,71 +5,207 @@ from __future__ import annotations
 
 import argparse
 import json
+from itertools import islice
 from pathlib import Path
+from typing import Any
 
-from ktflow.io.model import load_joblib
-from ktflow.tag.hybrid import tag_sentence_hybrid
-from ktflow.tag.rules import tag_sentence_rules
+import numpy as np
 
+from ktflow.config import Settings
+from ktflow.tag.cascade import Cascade, Stage
+from ktflow.tag.compact import load_model
+from ktflow.tag.rulepack import CompiledRulepack, load_rulepack
+from ktflow.tag.rules import decode_labels, tag_sentences_rules
 
-def main(argv: list[str] | None = None) -> int:
+
+def _build_knn(args: argparse.Namespace, hf_tagger: Any) -> Any:
+    """k-NN tagger over ``--knn-train``, embedding with the HF session (cached on disk)."""
+    if not hasattr(hf_tagger, "embed"):
+        raise ValueError("--knn-train needs --hf-model-dir with a torch backend to embed")
+    from ktflow.tag.embed_store import EmbeddingStore, model_dir_hash
+    from ktflow.tag.knn import KNNTagger, build_knn_index
+
+    settings = Settings()
+    store = EmbeddingStore(
+        settings.embed_store_dir,
+        model_dir_hash(args.hf_model_dir),
+        max_bytes=settings.embed_store_max_bytes,
+    )
+
+    def _encode(texts: list[str]) -> np.ndarray:
+        return store.embed(texts, hf_tagger.embed).astype(np.float32)
+
+    index = build_knn_index(args.knn_train, _encode)
+    if args.knn_lists:
+        index.build_ivf(args.knn_lists)
+    return KNNTagger(index, _encode, k=args.knn_k)
+
+
+def _cached(args: argparse.Namespace, model: Any, hf_tagger: Any) -> tuple[Any, Any, list[Any]]:
+    """Wrap the TF-IDF and HF scorers in the on-disk prediction cache."""
+    from ktflow.tag.pred_cache import CachedTagger, PredictionCache, tagger_hash
+
+    cache = PredictionCache(args.pred_cache)
+    wrapped = []
+    if model is not None:
+        model = CachedTagger(model, cache, tagger_hash(args.model), name="tfidf")
+        wrapped.append(model)
+    if hf_tagger is not None:
+        key = tagger_hash(args.hf_model_dir, backend=args.hf_backend)
+        hf_tagger = CachedTagger(hf_tagger, cache, key, name="hf")
+        wrapped.append(hf_tagger)
+    return model, hf_tagger, wrapped
+
+
+def _build_cascade(
+    args: argparse.Namespace,
+    model: Any,
+    hf_tagger: Any,
+    knn: Any,
+    rulepack: CompiledRulepack | None,
+) -> Cascade:
+    """Rules, then TF-IDF (``--model``), HF (``--hybrid``) and k-NN, as configured."""
+    stages = []
+    if model is not None:
+        stages.append(Stage("tfidf", model, margin=args.gap))
+    if hf_tagger is not None and args.hybrid:
+        stages.append(Stage("hf", hf_tagger, margin=args.hf_gap, budget=args.hf_budget))
+    if knn is not None:
+        stages.append(Stage("knn", knn))
+    return Cascade(stages, rulepack=rulepack)
+
+
+def _parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Retag sentences JSONL")
     parser.add_argument("--input", required=True, help="Input sentences JSONL")
-    parser.add_argument("--model", required=False, help="Model path (.joblib)")
+    parser.add_argument(
+        "--model", required=False, help="TF-IDF model (.joblib, or a ktflow-compact directory)"
+    )
     parser.add_argument("--out", required=True, help="Output sentences JSONL")
     mode = parser.add_mutually_exclusive_group()
     mode.add_argument("--rules-only", action="store_true")
     mode.add_argument("--ml-only", action="store_true")
     parser.add_argument("--hf-model-dir", help="Use HF classifier at this path for tagging")
     parser.add_argument("--hybrid", action="store_true", help="Use hybrid with HF model")
-    parser.add_argument("--gap", type=float, default=0.25, help="Confidence gap for hybrid")
-    args = parser.parse_args(argv)
+    parser.add_argument(
+        "--gap",
+        type=float,
+        default=0.25,
+        help="TF-IDF margin below which sentences escalate to the next stage",
+    )
+    parser.add_argument(
+        "--hf-gap",
+        type=float,
+        default=0.25,
+        help="HF margin below which sentences escalate to k-NN",
+    )
+    parser.add_argument(
+        "--hf-budget",
+        type=float,
+        help="Max fraction of sentences the HF stage may score (least confident first)",
+    )
+    parser.add_argument(
+        "--rulepack",
+        help="Rulepack to tag with: a JSON spec or a compiled artifact (default: built-in)",
+    )
+    parser.add_argument(
+        "--hf-backend",
+        choices=["torch", "torch-int8", "onnx", "onnx-int8"],
+        default="torch",
+        help="Inference backend for --hf-model-dir (onnx* expect an export_hf.py directory)",
+    )
+    parser.add_argument(
+        "--hf-batch-size",
+        type=int,
+        default=64,
+        help="Sentences per forward pass for --hf-model-dir",
+    )
+    parser.add_argument(
+        "--knn-train",
+        help="Labeled JSONL (gold/answer key) for a k-NN hybrid over --hf-model-dir embeddings",
+    )
+    parser.add_argument("--knn-k", type=int, default=10, help="Neighbours per k-NN vote")
+    parser.add_argument(
+        "--knn-lists",
+        type=int,
+        default=0,
+        help="IVF lists for the k-NN index (0: exact search)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1024,
+        help="Rows read, tagged and written per batch",
+    )
+    parser.add_argument(
+        "--pred-cache",
+        default=str(Settings().pred_cache_path),
+        help="SQLite prediction cache for the TF-IDF and HF scorers",
+    )
+    parser.add_argument(
+        "--no-pred-cache",
+        action="store_true",
+        help="Always score with the models; do not read or write the prediction cache",
+    )
+    return parser
+
 
-    model = load_joblib(args.model) if (args.model and not args.rules_only) else None
+def main(argv: list[str] | None = None) -> int:
+    args = _parser().parse_args(argv)
+    chunk_size = max(1, int(args.chunk_size))
+
+    model = load_model(args.model) if (args.model and not args.rules_only) else None
     hf_dir = args.hf_model_dir
+    rulepack = load_rulepack(args.rulepack) if args.rulepack else None
+    use_hf = hf_dir and not args.rules_only and not args.ml_only
+    hf_tagger = None
+    if use_hf:
+        from ktflow.tag.hf import load_hf_tagger
+
+        # One session for the whole file; batches are length-bucketed inside
+        hf_tagger = load_hf_tagger(hf_dir, args.hf_backend, args.hf_batch_size)
+
+    use_knn = args.knn_train and not args.rules_only and not args.ml_only
+    knn = _build_knn(args, hf_tagger) if use_knn else None
+
+    cached: list[Any] = []
+    use_cache = not (args.no_pred_cache or args.rules_only or args.ml_only)
+    if use_cache and (model is not None or hf_tagger is not None):
+        model, hf_tagger, cached = _cached(args, model, hf_tagger)
 
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
+    cascade = _build_cascade(args, model, hf_tagger, knn, rulepack)
+
+    def _label_batch(texts: list[str]) -> list[str]:
+        if args.rules_only:
+            return list(decode_labels(tag_sentences_rules(texts, rulepack=rulepack)))
+        if args.ml_only:
+            if model is None:
+                raise ValueError("--ml-only requires --model")
+            if hasattr(model, "predict"):  # compact artifact
+                return model.predict(texts)
+            from ktflow.tag.ml import predict
+
+            return list(predict(model, texts))
+        if hf_tagger is not None and not args.hybrid and knn is None:
+            return hf_tagger.predict(texts)
+        return cascade.tag(texts)
+
     with open(args.input, encoding="utf-8") as fin, out_path.open("w", encoding="utf-8") as fout:
-        for line in fin:
-            if not line.strip():
-                continue
-            row = json.loads(line)
-            text = row.get("text", "")
-            label: str
-            if args.rules_only:
-                label = str(tag_sentence_rules(text))
-            elif args.ml_only:
-                if model is None:
-                    raise ValueError("--ml-only requires --model")
-                from ktflow.tag.ml import predict
-
-                label = predict(model, [text])[0]
-            elif hf_dir and args.hybrid:
-                # Hybrid with HF: choose HF label unless rules strongly fire
-                from ktflow.tag.hf import predict_hf
-
-                rule = tag_sentence_rules(text)
-                if rule != "UNK":
-                    label = str(rule)
-                else:
-                    label = predict_hf(hf_dir, [text])[0]
-            elif hf_dir:
-                from ktflow.tag.hf import predict_hf
-
-                label = predict_hf(hf_dir, [text])[0]
-            else:
-                label = str(
-                    tag_sentence_hybrid(
-                        text, model=model, rules_first=True, confidence_gap=args.gap
-                    )
-                )
-
-            row["layer"] = label
-            fout.write(json.dumps(row, ensure_ascii=False) + "\n")
+        rows_iter = (json.loads(line) for line in fin if line.strip())
+        while rows := list(islice(rows_iter, chunk_size)):
+            labels = _label_batch([row.get("text", "") for row in rows])
+            for row, label in zip(rows, labels, strict=True):
+                row["layer"] = label
+                fout.write(json.dumps(row, ensure_ascii=False) + "\n")
 
     print(f"Wrote {args.out}")
+    if cascade.stages and not (args.rules_only or args.ml_only):
+        print(cascade.report())
+    for tagger in cached:
+        print(tagger.report())
     return 0
 
 
@@ -4,16 +4,95 @@ from __future__ import annotations
 """Run KTFlow over a corpus of PDFs and aggregate results."""
 
 import argparse
+import os
+import sys
+import tempfile
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
-from typing import TypedDict
+from typing import Any, TypedDict
 
+import numpy as np
 import pandas as pd
-from ktflow.ingest.pdf import extract_text_from_pdf
+from ktflow.config import Settings
+from ktflow.ingest.cache import ExtractionCache
+from ktflow.ingest.pdf import iter_pages
 from ktflow.io.jsonl import write_jsonl
-from ktflow.map.graph import build_flow_counts, to_edge_list_csv
-from ktflow.segment.edu import split_edus
-from ktflow.segment.sentence import split_sentences
-from ktflow.tag.rules import tag_sentence_rules
+from ktflow.io.model import load_joblib
+from ktflow.map.graph import build_flow_matrix, flow_matrix_to_counts, to_edge_list_csv
+from ktflow.segment.edu import get_edu_segmenter
+from ktflow.segment.sentence import iter_sentences
+from ktflow.tag.cascade import Cascade, Stage, StageStats
+from ktflow.tag.rulepack import CompiledRulepack, load_rulepack
+from ktflow.tag.rules import LABEL_CODES, LABELS, tag_sentences_rules
+
+TAG_BATCH_SIZE = 1024
+
+# Set once per worker process by _init_worker
+_WORKER_RULEPACK: CompiledRulepack | None = None
+_WORKER_CASCADE: Cascade | None = None
+
+
+@dataclass(frozen=True)
+class TaggerSpec:
+    """Picklable description of the model stages; each worker loads them once."""
+
+    model: str | None = None  # compact directory or joblib bundle
+    hf_model_dir: str | None = None
+    hf_backend: str = "torch"
+    hf_batch_size: int = 64
+    gap: float = 0.25
+    hf_gap: float = 0.25
+    threads: int | None = None
+
+
+def _shareable_model(path: str, tmp_dir: Path) -> str:
+    """Export a joblib TF-IDF bundle as a compact artifact that workers memory-map.
+
+    Compact directories are returned as-is, as are bundles that cannot be
+    exported (hashed features); workers memory-map the latter's arrays instead.
+    """
+    if Path(path).is_dir():
+        return path
+    from ktflow.tag.compact import export_compact
+
+    try:
+        return str(export_compact(load_joblib(path), tmp_dir / "compact"))
+    except ValueError:
+        return path
+
+
+def _load_cascade(spec: TaggerSpec, rulepack: CompiledRulepack | None) -> Cascade | None:
+    """Rules → TF-IDF → HF cascade for ``spec``; ``None`` when rules tag alone."""
+    stages = []
+    if spec.model:
+        from ktflow.tag.compact import load_compact
+
+        model: Any = (
+            load_compact(spec.model)
+            if Path(spec.model).is_dir()
+            else load_joblib(spec.model, mmap_mode="r")
+        )
+        stages.append(Stage("tfidf", model, margin=spec.gap))
+    if spec.hf_model_dir:
+        from ktflow.tag.hf import load_hf_tagger
+
+        if spec.threads and spec.hf_backend.startswith("torch"):
+            import torch
+
+            torch.set_num_threads(spec.threads)
+        tagger = load_hf_tagger(spec.hf_model_dir, spec.hf_backend, spec.hf_batch_size)
+        stages.append(Stage("hf", tagger, margin=spec.hf_gap))
+    return Cascade(stages, rulepack=rulepack) if stages else None
+
+
+def _init_worker(rulepack: CompiledRulepack | None, spec: TaggerSpec | None = None) -> None:
+    """Pool initializer: keep the compiled rulepack and load the models for this process."""
+    global _WORKER_RULEPACK, _WORKER_CASCADE  # noqa: PLW0603
+    _WORKER_RULEPACK = rulepack
+    _WORKER_CASCADE = _load_cascade(spec, rulepack) if spec else None
 
 
 class Row(TypedDict):
@@ -23,59 +102,240 @@ class Row(TypedDict):
     count: int
 
 
-def run_doc(input_pdf: Path, out_dir: Path, seg: str, window: int) -> Path:
+def run_doc(  # noqa: PLR0913
+    input_pdf: Path,
+    out_dir: Path,
+    seg: str,
+    window: int,
+    extract_workers: int = 1,
+    cache: ExtractionCache | None = None,
+    parquet: bool = False,
+    rulepack: CompiledRulepack | None = None,
+    cascade: Cascade | None = None,
+) -> Path:
     doc_id = input_pdf.stem
-    text = extract_text_from_pdf(str(input_pdf))
-    if seg == "edu":
-        units = split_edus(text)
-    else:
-        units = split_sentences(text)
-    labels = [tag_sentence_rules(u) for u in units]
-    rows = [{"doc_id": doc_id, "i": i, "text": u, "layer": labels[i]} for i, u in enumerate(units)]
+    rulepack = rulepack or _WORKER_RULEPACK
+    cascade = cascade or _WORKER_CASCADE
+    pages = iter_pages(str(input_pdf), workers=extract_workers, cache=cache)
+    # get_edu_segmenter() is cached, so each worker process reuses one instance
+    units = get_edu_segmenter().stream(pages) if seg == "edu" else iter_sentences(pages)
+    codes = array("b")
+    # Compact span columns for the optional parquet output
+    page_col, start_col, end_col = array("I"), array("I"), array("I")
+
+    def _rows() -> Iterator[dict]:
+        i = 0
+        while batch := list(islice(units, TAG_BATCH_SIZE)):
+            texts = [u.text for u in batch]
+            if cascade is not None:
+                batch_codes = [LABEL_CODES[label] for label in cascade.tag(texts)]
+            else:
+                batch_codes = tag_sentences_rules(texts, rulepack=rulepack).tolist()
+            codes.extend(batch_codes)
+            for u, code in zip(batch, batch_codes, strict=True):
+                if parquet:
+                    page_col.append(u.page)
+                    start_col.append(u.start)
+                    end_col.append(u.end)
+                yield {
+                    "doc_id": doc_id,
+                    "i": i,
+                    "page": u.page,
+                    "span": [u.start, u.end],
+                    "text": u.text,
+                    "layer": LABELS[code],
+                }
+                i += 1
 
     out_dir.mkdir(parents=True, exist_ok=True)
     jsonl_path = out_dir / f"{doc_id}_sentences.jsonl"
     flows_path = out_dir / f"{doc_id}_flows.csv"
-    write_jsonl(jsonl_path, rows)
-    counts = build_flow_counts([str(lbl) for lbl in labels], window=window)
-    to_edge_list_csv(doc_id, counts, str(flows_path))
+    write_jsonl(jsonl_path, _rows())
+    code_arr = np.frombuffer(codes, dtype=np.int8)
+    if parquet:
+        pd.DataFrame(
+            {
+                "doc_id": doc_id,
+                "page": np.frombuffer(page_col, dtype=np.uint32),
+                "start": np.frombuffer(start_col, dtype=np.uint32),
+                "end": np.frombuffer(end_col, dtype=np.uint32),
+                "layer": pd.Categorical.from_codes(code_arr, categories=list(LABELS)),
+            }
+        ).to_parquet(out_dir / f"{doc_id}_spans.parquet", index=False)
+    matrix = build_flow_matrix(code_arr, len(LABELS), window=window)
+    to_edge_list_csv(doc_id, flow_matrix_to_counts(matrix, LABELS), str(flows_path))
     return flows_path
 
 
+def _run_worker_doc(*args: Any) -> tuple[Path, int, list[StageStats] | None, int]:
+    """Pool task: :func:`run_doc`, plus this worker's cumulative cascade stats.
+
+    Returns ``(flows_path, pid, stats, total)``. The parent keeps the latest
+    stats per worker process and merges them into one report.
+    """
+    path = run_doc(*args)
+    if _WORKER_CASCADE is None:
+        return path, os.getpid(), None, 0
+    return path, os.getpid(), _WORKER_CASCADE.stats, _WORKER_CASCADE.total
+
+
+def _run_docs(  # noqa: PLR0913
+    pdf_paths: list[Path],
+    args: argparse.Namespace,
+    out_dir: Path,
+    cache: ExtractionCache | None,
+    rulepack: CompiledRulepack | None,
+    spec: TaggerSpec | None,
+) -> list[Path]:
+    """Run every document, in-process or over ``--jobs`` workers; returns flow files."""
+    flow_files: list[Path] = []
+    if args.jobs <= 1:
+        cascade = _load_cascade(spec, rulepack) if spec else None
+        for path in pdf_paths:
+            flow_files.append(
+                run_doc(
+                    path,
+                    out_dir,
+                    args.seg,
+                    args.window,
+                    args.extract_workers,
+                    cache,
+                    args.parquet,
+                    rulepack,
+                    cascade,
+                )
+            )
+        if cascade is not None:
+            print(cascade.report())
+        return flow_files
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    from rich.progress import Progress
+
+    worker_stats: dict[int, tuple[list[StageStats], int]] = {}
+    with Progress() as progress:
+        task = progress.add_task("Processing PDFs", total=len(pdf_paths))
+        # Models are loaded once per worker; compact arrays are memory-mapped, so
+        # their pages are shared by all workers instead of copied into each
+        with ProcessPoolExecutor(
+            max_workers=args.jobs, initializer=_init_worker, initargs=(rulepack, spec)
+        ) as ex:
+            fut_to_path = {
+                ex.submit(
+                    _run_worker_doc,
+                    p,
+                    out_dir,
+                    args.seg,
+                    args.window,
+                    args.extract_workers,
+                    cache,
+                    args.parquet,
+                ): p
+                for p in pdf_paths
+            }
+            for fut in as_completed(fut_to_path):
+                path, pid, stats, total = fut.result()
+                flow_files.append(path)
+                if stats is not None:
+                    worker_stats[pid] = (stats, total)
+                progress.update(task, advance=1)
+    if worker_stats:
+        # One report for the run: sum each worker's final counters
+        runs = list(worker_stats.values())
+        merged = Cascade([], stats=[StageStats(st.name) for st in runs[0][0]])
+        for stats, total in runs:
+            merged.merge(stats, total)
+        print(merged.report())
+    return flow_files
+
+
 def main(argv: list[str] | None = None) -> int:  # noqa: PLR0915
+    settings = Settings()
+
     parser = argparse.ArgumentParser(description="KTFlow corpus runner")
     parser.add_argument("--input-dir", required=True)
     parser.add_argument("--pattern", default="*.pdf")
     parser.add_argument("--out-dir", required=True)
     parser.add_argument("--seg", choices=["sentence", "edu"], default="sentence")
     parser.add_argument("--window", type=int, default=1)
-    parser.add_argument("--parquet", action="store_true")
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also write per-document span tables (<doc_id>_spans.parquet; needs pyarrow)",
+    )
     parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument(
+        "--rulepack",
+        help="Rulepack to tag with: a JSON spec or a compiled artifact (default: built-in)",
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=settings.extract_workers,
+        help="Processes for page-parallel PDF extraction within each document",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(settings.extract_cache_dir),
+        help="Directory for the extracted-text cache",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always extract from scratch; do not read or write the cache",
+    )
+    parser.add_argument(
+        "--model",
+        help="TF-IDF tagger (.joblib or ktflow-compact directory) for rule-UNK sentences",
+    )
+    parser.add_argument("--gap", type=float, default=0.25, help="TF-IDF confidence gap")
+    parser.add_argument(
+        "--hf-model-dir",
+        help="HF tagger, escalated to after --model (one private copy per --jobs worker)",
+    )
+    parser.add_argument(
+        "--hf-backend", choices=["torch", "torch-int8", "onnx", "onnx-int8"], default="torch"
+    )
+    parser.add_argument("--hf-batch-size", type=int, default=64)
+    parser.add_argument("--hf-gap", type=float, default=0.25, help="HF confidence gap")
     args = parser.parse_args(argv)
 
+    if args.hf_model_dir and args.jobs > 1:
+        print(
+            f"Warning: each of the {args.jobs} workers loads its own copy of the HF model "
+            f"({args.hf_model_dir}); only the TF-IDF model is shared. Use fewer --jobs "
+            "if memory is tight.",
+            file=sys.stderr,
+        )
+
     input_dir = Path(args.input_dir)
     out_dir = Path(args.out_dir)
 
     pdf_paths = sorted(Path(input_dir).glob(args.pattern))
+    cache = (
+        None
+        if args.no_cache
+        else ExtractionCache(args.cache_dir, max_bytes=settings.extract_cache_max_bytes)
+    )
 
-    flow_files: list[Path] = []
-    if args.jobs <= 1:
-        for path in pdf_paths:
-            flow_files.append(run_doc(path, out_dir, args.seg, args.window))
-    else:
-        from concurrent.futures import ProcessPoolExecutor, as_completed
+    # Loaded (or compiled) once here; pool workers receive it at startup
+    rulepack = load_rulepack(args.rulepack) if args.rulepack else None
 
-        from rich.progress import Progress
-
-        with Progress() as progress:
-            task = progress.add_task("Processing PDFs", total=len(pdf_paths))
-            with ProcessPoolExecutor(max_workers=args.jobs) as ex:
-                fut_to_path = {
-                    ex.submit(run_doc, p, out_dir, args.seg, args.window): p for p in pdf_paths
-                }
-                for fut in as_completed(fut_to_path):
-                    flow_files.append(fut.result())
-                    progress.update(task, advance=1)
+    with tempfile.TemporaryDirectory(prefix="ktflow-model-") as tmp:
+        spec = None
+        if args.model or args.hf_model_dir:
+            spec = TaggerSpec(
+                model=_shareable_model(args.model, Path(tmp)) if args.model else None,
+                hf_model_dir=args.hf_model_dir,
+                hf_backend=args.hf_backend,
+                hf_batch_size=args.hf_batch_size,
+                gap=args.gap,
+                hf_gap=args.hf_gap,
+                # Split the cores between workers instead of oversubscribing them
+                threads=max(1, (os.cpu_count() or 1) // args.jobs) if args.jobs > 1 else None,
+            )
+        flow_files = _run_docs(pdf_paths, args, out_dir, cache, rulepack, spec)
 
     # Aggregate
     import csv
@@ -121,7 +381,6 @@ def main(argv: list[str] | None = None) -> int:  # noqa: PLR0915
     summary_path = out_dir / "_corpus_summary.csv"
     pd.DataFrame(per_doc_rows).to_csv(summary_path, index=False)
 
-    # Optional parquet persistence of sentence rows is left to pipeline stage
     print(f"Wrote {summary_path} and {matrix_path}")
     return 0
 
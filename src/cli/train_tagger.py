@@ -1,23 +1,94 @@
 # ruff: noqa: E402
 from __future__ import annotations
 
-"""Train a TF-IDF + Logistic Regression tagger and save it via joblib."""
+"""Train a TF-IDF + Logistic Regression tagger and save it via joblib.
+
+Footprint options (``--min-df``, ``--max-features``, ``--chi2-k``, ``--float32``,
+``--penalty l1``) shrink the model; ``--eval`` prints accuracy next to size,
+load time and latency so the smallest model meeting an F1 target can be picked.
+"""
 
 import argparse
+import json
+
+import numpy as np
 
 from ktflow.io.model import save_joblib
-from ktflow.tag.ml import train_tfidf_lr
+from ktflow.tag.ml import evaluate_model, train_hashing_sgd, train_tfidf_lr
+
+
+def _min_df(value: str) -> int | float:
+    """Document count (``5``) or fraction of documents (``0.001``)."""
+    number = float(value)
+    return int(number) if number >= 1 else number
 
 
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Train TF-IDF LR tagger")
     parser.add_argument("--train", required=True, help="JSONL of labeled sentences")
     parser.add_argument("--out", required=True, help="Output model path (.joblib)")
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Out-of-core training: hashed char n-grams + SGD over chunked reads",
+    )
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows per --streaming step")
+    parser.add_argument("--epochs", type=int, default=3, help="Passes over the file (--streaming)")
+    parser.add_argument(
+        "--n-features", type=int, default=1 << 20, help="Hash space size (--streaming)"
+    )
+    parser.add_argument(
+        "--min-df",
+        type=_min_df,
+        default=1,
+        help="Drop n-grams in fewer documents (count or fraction)",
+    )
+    parser.add_argument("--max-features", type=int, help="Keep the most frequent n-grams")
+    parser.add_argument("--chi2-k", type=int, help="Keep the top-k n-grams by chi-squared score")
+    parser.add_argument("--float32", action="store_true", help="float32 features and weights")
+    parser.add_argument(
+        "--penalty",
+        choices=["l2", "l1", "elasticnet"],
+        default="l2",
+        help="l1/elasticnet train with saga and store sparse weights",
+    )
+    parser.add_argument("--C", type=float, default=1.0, help="Inverse regularization strength")
+    parser.add_argument("--l1-ratio", type=float, default=0.5, help="Elastic-net L1 mix")
+    parser.add_argument(
+        "--eval", help="Labeled JSONL: report accuracy, macro F1, size, load time and latency"
+    )
     args = parser.parse_args(argv)
 
-    model = train_tfidf_lr(args.train)
+    if args.streaming:
+        model = train_hashing_sgd(
+            args.train,
+            chunk_size=args.chunk_size,
+            epochs=args.epochs,
+            n_features=args.n_features,
+        )
+    else:
+        model = train_tfidf_lr(
+            args.train,
+            min_df=args.min_df,
+            max_features=args.max_features,
+            chi2_k=args.chi2_k,
+            dtype=np.float32 if args.float32 else np.float64,
+            penalty=args.penalty,
+            C=args.C,
+            l1_ratio=args.l1_ratio,
+        )
     save_joblib(model, args.out)
     print(f"Saved model to {args.out}")
+    if args.eval:
+        with open(args.eval, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        rows = [r for r in rows if r.get("layer") and r["layer"] != "UNK"]
+        stats = evaluate_model(args.out, [r["text"] for r in rows], [r["layer"] for r in rows])
+        print(
+            f"accuracy {stats['accuracy']:.3f}  macro F1 {stats['macro_f1']:.3f}  "
+            f"size {stats['size_mb']:.2f} MB  load {stats['load_ms']:.0f} ms  "
+            f"{stats['ms_per_1k']:.1f} ms/1k sentences  {stats['nonzero_weights']} weights"
+        )
     return 0
 
 
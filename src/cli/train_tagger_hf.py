@@ -5,10 +5,12 @@ from __future__ import annotations
 
 import argparse
 
+from ktflow.config import Settings
 from ktflow.tag.hf import train_hf_classifier
 
 
 def main(argv: list[str] | None = None) -> int:
+    settings = Settings()
     p = argparse.ArgumentParser()
     p.add_argument("--train", required=True)
     p.add_argument(
@@ -20,7 +22,16 @@ def main(argv: list[str] | None = None) -> int:
     p.add_argument("--epochs", type=int, default=3)
     p.add_argument("--batch", type=int, default=32)
     p.add_argument("--lr", type=float, default=2e-5)
-    p.add_argument("--fp16", action="store_true")
+    p.add_argument("--fp16", action="store_true", help="Mixed precision (CUDA only)")
+    p.add_argument("--max-length", type=int, default=256, help="Truncate sentences to N tokens")
+    p.add_argument(
+        "--cache-dir",
+        default=str(settings.hf_token_cache_dir),
+        help="Directory for the pre-tokenized dataset cache",
+    )
+    p.add_argument("--no-cache", action="store_true", help="Tokenize without the disk cache")
+    p.add_argument("--num-workers", type=int, default=0, help="DataLoader worker processes")
+    p.add_argument("--threads", type=int, help="torch intra-op threads (CPU training)")
     args = p.parse_args(argv)
 
     train_hf_classifier(
@@ -31,6 +42,10 @@ def main(argv: list[str] | None = None) -> int:
         batch_size=args.batch,
         lr=args.lr,
         fp16=bool(args.fp16),
+        max_length=args.max_length,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        num_workers=args.num_workers,
+        threads=args.threads,
     )
     print(f"Saved {args.out}")
     return 0
@@ -0,0 +1,102 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Cross-validated model selection for the TF-IDF + LR tagger.
+
+Usage:
+    python src/cli/tune.py --train data/labels/train.jsonl --out models/tfidf_lr_tuned.joblib \
+      --param min_df=1,2,5 --param chi2_k=none,5000,20000 --param C=0.5,1,4 \
+      --n-iter 12 --folds 5 --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any
+
+import numpy as np
+
+from ktflow.io.model import save_joblib
+from ktflow.tag.ml import _iter_labeled
+from ktflow.tag.tune import DEFAULT_SPACE, cross_validate, fit_best, leaderboard, search_space
+
+_DTYPES = {"float32": np.float32, "float64": np.float64}
+
+
+def _value(text: str) -> Any:
+    """Parse one candidate value: none, int, float, dtype name or string."""
+    if text.lower() == "none":
+        return None
+    if text in _DTYPES:
+        return _DTYPES[text]
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _space(specs: list[str]) -> dict[str, list[Any]]:
+    space: dict[str, list[Any]] = {}
+    for spec in specs:
+        name, sep, values = spec.partition("=")
+        if not sep or not values:
+            raise ValueError(f"Expected NAME=V1,V2,... in --param, got {spec!r}")
+        space[name.strip().replace("-", "_")] = [_value(v.strip()) for v in values.split(",")]
+    return space
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Grid/random CV search for the TF-IDF LR tagger")
+    p.add_argument("--train", required=True, help="JSONL of labeled sentences")
+    p.add_argument("--out", required=True, help="Winning model path (.joblib)")
+    p.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        metavar="NAME=V1,V2",
+        help="Candidate values (min_df, max_features, chi2_k, dtype, penalty, C, l1_ratio); "
+        f"default {DEFAULT_SPACE}",
+    )
+    p.add_argument("--n-iter", type=int, help="Random search: sample this many settings")
+    p.add_argument("--folds", type=int, default=5)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Process pool size")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--top", type=int, default=20, help="Leaderboard rows to print")
+    p.add_argument("--leaderboard", help="Write every trial as JSON here")
+    p.add_argument("--text-col", default="text")
+    p.add_argument("--label-col", default="layer")
+    args = p.parse_args(argv)
+
+    try:
+        candidates = search_space(_space(args.param) or DEFAULT_SPACE, args.n_iter, args.seed)
+    except ValueError as e:
+        p.error(str(e))
+    rows = list(_iter_labeled(args.train, args.text_col, args.label_col))
+    texts = [t for t, _ in rows]
+    labels = [lab for _, lab in rows]
+
+    t0 = time.perf_counter()
+    trials = cross_validate(texts, labels, candidates, args.folds, args.workers, args.seed)
+    print(
+        f"{len(candidates)} settings x {args.folds} folds on {len(texts)} rows "
+        f"in {time.perf_counter() - t0:.1f}s ({args.workers} workers)"
+    )
+    print(leaderboard(trials, args.top))
+    if args.leaderboard:
+        with open(args.leaderboard, "w", encoding="utf-8") as f:
+            for t in trials:
+                params = {k: getattr(v, "__name__", v) for k, v in t.params.items()}
+                record = {"params": params, "f1": t.f1, "ms_per_1k": t.ms_per_1k, "mb": t.size_mb}
+                f.write(json.dumps(record) + "\n")
+
+    best = trials[0]
+    save_joblib(fit_best(texts, labels, best.params), args.out)
+    print(f"Saved best model (macro F1 {best.macro_f1:.4f}) to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -27,6 +27,7 @@ class Settings(BaseSettings):
     # Defaults
     default_window: int = 1
     pdf_min_chars_for_ok: int = 200
+    extract_workers: int = 1
 
     # Regex used by sentence splitter (documented here for centralization)
     sentence_split_regex: str = r"(?<=[.!?])\s+(?=[\"'\(\[]?[A-Z0-9])"
@@ -35,6 +36,20 @@ class Settings(BaseSettings):
     processed_dir: Path = Path("data/processed")
     interim_dir: Path = Path("data/interim")
 
+    # Extraction cache (content-addressed, LRU-evicted above the size budget)
+    extract_cache_dir: Path = Path("data/cache/extract")
+    extract_cache_max_bytes: int = 512 * 1024 * 1024
+
+    # Pre-tokenized HF training sets (keyed by data + tokenizer hash)
+    hf_token_cache_dir: Path = Path("data/cache/hf_tokens")
+
+    # Sentence embedding store (one subdirectory per encoder)
+    embed_store_dir: Path = Path("data/cache/embeddings")
+    embed_store_max_bytes: int = 1024 * 1024 * 1024
+
+    # Prediction cache (SQLite; keyed by tagger hash and sentence hash)
+    pred_cache_path: Path = Path("data/cache/predictions.sqlite")
+
     class Config:
         env_prefix = "KTFLOW_"
 
@@ -0,0 +1,186 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Content-addressed on-disk cache for extracted PDF text.
+
+Entries are keyed by the PDF's SHA-256 plus the extractor settings, stored as
+gzip-compressed normalized text with one page per line, and evicted
+least-recently-used first once the cache grows past ``max_bytes``. Recency is
+tracked through file mtimes, so the cache can be shared by concurrent processes
+without an index file. Each instance keeps a running size total, seeded by one
+directory scan, and only scans again when a write takes it over budget.
+Entries written by other processes are counted at that next scan.
+"""
+
+import gzip
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import IO, Any
+
+from ktflow.io.hashing import sha256_file, sha256_json
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_SUFFIX = ".txt.gz"
+
+
+class ExtractionCache:
+    """Size-bounded LRU cache of normalized PDF text."""
+
+    def __init__(self, cache_dir: str | Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._size: int | None = None  # running total; None until the first scan
+
+    def key(self, pdf_path: str | Path, **settings: Any) -> str:
+        """Build the cache key for ``pdf_path`` extracted with ``settings``."""
+        return sha256_json({"sha256": sha256_file(pdf_path), **settings})
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{_SUFFIX}"
+
+    def get(self, key: str) -> str | None:
+        """Return cached text for ``key`` or ``None`` on a miss."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # mark as recently used
+        except OSError:
+            return None
+        try:
+            return gzip.decompress(data).decode("utf-8")
+        except Exception:
+            # Corrupt entry: drop it and treat as a miss
+            path.unlink(missing_ok=True)
+            return None
+
+    def get_pages(self, key: str) -> Iterator[str] | None:
+        """Stream cached pages for ``key`` one at a time, or ``None`` on a miss.
+
+        The entry is decompressed once up front to check it. A corrupt entry
+        is dropped and reported as a miss, as in :meth:`get`, instead of failing
+        partway through the stream. The pages are then read again lazily.
+        """
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rb") as f:
+                while f.read(1 << 20):
+                    pass
+            os.utime(path)  # mark as recently used
+        except OSError:
+            return None
+        except Exception:
+            path.unlink(missing_ok=True)
+            return None
+
+        def _lines() -> Iterator[str]:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    yield line.rstrip("\n")
+
+        return _lines()
+
+    def put(self, key: str, text: str) -> None:
+        """Store ``text`` under ``key`` and evict old entries if over budget."""
+        with self.writer(key) as w:
+            w.write(text)
+
+    def put_pages(self, key: str, pages: Iterable[str]) -> None:
+        """Store normalized ``pages`` (one per line) under ``key``."""
+        with self.writer(key) as w:
+            for page in pages:
+                w.write_page(page)
+
+    def writer(self, key: str) -> CacheWriter:
+        """Open an incremental writer for ``key``; see :class:`CacheWriter`."""
+        return CacheWriter(self, key)
+
+    def _added(self, nbytes: int) -> None:
+        """Account for a committed entry; evict only once the total may be over budget."""
+        if self._size is None:
+            self.evict()
+            return
+        self._size += nbytes
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        """Delete least-recently-used entries until the cache fits ``max_bytes``.
+
+        Rescans the directory and resets the running size total. Returns the
+        number of entries removed.
+        """
+        entries: list[tuple[float, int, Path]] = []
+        for p in self.cache_dir.glob(f"*/*{_SUFFIX}"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+
+class CacheWriter:
+    """Incrementally write one cache entry.
+
+    Data goes to a temp file that is renamed into place by :meth:`commit`, so
+    readers never see partial entries. Used as a context manager, the entry is
+    committed on normal exit and discarded if an exception escapes; call
+    :meth:`abort` to discard explicitly (e.g. when a page stream is abandoned).
+    """
+
+    def __init__(self, cache: ExtractionCache, key: str) -> None:
+        self.cache = cache
+        self.path = cache._path(key)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        os.close(fd)
+        self._tmp = Path(tmp)
+        self._f: IO[str] | None = gzip.open(self._tmp, "wt", encoding="utf-8", compresslevel=6)
+
+    def write(self, text: str) -> None:
+        assert self._f is not None, "writer already closed"
+        self._f.write(text)
+
+    def write_page(self, page: str) -> None:
+        # Normalized pages never contain newlines, so a line is a page
+        self.write(page + "\n")
+
+    def commit(self) -> None:
+        if self._f is None:
+            return
+        self._f.close()
+        self._f = None
+        nbytes = self._tmp.stat().st_size
+        try:
+            nbytes -= self.path.stat().st_size  # replacing an existing entry
+        except OSError:
+            pass
+        os.replace(self._tmp, self.path)
+        self.cache._added(nbytes)
+
+    def abort(self) -> None:
+        if self._f is None:
+            return
+        self._f.close()
+        self._f = None
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> CacheWriter:
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
@@ -7,15 +7,49 @@ This module provides a robust text extractor for PDF files. It prefers
 ``pdfminer.six`` and falls back to the ``pdftotext`` CLI when available. If
 extracted text is too sparse, it can also attempt Tesseract OCR on rendered
 page images. A minimal ingest log with simple density info can be saved.
+
+Results can be memoized in an :class:`~ktflow.ingest.cache.ExtractionCache`
+keyed by the PDF content and the extractor settings, so repeated runs over the
+same corpus skip extraction entirely.
+
+Large documents can be extracted page-parallel: the page range is split into
+contiguous shards that are decoded in a process pool and stitched back in page
+order.
 """
 
+import functools
+import io
 import json
+import logging
+import os
 import re
+import shutil
 import subprocess
 import tempfile
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Any, Literal
+
+from ktflow.ingest.cache import ExtractionCache
+
+log = logging.getLogger(__name__)
 
 MIN_TEXT_LEN = 200
+# Identifies the extraction cascade in cache keys; bump when its output changes.
+# The parallel and streaming paths produce the same pages, so they share entries.
+EXTRACT_BACKEND = "probe>pdfminer>pdftotext>tesseract/v5"
+# Pages with less text than this are treated as scanned and sent to OCR.
+MIN_PAGE_TEXT_LEN = 50
+# Shards per worker; more, smaller shards even out pages of uneven cost.
+SHARDS_PER_WORKER = 4
+OCR_DPI = 300
+# Concurrent tesseract subprocesses for per-page OCR.
+OCR_WORKERS = min(4, os.cpu_count() or 1)
+# Pages sampled by the text-layer probe.
+PROBE_PAGES = 3
 
 
 def _normalize_text(raw: str) -> str:
@@ -33,35 +67,249 @@ def _normalize_text(raw: str) -> str:
     return text.strip()
 
 
-def _extract_with_pdfminer(path: Path) -> str | None:
-    """Try extracting text with pdfminer.six.
+def _count_pages(path: Path) -> int:
+    """Return the number of pages in the PDF according to pdfminer."""
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
 
-    Returns the normalized text on success, or ``None`` if pdfminer is not
-    available or extraction fails.
+    with path.open("rb") as f:
+        doc = PDFDocument(PDFParser(f))
+        return sum(1 for _ in PDFPage.create_pages(doc))
+
+
+@functools.cache
+def _have_tool(name: str) -> bool:
+    """Return True if the executable ``name`` is on PATH (checked once per process)."""
+    return shutil.which(name) is not None
+
+
+@functools.cache
+def _have_pdfminer() -> bool:
+    try:
+        import pdfminer  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of :func:`probe_pdf`: the chosen backend and the evidence for it."""
+
+    backend: Literal["pdfminer", "pdftotext", "ocr"]
+    pages: int | None = None
+    sampled: int = 0
+    text_chars: int = 0  # decoded from font-less sampled pages only
+    fonts: int = 0
+    images: int = 0
+    seconds: float = 0.0
+
+
+def _sample_indices(n_pages: int, k: int) -> list[int]:
+    """Pick up to ``k`` page indices spread over the document (first, ..., last)."""
+    if n_pages <= k:
+        return list(range(n_pages))
+    if k <= 1:
+        return [0]
+    return sorted({round(j * (n_pages - 1) / (k - 1)) for j in range(k)})
+
+
+def _count_images(xobjects: Any) -> int:
+    from pdfminer.pdftypes import resolve1
+
+    n = 0
+    for ref in (resolve1(xobjects) or {}).values():
+        xobj = resolve1(ref)
+        subtype = getattr(xobj, "get", lambda _k: None)("Subtype")
+        if getattr(subtype, "name", None) == "Image":
+            n += 1
+    return n
+
+
+def probe_pdf(path: Path, sample: int = PROBE_PAGES) -> ProbeResult:
+    """Cheaply decide which backend to extract ``path`` with.
+
+    Samples up to ``sample`` pages spread across the document and counts the
+    fonts and image XObjects they reference; only font-less pages have their
+    content decoded to measure text. If every sampled page has no fonts, little
+    text and at least one image, the document is treated as scanned and goes
+    straight to OCR (when the tools are installed), skipping a useless full
+    pdfminer pass. Without pdfminer the probe falls back to ``pdftotext`` or
+    OCR by availability.
+    """
+    t0 = time.perf_counter()
+    can_ocr = _ocr_tools_available()
+    if not _have_pdfminer():
+        backend: Literal["pdfminer", "pdftotext", "ocr"] = (
+            "pdftotext" if _have_tool("pdftotext") or not can_ocr else "ocr"
+        )
+        return ProbeResult(backend=backend, seconds=time.perf_counter() - t0)
+
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+
+    result = ProbeResult(backend="pdfminer")
+    scanned = True
+    try:
+        with path.open("rb") as f:
+            doc = PDFDocument(PDFParser(f))
+            # Walking the page tree does not parse page content streams
+            pages = list(PDFPage.create_pages(doc))
+            result.pages = len(pages)
+            rsrcmgr = PDFResourceManager(caching=True)
+            buf = io.StringIO()
+            device = TextConverter(rsrcmgr, buf, laparams=LAParams())
+            interpreter = PDFPageInterpreter(rsrcmgr, device)
+            for idx in _sample_indices(len(pages), sample):
+                page = pages[idx]
+                resources = resolve1(page.resources) or {}
+                fonts = len(resolve1(resources.get("Font")) or {})
+                images = _count_images(resources.get("XObject"))
+                chars = 0
+                if fonts == 0:
+                    # Fonts mean a text layer; only decode pages that lack them
+                    interpreter.process_page(page)
+                    chars = len(_normalize_text(buf.getvalue()))
+                    buf.seek(0)
+                    buf.truncate(0)
+                result.sampled += 1
+                result.text_chars += chars
+                result.fonts += fonts
+                result.images += images
+                if chars >= MIN_PAGE_TEXT_LEN or fonts > 0 or images == 0:
+                    scanned = False
+            device.close()
+    except Exception:
+        # Let the full cascade deal with whatever confused the probe
+        scanned = False
+
+    if scanned and result.sampled > 0 and can_ocr:
+        result.backend = "ocr"
+    result.seconds = time.perf_counter() - t0
+    return result
+
+
+def _iter_pdfminer_pages(path: Path) -> Iterator[str]:
+    """Yield normalized text for each page as pdfminer decodes it.
+
+    Uses the same converter settings as ``pdfminer.high_level.extract_text``
+    but hands back one page at a time, so only the current page is held in
+    memory.
+    """
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    rsrcmgr = PDFResourceManager(caching=True)
+    buf = io.StringIO()
+    device = TextConverter(rsrcmgr, buf, laparams=LAParams())
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    try:
+        with path.open("rb") as f:
+            for page in PDFPage.get_pages(f, caching=True):
+                interpreter.process_page(page)
+                raw = buf.getvalue()
+                buf.seek(0)
+                buf.truncate(0)
+                yield _normalize_text(raw)
+    finally:
+        device.close()
+
+
+def _extract_page_range(path: str, start: int, stop: int | None) -> list[str]:
+    """Extract pages ``[start, stop)`` with pdfminer, one normalized string per page.
+
+    Top-level so it can be pickled into a process pool. pdfminer terminates
+    every page with a form feed, which is used to split the output back into
+    pages.
+    """
+    from pdfminer.high_level import extract_text
+
+    page_numbers = None if stop is None else range(start, stop)
+    raw = extract_text(path, page_numbers=page_numbers)
+    pages = raw.split("\f")
+    if pages and not pages[-1].strip():
+        pages.pop()
+    return [_normalize_text(p) for p in pages]
+
+
+def _shard_ranges(n_pages: int, n_shards: int) -> list[tuple[int, int]]:
+    """Split ``range(n_pages)`` into at most ``n_shards`` contiguous ranges."""
+    n_shards = max(1, min(n_shards, n_pages))
+    size, extra = divmod(n_pages, n_shards)
+    ranges: list[tuple[int, int]] = []
+    start = 0
+    for k in range(n_shards):
+        stop = start + size + (1 if k < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _join_pages(pages: list[str]) -> str:
+    """Join per-page normalized text the way whole-document normalization would."""
+    return " ".join(p for p in pages if p)
+
+
+def _extract_pages_with_pdfminer(path: Path, workers: int = 1) -> list[str] | None:
+    """Try extracting per-page text with pdfminer.six.
+
+    With ``workers > 1`` the page range is sharded across a process pool and
+    the per-page text is stitched back in page order; the result is identical
+    to a serial run.
+
+    Returns one normalized string per page on success, or ``None`` if
+    pdfminer is not available or extraction fails.
     """
     try:
-        from pdfminer.high_level import extract_text
+        import pdfminer  # noqa: F401
     except Exception:
         return None
 
     try:
-        raw = extract_text(str(path))
-        if not isinstance(raw, str):
-            return None
-        return _normalize_text(raw)
+        if workers <= 1:
+            return _extract_page_range(str(path), 0, None)
+
+        n_pages = _count_pages(path)
+        ranges = _shard_ranges(n_pages, workers * SHARDS_PER_WORKER)
+        if len(ranges) <= 1:
+            return _extract_page_range(str(path), 0, None)
+
+        pages: list[str] = []
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as ex:
+            starts = [r[0] for r in ranges]
+            stops = [r[1] for r in ranges]
+            for shard in ex.map(_extract_page_range, [str(path)] * len(ranges), starts, stops):
+                pages.extend(shard)
+        return pages
     except Exception:
         return None
 
 
-def _extract_with_pdftotext(path: Path) -> str | None:
-    """Try extracting text with the ``pdftotext`` CLI if available.
+def _extract_with_pdfminer(path: Path, workers: int = 1) -> str | None:
+    """Try extracting text with pdfminer.six.
 
-    Returns the normalized text on success, otherwise ``None``.
+    Returns the normalized text on success, or ``None`` if pdfminer is not
+    available or extraction fails.
+    """
+    pages = _extract_pages_with_pdfminer(path, workers=workers)
+    return None if pages is None else _join_pages(pages)
+
+
+def _extract_pages_with_pdftotext(path: Path) -> list[str] | None:
+    """Try extracting per-page text with the ``pdftotext`` CLI if available.
+
+    Returns one normalized string per page on success, otherwise ``None``.
     """
     try:
-        # Check availability
-        proc = subprocess.run(["which", "pdftotext"], capture_output=True, text=True, check=False)
-        if proc.returncode != 0:
+        if not _have_tool("pdftotext"):
             return None
 
         # Run pdftotext, capture to stdout via '-' output
@@ -73,43 +321,246 @@ def _extract_with_pdftotext(path: Path) -> str | None:
         )
         if result.returncode != 0:
             return None
-        return _normalize_text(result.stdout)
+        # pdftotext ends every page with a form feed, like pdfminer
+        pages = result.stdout.split("\f")
+        if pages and not pages[-1].strip():
+            pages.pop()
+        return [_normalize_text(p) for p in pages]
     except Exception:
         return None
 
 
-def _extract_with_tesseract(path: Path, lang: str = "eng") -> str | None:
-    """OCR the PDF using Tesseract via pdftoppm -> tesseract pipeline."""
+def _extract_with_pdftotext(path: Path) -> str | None:
+    """Try extracting text with the ``pdftotext`` CLI if available.
+
+    Returns the normalized text on success, otherwise ``None``.
+    """
+    pages = _extract_pages_with_pdftotext(path)
+    return None if pages is None else _join_pages(pages)
+
+
+def _ocr_tools_available() -> bool:
+    """Return True if both ``pdftoppm`` and ``tesseract`` are on PATH."""
+    return _have_tool("pdftoppm") and _have_tool("tesseract")
+
+
+def _tesseract(img_path: Path, lang: str) -> str:
+    """Run tesseract on one image and return its raw stdout text."""
+    # Parallel workers each get one OpenMP thread to avoid oversubscription
+    env = {**os.environ, "OMP_THREAD_LIMIT": "1"}
+    result = subprocess.run(
+        ["tesseract", str(img_path), "stdout", "-l", lang],
+        capture_output=True,
+        text=True,
+        errors="ignore",
+        check=False,
+        env=env,
+    )
+    return result.stdout if result.returncode == 0 else ""
+
+
+def _ocr_page(path: Path, page_idx: int, lang: str, tmpdir: str) -> tuple[int, str, float]:
+    """Rasterize a single page (0-based) with ``pdftoppm -f/-l`` and OCR it.
+
+    Returns ``(page_idx, normalized_text, seconds)``.
+    """
+    t0 = time.perf_counter()
+    page_no = str(page_idx + 1)
+    base = Path(tmpdir) / f"page-{page_idx}"
+    subprocess.run(
+        [
+            "pdftoppm",
+            "-png",
+            "-r",
+            str(OCR_DPI),
+            "-f",
+            page_no,
+            "-l",
+            page_no,
+            "-singlefile",
+            str(path),
+            str(base),
+        ],
+        capture_output=True,
+        check=False,
+    )
+    img_path = base.with_suffix(".png")
+    text = ""
+    if img_path.exists():
+        text = _normalize_text(_tesseract(img_path, lang))
+        img_path.unlink(missing_ok=True)
+    return page_idx, text, time.perf_counter() - t0
+
+
+def _ocr_image(img_path: Path, page_idx: int, lang: str) -> tuple[int, str, float]:
+    t0 = time.perf_counter()
+    text = _normalize_text(_tesseract(img_path, lang))
+    return page_idx, text, time.perf_counter() - t0
+
+
+def _extract_with_tesseract(
+    path: Path,
+    lang: str = "eng",
+    pages: list[int] | None = None,
+    workers: int = OCR_WORKERS,
+) -> tuple[dict[int, str], list[dict[str, Any]]] | None:
+    """OCR the PDF using Tesseract via pdftoppm -> tesseract pipeline.
+
+    Only the 0-based page indices in ``pages`` are rasterized and recognized;
+    ``None`` OCRs every page. Pages are processed by a bounded pool of
+    ``workers`` concurrent tesseract subprocesses.
+
+    Returns ``(texts_by_page, timings)`` where ``timings`` holds one
+    ``{"page", "chars", "seconds"}`` entry per OCRed page (1-based page
+    numbers), or ``None`` if the tools are unavailable or OCR fails.
+    """
     try:
-        if subprocess.run(["which", "pdftoppm"], capture_output=True, check=False).returncode != 0:
-            return None
-        if subprocess.run(["which", "tesseract"], capture_output=True, check=False).returncode != 0:
+        if not _ocr_tools_available():
             return None
 
-        texts: list[str] = []
-        with tempfile.TemporaryDirectory() as tmpdir:
-            base = Path(tmpdir) / "page"
-            subprocess.run(["pdftoppm", "-png", "-r", "300", str(path), str(base)], check=False)
-            for img_path in sorted(Path(tmpdir).glob("page-*.png")):
-                out_base = img_path.with_suffix("")
-                subprocess.run(["tesseract", str(img_path), str(out_base), "-l", lang], check=False)
-                txt_path = Path(str(out_base) + ".txt")
-                if txt_path.exists():
-                    texts.append(txt_path.read_text(encoding="utf-8", errors="ignore"))
-        return _normalize_text("\n".join(texts))
+        results: list[tuple[int, str, float]] = []
+        with (
+            tempfile.TemporaryDirectory() as tmpdir,
+            ThreadPoolExecutor(max_workers=max(1, workers)) as ex,
+        ):
+            if pages is None:
+                # Page count unknown: render everything in one pdftoppm call
+                base = Path(tmpdir) / "page"
+                subprocess.run(
+                    ["pdftoppm", "-png", "-r", str(OCR_DPI), str(path), str(base)],
+                    capture_output=True,
+                    check=False,
+                )
+                images = sorted(
+                    Path(tmpdir).glob("page-*.png"), key=lambda p: int(p.stem.rsplit("-", 1)[1])
+                )
+                futures = [ex.submit(_ocr_image, img, i, lang) for i, img in enumerate(images)]
+            else:
+                futures = [ex.submit(_ocr_page, path, i, lang, tmpdir) for i in pages]
+            results = [f.result() for f in futures]
+
+        texts = {idx: text for idx, text, _ in results}
+        timings = [
+            {"page": idx + 1, "chars": len(text), "seconds": round(dt, 3)}
+            for idx, text, dt in results
+        ]
+        return texts, timings
     except Exception:
         return None
 
 
-def extract_text_from_pdf(
-    path: str, *, ocr: bool = False, ocr_lang: str = "eng", ingest_log_path: str | None = None
+def _extract_cascade(
+    pdf_path: Path, *, ocr: bool, ocr_lang: str, workers: int, ocr_workers: int = OCR_WORKERS
+) -> tuple[list[str], dict[str, Any]]:
+    """Run the pdfminer -> pdftotext -> OCR cascade.
+
+    A cheap :func:`probe_pdf` runs first; scanned documents skip straight to
+    OCR and documents without pdfminer start at ``pdftotext``. OCR is applied
+    per page: only pages whose text layer is sparser than
+    ``MIN_PAGE_TEXT_LEN`` (or every page when ``ocr`` is set) are rasterized
+    and recognized, and an OCR result replaces a page only if it is longer.
+
+    Returns the normalized per-page text and a dict of stats for the ingest log.
+    """
+    probe = probe_pdf(pdf_path)
+    info: dict[str, Any] = {"probe": asdict(probe)}
+    log.debug("Probe chose %s in %.3fs for %s", probe.backend, probe.seconds, pdf_path.name)
+
+    pages: list[str] = []
+    if probe.backend == "ocr" and probe.pages:
+        # Scanned: blank placeholders so every page is an OCR target below
+        pages = [""] * probe.pages
+    elif probe.backend == "pdfminer":
+        pages = _extract_pages_with_pdfminer(pdf_path, workers=workers) or []
+
+    # Fallback if too short
+    if probe.backend != "ocr" and len(_join_pages(pages)) < MIN_TEXT_LEN:
+        alt = _extract_pages_with_pdftotext(pdf_path)
+        if alt is not None and len(_join_pages(alt)) > len(_join_pages(pages)):
+            pages = alt
+
+    # Optional or forced OCR of sparse pages (all pages if the layout is unknown)
+    targets: list[int] | None = None
+    if pages:
+        targets = [i for i, p in enumerate(pages) if ocr or len(p) < MIN_PAGE_TEXT_LEN]
+    if targets is None or targets:
+        ocr_result = _extract_with_tesseract(
+            pdf_path, lang=ocr_lang, pages=targets, workers=ocr_workers
+        )
+        if ocr_result is not None:
+            ocr_texts, timings = ocr_result
+            info["ocr_pages"] = timings
+            if targets is None:
+                pages = [ocr_texts[i] for i in sorted(ocr_texts)]
+            else:
+                for i, alt_text in ocr_texts.items():
+                    if len(alt_text) > len(pages[i]):
+                        pages[i] = alt_text
+
+    info["pages"] = len(pages)
+    return pages, info
+
+
+def _cache_key(
+    cache: ExtractionCache, pdf_path: Path, backend: str, ocr: bool, ocr_lang: str
+) -> str:
+    return cache.key(
+        pdf_path,
+        backend=backend,
+        ocr=ocr,
+        ocr_lang=ocr_lang,
+        min_text_len=MIN_TEXT_LEN,
+        min_page_text_len=MIN_PAGE_TEXT_LEN,
+    )
+
+
+def _cached_cascade(  # noqa: PLR0913
+    pdf_path: Path,
+    *,
+    ocr: bool,
+    ocr_lang: str,
+    workers: int,
+    ocr_workers: int,
+    cache: ExtractionCache | None,
+) -> tuple[list[str], dict[str, Any], bool]:
+    """Return ``(pages, info, cached)``, serving from and populating ``cache``.
+
+    Raises ``ValueError`` if no method produced any text.
+    """
+    key: str | None = None
+    if cache is not None:
+        key = _cache_key(cache, pdf_path, EXTRACT_BACKEND, ocr, ocr_lang)
+        hit = cache.get_pages(key)
+        if hit is not None:
+            return list(hit), {}, True
+
+    pages, info = _extract_cascade(
+        pdf_path, ocr=ocr, ocr_lang=ocr_lang, workers=workers, ocr_workers=ocr_workers
+    )
+    if not any(pages):
+        raise ValueError("Failed to extract text from PDF with available methods.")
+    if cache is not None and key is not None:
+        cache.put_pages(key, pages)
+    return pages, info, False
+
+
+def extract_text_from_pdf(  # noqa: PLR0913
+    path: str,
+    *,
+    ocr: bool = False,
+    ocr_lang: str = "eng",
+    ingest_log_path: str | None = None,
+    workers: int = 1,
+    ocr_workers: int = OCR_WORKERS,
+    cache: ExtractionCache | None = None,
 ) -> str:
     """Extract text from a PDF file located at ``path``.
 
     Strategy:
-    1. Use ``pdfminer.six`` to extract text.
+    1. Use ``pdfminer.six`` to extract text page by page.
     2. If the result is too short (< 200 characters), attempt ``pdftotext``.
-    3. Normalize unicode and whitespace.
+    3. OCR pages whose text layer is sparse (or all pages if ``ocr``).
+    4. Normalize unicode and whitespace.
 
     Raises a ``ValueError`` if extraction fails or yields empty text.
 
@@ -117,6 +568,13 @@ def extract_text_from_pdf(
     ----------
     path: str
         Filesystem path to the PDF file.
+    workers: int
+        Number of processes used for page-parallel pdfminer extraction.
+        ``1`` (default) extracts serially in the calling process.
+    ocr_workers: int
+        Maximum number of concurrent tesseract subprocesses.
+    cache: ExtractionCache | None
+        Optional cache consulted before extraction and populated after it.
 
     Returns
     -------
@@ -127,26 +585,10 @@ def extract_text_from_pdf(
     if not pdf_path.exists() or not pdf_path.is_file():
         raise ValueError(f"PDF file not found: {pdf_path}")
 
-    # Primary: pdfminer
-    text = _extract_with_pdfminer(pdf_path)
-    if text is None:
-        text = ""
-
-    # Fallback if too short
-    if len(text) < MIN_TEXT_LEN:
-        alt = _extract_with_pdftotext(pdf_path)
-        if alt is not None and len(alt) > len(text):
-            text = alt
-
-    # Optional or forced OCR
-    if ocr or len(text) < MIN_TEXT_LEN:
-        alt_ocr = _extract_with_tesseract(pdf_path, lang=ocr_lang)
-        if alt_ocr is not None and len(alt_ocr) > len(text):
-            text = alt_ocr
-
-    text = _normalize_text(text)
-    if len(text) == 0:
-        raise ValueError("Failed to extract text from PDF with available methods.")
+    pages, info, cached = _cached_cascade(
+        pdf_path, ocr=ocr, ocr_lang=ocr_lang, workers=workers, ocr_workers=ocr_workers, cache=cache
+    )
+    text = _join_pages(pages)
 
     # Ingest log (very simple density metric)
     if ingest_log_path is not None:
@@ -161,6 +603,8 @@ def extract_text_from_pdf(
                         "chars": len(text),
                         "bytes": size_bytes,
                         "density": density,
+                        "cached": cached,
+                        **info,
                     },
                     ensure_ascii=False,
                 ),
@@ -169,3 +613,129 @@ def extract_text_from_pdf(
         except Exception:
             pass
     return text
+
+
+def _iter_raw_pages(pdf_path: Path, probe: ProbeResult) -> Iterator[str]:
+    """Stream pre-OCR page text with the cascade's short-document ``pdftotext`` fallback.
+
+    Leading pdfminer pages are held back only until they reach ``MIN_TEXT_LEN``
+    characters. A document that never gets there is swapped for the
+    ``pdftotext`` pages when those are longer, as :func:`_extract_cascade` does.
+    """
+    if probe.backend == "ocr" and probe.pages:
+        yield from [""] * probe.pages
+        return
+    if probe.backend != "pdfminer":
+        # No pdfminer: pdftotext is whole-document, so stream from its page list
+        yield from _extract_pages_with_pdftotext(pdf_path) or []
+        return
+
+    head: list[str] = []
+    pages = _iter_pdfminer_pages(pdf_path)
+    for text in pages:
+        head.append(text)
+        if len(_join_pages(head)) >= MIN_TEXT_LEN:
+            yield from head
+            yield from pages
+            return
+    alt = _extract_pages_with_pdftotext(pdf_path)
+    if alt is not None and len(_join_pages(alt)) > len(_join_pages(head)):
+        head = alt
+    yield from head
+
+
+def _iter_page_texts(pdf_path: Path, *, ocr: bool, ocr_lang: str) -> Iterator[str]:
+    """Stream per-page text, OCRing sparse pages inline as they are reached.
+
+    Leading empty pages are held back until some page has text. Raises
+    ``ValueError`` like :func:`_cached_cascade` when no page has any, so no
+    page is yielded for a document that fails.
+    """
+    probe = probe_pdf(pdf_path)
+    log.debug("Probe chose %s in %.3fs for %s", probe.backend, probe.seconds, pdf_path.name)
+    can_ocr = _ocr_tools_available()
+    seen_text = False
+    blank = 0  # empty pages held back before the first page with text
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for idx, raw in enumerate(_iter_raw_pages(pdf_path, probe)):
+            text = raw
+            if can_ocr and (ocr or len(raw) < MIN_PAGE_TEXT_LEN):
+                _, alt, dt = _ocr_page(pdf_path, idx, ocr_lang, tmpdir)
+                log.debug("OCR page %d: %d chars in %.3fs", idx + 1, len(alt), dt)
+                if len(alt) > len(raw):
+                    text = alt
+            if not seen_text:
+                if not text:
+                    blank += 1
+                    continue
+                seen_text = True
+                yield from [""] * blank
+            yield text
+    if not seen_text:
+        raise ValueError("Failed to extract text from PDF with available methods.")
+
+
+def iter_pages(  # noqa: PLR0913
+    path: str,
+    *,
+    ocr: bool = False,
+    ocr_lang: str = "eng",
+    workers: int = 1,
+    ocr_workers: int = OCR_WORKERS,
+    cache: ExtractionCache | None = None,
+) -> Iterator[tuple[int, str]]:
+    """Yield ``(page_no, text)`` for each page of the PDF at ``path``.
+
+    Page numbers are 1-based and text is normalized like
+    :func:`extract_text_from_pdf`. With ``workers == 1`` pages are decoded
+    lazily, one at a time, so memory stays proportional to a single page;
+    sparse pages are OCRed inline, one at a time, so ``ocr_workers`` is
+    ignored. With ``workers > 1`` the parallel cascade runs first, OCRing
+    with up to ``ocr_workers`` processes, and its pages are then yielded in
+    order. Both paths apply the same ``pdftotext`` fallback for short
+    documents.
+
+    A cache hit streams pages straight from disk. Both paths use the same
+    cache entry as :func:`extract_text_from_pdf`. On a miss the pages are
+    written to the cache as they are produced and the entry is committed only
+    once the stream is exhausted.
+
+    Raises a ``ValueError`` if the file does not exist or yields no text.
+    """
+    pdf_path = Path(path)
+    if not pdf_path.exists() or not pdf_path.is_file():
+        raise ValueError(f"PDF file not found: {pdf_path}")
+
+    if workers > 1:
+        pages, _, _ = _cached_cascade(
+            pdf_path,
+            ocr=ocr,
+            ocr_lang=ocr_lang,
+            workers=workers,
+            ocr_workers=ocr_workers,
+            cache=cache,
+        )
+        yield from enumerate(pages, start=1)
+        return
+
+    writer = None
+    if cache is not None:
+        key = _cache_key(cache, pdf_path, EXTRACT_BACKEND, ocr, ocr_lang)
+        hit = cache.get_pages(key)
+        if hit is not None:
+            yield from enumerate(hit, start=1)
+            return
+        writer = cache.writer(key)
+
+    try:
+        for page_no, text in enumerate(
+            _iter_page_texts(pdf_path, ocr=ocr, ocr_lang=ocr_lang), start=1
+        ):
+            if writer is not None:
+                writer.write_page(text)
+            yield page_no, text
+        if writer is not None:
+            writer.commit()
+    finally:
+        if writer is not None:
+            writer.abort()  # no-op after commit
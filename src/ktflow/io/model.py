@@ -15,5 +15,6 @@ def save_joblib(obj: Any, path: str | Path) -> None:
     joblib.dump(obj, out)
 
 
-def load_joblib(path: str | Path) -> Any:
-    return joblib.load(Path(path))
+def load_joblib(path: str | Path, mmap_mode: str | None = None) -> Any:
+    """Load ``path``; ``mmap_mode="r"`` memory-maps its NumPy arrays (shared across processes)."""
+    return joblib.load(Path(path), mmap_mode=mmap_mode)
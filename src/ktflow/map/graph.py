@@ -4,10 +4,14 @@ from __future__ import annotations
 """Flow mapping utilities.
 
 Build transition counts between consecutive labels and optionally export an
-edge list CSV.
+edge list CSV. :func:`build_flow_matrix` does the same on integer label codes
+(see ``ktflow.tag.rules.LABELS``) without materializing label strings.
 """
 
 from collections import Counter
+from collections.abc import Sequence
+
+import numpy as np
 
 from ktflow.io.csv import write_edge_list as write_edge_list_csv_rows
 
@@ -43,6 +47,29 @@ def build_flow_counts(labels: list[Label], window: int = 1) -> dict[Edge, int]:
     return dict(counts)
 
 
+def build_flow_matrix(codes: np.ndarray, n_labels: int, window: int = 1) -> np.ndarray:
+    """Count transitions between label codes into an ``(n_labels, n_labels)`` matrix.
+
+    Equivalent to :func:`build_flow_counts` on decoded labels: entry
+    ``[a, b]`` counts pairs ``i -> i+k`` (``k`` in ``[1..window]``) with
+    ``codes[i] == a`` and ``codes[i+k] == b``.
+    """
+    window = max(window, 1)
+    codes = np.asarray(codes, dtype=np.intp)
+    flat = np.zeros(n_labels * n_labels, dtype=np.int64)
+    for k in range(1, window + 1):
+        if k >= len(codes):
+            break
+        flat += np.bincount(codes[:-k] * n_labels + codes[k:], minlength=n_labels * n_labels)
+    return flat.reshape(n_labels, n_labels)
+
+
+def flow_matrix_to_counts(matrix: np.ndarray, labels: Sequence[Label]) -> dict[Edge, int]:
+    """Convert a flow matrix to the ``{(from, to): count}`` mapping (non-zero entries)."""
+    rows, cols = np.nonzero(matrix)
+    return {(labels[a], labels[b]): int(matrix[a, b]) for a, b in zip(rows, cols, strict=True)}
+
+
 def to_edge_list_csv(doc_id: str, counts: dict[Edge, int], path: str) -> None:
     """Write the edge list CSV with header.
 
@@ -14,6 +14,7 @@ class SentenceRecord(BaseModel):
     layer: str | None = None
     layer_pred: str | None = None
     span: tuple[int, int] | None = None
+    page: int | None = None
 
     class Config:
         populate_by_name = True
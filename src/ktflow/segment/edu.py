@@ -1,45 +1,306 @@
 # ruff: noqa: E402
 from __future__ import annotations
 
-"""EDU-like segmentation using pysbd + simple clause splitting."""
+"""EDU-like segmentation using pysbd + simple clause splitting.
 
+:class:`EduSegmenter` keeps one warm ``pysbd.Segmenter`` and the precompiled
+clause rules, so repeated calls do not pay pysbd's construction cost. Long
+inputs are cut into chunks at sentence boundaries, which can be segmented in
+a process pool (one warm segmenter per worker) and merged back in order; the
+sentence that straddles each chunk boundary is re-segmented so the merge is
+deterministic.
+"""
+
+import functools
 import re
+from bisect import bisect_right
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+from ktflow.segment.sentence import _SPLIT_REGEX, _normalize_whitespace, stream_segments
+from ktflow.segment.spans import Segment, SpanList
 
 MIN_FRAGMENT_LEN = 15
+# Target characters per chunk. pysbd is superlinear in input length, so
+# roughly page-sized chunks are faster even without a pool.
+CHUNK_CHARS = 3_000
 
+_CLAUSE_SPLIT = re.compile(r"\s*,\s*|\s*(?:and|but|or)\s+")
 
-def _split_clauses(sent: str) -> list[str]:
-    # Split on commas/conjunctions when safe (keep short fragments together)
-    parts = re.split(r"\s*,\s*|\s*(?:and|but|or)\s+", sent)
-    edus: list[str] = []
-    for part in parts:
-        part_stripped = part.strip()
-        if not part_stripped:
+
+def _strip_span(text: str, start: int, end: int) -> tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _clause_spans(text: str, start: int, end: int) -> list[tuple[int, int]]:
+    """Split ``text[start:end]`` on commas/conjunctions, returning offsets.
+
+    Tiny fragments are merged into their left neighbour; a merged EDU spans
+    the original text between them, separator included.
+    """
+    parts: list[tuple[int, int]] = []
+    pos = start
+    for m in _CLAUSE_SPLIT.finditer(text, start, end):
+        parts.append((pos, m.start()))
+        pos = m.end()
+    parts.append((pos, end))
+
+    merged: list[tuple[int, int]] = []
+    for s, e in parts:
+        lo, hi = _strip_span(text, s, e)
+        if lo == hi:
             continue
-        edus.append(part_stripped)
-    # Merge tiny fragments with neighbors
-    merged: list[str] = []
-    for frag in edus:
-        if merged and (len(frag) < MIN_FRAGMENT_LEN):
-            merged[-1] = merged[-1] + ", " + frag
+        if merged and (hi - lo) < MIN_FRAGMENT_LEN:
+            merged[-1] = (merged[-1][0], hi)
         else:
-            merged.append(frag)
+            merged.append((lo, hi))
     return merged
 
 
+def _split_clauses(sent: str) -> list[str]:
+    # Split on commas/conjunctions when safe (keep short fragments together)
+    return [sent[s:e] for s, e in _clause_spans(sent, 0, len(sent))]
+
+
+def _chunk_pages(text: str, chunk_chars: int) -> Iterator[tuple[int, str]]:
+    """Cut normalized ``text`` at sentence-regex boundaries into ~``chunk_chars`` pieces.
+
+    Boundaries in normalized text are single spaces, so joining the pieces
+    with spaces reproduces ``text`` exactly.
+    """
+    start = 0
+    for m in _SPLIT_REGEX.finditer(text, chunk_chars):
+        if m.start() - start < chunk_chars:
+            continue
+        yield 1, text[start : m.start()]
+        start = m.end()
+    yield 1, text[start:]
+
+
+class _Blocks:
+    """Group a page stream into blocks of about ``chunk_chars`` characters.
+
+    Pages inside a block are joined by single spaces, matching the document
+    coordinates used by :func:`ktflow.segment.sentence.stream_segments`; the
+    page start offsets seen so far are kept to map offsets back to pages.
+    """
+
+    def __init__(self, chunk_chars: int) -> None:
+        self.chunk_chars = chunk_chars
+        self.page_starts: list[int] = []
+        self.page_nos: list[int] = []
+
+    def page_at(self, offset: int) -> int:
+        return self.page_nos[max(0, bisect_right(self.page_starts, offset) - 1)]
+
+    def __call__(self, pages: Iterable[tuple[int, str]]) -> Iterator[tuple[int, str]]:
+        doc_len = 0
+        base = 0
+        parts: list[str] = []
+        size = 0
+        for page_no, text in pages:
+            if not text:
+                continue
+            page_start = doc_len + 1 if doc_len else 0
+            doc_len = page_start + len(text)
+            self.page_starts.append(page_start)
+            self.page_nos.append(page_no)
+            if not parts:
+                base = page_start
+            parts.append(text)
+            size += len(text) + 1
+            if size >= self.chunk_chars:
+                yield base, " ".join(parts)
+                parts, size = [], 0
+        if parts:
+            yield base, " ".join(parts)
+
+
+class EduSegmenter:
+    """Reusable EDU segmenter: warm pysbd instance plus precompiled clause rules.
+
+    Parameters
+    ----------
+    language: str
+        pysbd language code.
+    workers: int
+        Processes used to sentence-segment chunks in parallel. ``1`` (default)
+        segments in the calling process.
+    chunk_chars: int
+        Approximate size of the chunks handed to pool workers.
+    """
+
+    def __init__(
+        self, language: str = "en", workers: int = 1, chunk_chars: int = CHUNK_CHARS
+    ) -> None:
+        self.language = language
+        self.workers = max(1, workers)
+        self.chunk_chars = chunk_chars
+        try:
+            import pysbd
+
+            # clean=False keeps pysbd's output verbatim so it can be located in text
+            self._seg: Any = pysbd.Segmenter(language=language, clean=False)
+        except Exception:
+            self._seg = None
+        self._pool: ProcessPoolExecutor | None = None
+
+    # -- sentence level -------------------------------------------------
+    def sentence_spans(self, text: str) -> list[tuple[int, int]]:
+        """Sentence offsets into ``text`` (a single span if pysbd is missing)."""
+        if self._seg is None:
+            s, e = _strip_span(text, 0, len(text))
+            return [(s, e)] if s < e else []
+        spans: list[tuple[int, int]] = []
+        pos = 0
+        for sent in self._seg.segment(text):
+            sent_stripped = sent.strip()
+            if not sent_stripped:
+                continue
+            start = text.find(sent_stripped, pos)
+            if start < 0:
+                continue
+            end = start + len(sent_stripped)
+            spans.append((start, end))
+            pos = end
+        return spans
+
+    def _sentences(self, pages: Iterable[tuple[int, str]]) -> Iterator[Segment]:
+        if self.workers <= 1:
+            return stream_segments(pages, self.sentence_spans)
+        return self._parallel_sentences(pages)
+
+    def _parallel_sentences(self, pages: Iterable[tuple[int, str]]) -> Iterator[Segment]:
+        """Segment blocks in the pool and stitch them back in order.
+
+        At most ``2 * workers`` blocks are in flight, so memory stays bounded
+        for long streams. The last sentence of each block is held back and
+        re-segmented together with the first sentence of the next block.
+        """
+        pool = self._get_pool()
+        blocks = _Blocks(self.chunk_chars)
+        inflight: deque[tuple[int, str, Future[list[tuple[int, int]]]]] = deque()
+        tail: tuple[int, str] | None = None  # (doc offset, text) of held-back sentence
+
+        def _drain_one() -> Iterator[Segment]:
+            nonlocal tail
+            base, text, fut = inflight.popleft()
+            segs = [(base + s, text[s:e]) for s, e in fut.result()]
+            if tail is not None and segs:
+                # Re-split the boundary region: held-back tail .. first head
+                t_start, t_text = tail
+                h_start, h_text = segs[0]
+                gap = h_start - (t_start + len(t_text))
+                joined = t_text + " " * gap + h_text
+                segs[:1] = [(t_start + s, joined[s:e]) for s, e in self.sentence_spans(joined)]
+            elif tail is not None:
+                segs = [tail]
+            for start, seg_text in segs[:-1]:
+                yield Segment(blocks.page_at(start), start, start + len(seg_text), seg_text)
+            tail = segs[-1] if segs else None
+
+        for base, text in blocks(pages):
+            inflight.append((base, text, pool.submit(_pool_sentence_spans, text)))
+            if len(inflight) >= 2 * self.workers:
+                yield from _drain_one()
+        while inflight:
+            yield from _drain_one()
+        if tail is not None:
+            start, seg_text = tail
+            yield Segment(blocks.page_at(start), start, start + len(seg_text), seg_text)
+
+    # -- EDU level ------------------------------------------------------
+    def stream(self, pages: Iterable[tuple[int, str]]) -> Iterator[Segment]:
+        """Yield EDU :class:`Segment` tuples from a normalized page stream."""
+        for sent in self._sentences(pages):
+            for s, e in _clause_spans(sent.text, 0, len(sent.text)):
+                yield Segment(sent.page, sent.start + s, sent.start + e, sent.text[s:e])
+
+    def spans(self, text: str) -> SpanList:
+        """Segment ``text`` into EDUs, returned as offsets into normalized text."""
+        normalized = _normalize_whitespace(text) if text else ""
+        edus = SpanList(normalized)
+        if not normalized:
+            return edus
+        if len(normalized) > self.chunk_chars:
+            for seg in self.stream(_chunk_pages(normalized, self.chunk_chars)):
+                edus.append(seg.start, seg.end)
+            return edus
+        for s, e in self.sentence_spans(normalized):
+            for cs, ce in _clause_spans(normalized, s, e):
+                edus.append(cs, ce)
+        return edus
+
+    def split(self, text: str) -> list[str]:
+        return list(self.spans(text))
+
+    # -- pool lifecycle -------------------------------------------------
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_pool_worker,
+                initargs=(self.language,),
+            )
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> EduSegmenter:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Pools do not pickle; a copy sent to another process starts without one
+        return {**self.__dict__, "_pool": None}
+
+
+_WORKER_SEGMENTER: EduSegmenter | None = None
+
+
+def _init_pool_worker(language: str) -> None:
+    global _WORKER_SEGMENTER  # noqa: PLW0603
+    _WORKER_SEGMENTER = EduSegmenter(language=language)
+
+
+def _pool_sentence_spans(text: str) -> list[tuple[int, int]]:
+    seg = _WORKER_SEGMENTER or get_edu_segmenter()
+    return seg.sentence_spans(text)
+
+
+@functools.cache
+def get_edu_segmenter(language: str = "en") -> EduSegmenter:
+    """Return this process's shared serial :class:`EduSegmenter`."""
+    return EduSegmenter(language=language)
+
+
+def edu_spans(text: str) -> SpanList:
+    """Segment ``text`` into EDUs, returned as offsets into normalized text."""
+    return get_edu_segmenter().spans(text)
+
+
 def split_edus(text: str) -> list[str]:
-    try:
-        import pysbd
-    except Exception:
-        # Fallback: single segment if pysbd missing
-        return [text.strip()] if text.strip() else []
-
-    if not text:
-        return []
-
-    seg = pysbd.Segmenter(language="en", clean=True)
-    sents = seg.segment(text)
-    edus: list[str] = []
-    for s in sents:
-        edus.extend(_split_clauses(s))
-    return [e.strip() for e in edus if e.strip()]
+    return list(edu_spans(text))
+
+
+def stream_edus(
+    pages: Iterable[tuple[int, str]], segmenter: EduSegmenter | None = None
+) -> Iterator[Segment]:
+    """Yield EDU :class:`Segment` tuples from a page stream.
+
+    Sentences are found incrementally with carry-over across page breaks (see
+    :func:`ktflow.segment.sentence.stream_segments`) and then clause-split.
+    Uses the process-wide segmenter unless ``segmenter`` is given.
+    """
+    return (segmenter or get_edu_segmenter()).stream(pages)
@@ -6,22 +6,83 @@ from __future__ import annotations
 Provides a simple, deterministic regex-based sentence splitter that is good
 enough for well-formed prose. Later, this module can be extended to include
 spaCy or EDU-based segmentation.
+
+:func:`iter_sentences` is the single-pass core: it walks the split regex with
+``finditer`` and yields offsets lazily, over either one string or a chunked
+page stream. Text produced by ``ktflow.ingest`` is already whitespace
+normalized, so normalization is skipped by default there.
 """
 
 import re
+from collections.abc import Callable, Iterable, Iterator
+
+from ktflow.segment.spans import Segment, SpanList
 
 _SPLIT_REGEX = re.compile(
     # Split on a sentence end punctuation followed by whitespace and a likely
     # sentence starter (capital, quote, parenthesis, or digit).
     r"(?<=[.!?])\s+(?=[\"'\(\[]?[A-Z0-9])"
 )
+_WHITESPACE = re.compile(r"\s+")
+# A segment still open after this many characters is closed at the next page
+# break, so text without sentence ends (tables, OCR) is not re-split forever
+MAX_CARRY_CHARS = 20_000
+
+type SpanSplitter = Callable[[str], Iterable[tuple[int, int]]]
 
 
 def _normalize_whitespace(text: str) -> str:
     """Collapse excessive whitespace and normalize newlines to spaces."""
-    text = text.replace("\r", " ").replace("\n", " ")
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    # \s covers \r, \n and NBSP, so a single pass is enough
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _iter_spans(text: str) -> Iterator[tuple[int, int]]:
+    """Yield sentence ``(start, end)`` offsets in normalized ``text``.
+
+    The split regex consumes the whole inter-sentence whitespace run, so the
+    pieces between matches are already stripped and non-empty; text without
+    boundaries comes back as a single span.
+    """
+    if not text:
+        return
+    start = 0
+    for m in _SPLIT_REGEX.finditer(text):
+        yield start, m.start()
+        start = m.end()
+    yield start, len(text)
+
+
+def sentence_spans(text: str) -> SpanList:
+    """Split ``text`` into sentences, returned as offsets into normalized text.
+
+    The returned :class:`SpanList` references the whitespace-normalized text
+    (``spans.text``); spans follow the same rules as :func:`split_sentences`.
+    """
+    spans = SpanList(_normalize_whitespace(text) if text else "")
+    for s, e in _iter_spans(spans.text):
+        spans.append(s, e)
+    return spans
+
+
+def iter_sentences(
+    text: str | Iterable[tuple[int, str]], normalized: bool = True
+) -> Iterator[Segment]:
+    """Lazily yield sentences as :class:`Segment` tuples.
+
+    ``text`` is either one string (reported as page 1) or a page stream of
+    ``(page_no, text)`` chunks such as :func:`ktflow.ingest.pdf.iter_pages`,
+    in which case sentences are carried over page breaks (see
+    :func:`stream_segments`). With ``normalized=True`` the input is trusted
+    to be whitespace-normalized already; pass ``False`` for raw text.
+    """
+    if isinstance(text, str):
+        doc = text if normalized else _normalize_whitespace(text)
+        for s, e in _iter_spans(doc):
+            yield Segment(1, s, e, doc[s:e])
+        return
+    pages = text if normalized else ((p, _normalize_whitespace(t)) for p, t in text)
+    yield from stream_segments(pages, _iter_spans)
 
 
 def split_sentences(text: str) -> list[str]:
@@ -45,17 +106,65 @@ def split_sentences(text: str) -> list[str]:
     """
     if not text:
         return []
+    doc = _normalize_whitespace(text)
+    return [doc[s:e] for s, e in _iter_spans(doc)]
+
 
-    normalized = _normalize_whitespace(text)
-    # Quick return when no sentence end markers are present
-    if not re.search(r"[.!?]", normalized):
-        return [normalized] if normalized else []
+def stream_segments(
+    pages: Iterable[tuple[int, str]],
+    split: SpanSplitter = _iter_spans,
+    max_carry: int = MAX_CARRY_CHARS,
+) -> Iterator[Segment]:
+    """Segment a page stream incrementally, carrying sentences across pages.
 
-    parts = _SPLIT_REGEX.split(normalized)
-    sentences: list[str] = []
-    for part in parts:
-        s = part.strip()
-        if not s:
+    ``pages`` yields ``(page_no, text)`` of already-normalized text, as
+    produced by :func:`ktflow.ingest.pdf.iter_pages`, and ``split`` maps a
+    text to segment offsets within it. The last segment of each page may
+    continue on the next one, so it is carried over and re-split together
+    with the following page; all earlier segments are final and yielded
+    immediately as :class:`Segment` tuples, where ``page`` is the page the
+    segment starts on and ``start``/``end`` are offsets into the document
+    formed by joining the non-empty pages with single spaces. For the regex
+    splitter the output equals splitting that joined document, except that a
+    carried segment longer than ``max_carry`` characters is yielded at the
+    next page break instead of growing further. That bounds the work per page
+    and the memory held.
+    """
+    carry = ""
+    carry_page = 0
+    carry_start = 0  # document offset of the carried text
+    doc_len = 0  # length of the joined document consumed so far
+    for page_no, text in pages:
+        if not text:
             continue
-        sentences.append(s)
-    return sentences
+        page_start = doc_len + 1 if doc_len else 0
+        doc_len = page_start + len(text)
+        if len(carry) > max_carry:
+            yield Segment(carry_page, carry_start, carry_start + len(carry), carry)
+            carry = ""
+        if carry:
+            buffer, base = f"{carry} {text}", carry_start
+        else:
+            buffer, base = text, page_start
+        first_page = carry_page if carry else page_no
+        # Hold back one span: only the buffer's last segment may be incomplete
+        pending: tuple[int, int, int] | None = None
+        for s, e in split(buffer):
+            if pending is not None:
+                page, ps, pe = pending
+                yield Segment(page, base + ps, base + pe, buffer[ps:pe])
+            pending = (first_page if pending is None else page_no, s, e)
+        if pending is None:
+            continue
+        carry_page, ps, pe = pending
+        carry, carry_start = buffer[ps:pe], base + ps
+    if carry:
+        yield Segment(carry_page, carry_start, carry_start + len(carry), carry)
+
+
+def stream_sentences(pages: Iterable[tuple[int, str]]) -> Iterator[Segment]:
+    """Yield sentence :class:`Segment` tuples from a normalized page stream.
+
+    Equivalent to ``iter_sentences(pages)``.
+    """
+    return stream_segments(pages, _iter_spans)
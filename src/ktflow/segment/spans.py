@@ -0,0 +1,70 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Compact segment storage as offsets into a shared text buffer.
+
+Segmenters return a :class:`SpanList` instead of a list of copied strings:
+start/end offsets live in two ``array('I')`` columns (4 bytes each per
+segment) and text is sliced from the shared buffer only when a segment is
+accessed.
+"""
+
+from array import array
+from collections.abc import Iterator, Sequence
+from typing import NamedTuple, overload
+
+
+class Segment(NamedTuple):
+    """One segment from a page stream, in document coordinates.
+
+    ``start``/``end`` index into the document text formed by joining the
+    non-empty pages with single spaces.
+    """
+
+    page: int
+    start: int
+    end: int
+    text: str
+
+
+class SpanList(Sequence[str]):
+    """Sequence of segments of ``text`` stored as ``[start, end)`` offsets."""
+
+    __slots__ = ("text", "starts", "ends")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.starts = array("I")
+        self.ends = array("I")
+
+    def append(self, start: int, end: int) -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[str]: ...
+
+    def __getitem__(self, i: int | slice) -> str | list[str]:
+        if isinstance(i, slice):
+            return [self.text[s:e] for s, e in zip(self.starts[i], self.ends[i], strict=True)]
+        return self.text[self.starts[i] : self.ends[i]]
+
+    def __iter__(self) -> Iterator[str]:
+        text = self.text
+        for s, e in zip(self.starts, self.ends, strict=True):
+            yield text[s:e]
+
+    def span(self, i: int) -> tuple[int, int]:
+        return self.starts[i], self.ends[i]
+
+    def spans(self) -> Iterator[tuple[int, int]]:
+        return zip(self.starts, self.ends, strict=True)
+
+    def __repr__(self) -> str:
+        return f"SpanList(n={len(self)}, chars={len(self.text)})"
@@ -0,0 +1,133 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Multi-stage tagging cascade: rules → TF-IDF → HF → k-NN (any subset).
+
+Each sentence goes to the next stage only while it is undecided. Rules
+decide every sentence they label. A model stage decides rows whose top-two
+probability margin is at least ``Stage.margin``. The last stage decides
+everything it sees.
+
+``Stage.budget`` caps the fraction of all sentences tagged so far that a
+stage may score. Over budget, the least confident pending rows are escalated
+first, and the rest keep the label of the last stage that scored them.
+:class:`StageStats` tracks rows seen, rows decided and time per stage.
+"""
+
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from ktflow.tag.hybrid import HybridModel, _score, _top_margin
+from ktflow.tag.rulepack import CompiledRulepack
+from ktflow.tag.rules import LABELS, UNK_CODE, tag_sentences_rules
+
+
+@dataclass
+class Stage:
+    """One model stage; ``model`` is anything the hybrid tagger can score."""
+
+    name: str
+    model: HybridModel
+    margin: float = 0.25
+    budget: float | None = None
+
+
+@dataclass
+class StageStats:
+    name: str
+    seen: int = 0
+    decided: int = 0
+    over_budget: int = 0
+    seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of the rows this stage saw that it decided."""
+        return self.decided / self.seen if self.seen else 0.0
+
+
+@dataclass
+class Cascade:
+    """Chain of taggers escalating low-confidence sentences; see the module docs."""
+
+    stages: list[Stage]
+    rules: bool = True
+    rulepack: CompiledRulepack | None = None
+    total: int = 0
+    stats: list[StageStats] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if not self.stats:
+            names = (["rules"] if self.rules else []) + [s.name for s in self.stages]
+            self.stats = [StageStats(name) for name in names]
+
+    def tag(self, sentences: Iterable[str]) -> list[str]:
+        """Tag a batch; stats accumulate across calls."""
+        texts = sentences if isinstance(sentences, list) else list(sentences)
+        n = len(texts)
+        self.total += n
+        labels = np.full(n, "UNK", dtype=object)
+        # Margin of each row's current label; -inf until a model has scored it
+        margins = np.full(n, -np.inf)
+        pending = np.arange(n)
+        stats = iter(self.stats)
+
+        if self.rules:
+            st = next(stats)
+            t0 = time.perf_counter()
+            codes = tag_sentences_rules(texts, rulepack=self.rulepack)
+            hit = codes != UNK_CODE
+            labels[hit] = np.asarray(LABELS, dtype=object)[codes[hit]]
+            pending = np.flatnonzero(~hit)
+            st.seen += n
+            st.decided += int(hit.sum())
+            st.seconds += time.perf_counter() - t0
+
+        for i, (stage, st) in enumerate(zip(self.stages, stats, strict=True)):
+            if stage.budget is not None:
+                allowed = max(0, int(stage.budget * self.total) - st.seen)
+                if pending.size > allowed:
+                    # Spend the budget on the least confident rows
+                    by_margin = pending[np.argsort(margins[pending], kind="stable")]
+                    st.over_budget += pending.size - allowed
+                    pending = np.sort(by_margin[:allowed])
+            if not pending.size:
+                break
+            t0 = time.perf_counter()
+            probs, classes = _score(stage.model, [texts[j] for j in pending])
+            top, gap = _top_margin(probs)
+            labels[pending] = classes[top]
+            margins[pending] = gap
+            last = i == len(self.stages) - 1
+            accept = np.ones(len(pending), dtype=bool) if last else gap >= stage.margin
+            st.seen += len(pending)
+            st.decided += int(accept.sum())
+            st.seconds += time.perf_counter() - t0
+            pending = pending[~accept]
+        return labels.tolist()
+
+    def merge(self, stats: list[StageStats], total: int) -> None:
+        """Add the counters of another cascade over the same stages (e.g. a pool worker)."""
+        for st, other in zip(self.stats, stats, strict=True):
+            st.seen += other.seen
+            st.decided += other.decided
+            st.over_budget += other.over_budget
+            st.seconds += other.seconds
+        self.total += total
+
+    def report(self) -> str:
+        """Per-stage table: rows seen, decided, hit rate, budget cuts and time."""
+        lines = [
+            f"{'stage':<8s} {'seen':>9s} {'decided':>9s} {'hit%':>6s} {'cut':>7s} "
+            f"{'seconds':>8s} {'ms/row':>7s}"
+        ]
+        for st in self.stats:
+            ms = 1e3 * st.seconds / st.seen if st.seen else 0.0
+            lines.append(
+                f"{st.name:<8s} {st.seen:9d} {st.decided:9d} {100 * st.hit_rate:6.1f} "
+                f"{st.over_budget:7d} {st.seconds:8.2f} {ms:7.3f}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,211 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Compact, scikit-learn-free inference artifact for the TF-IDF tagger.
+
+:func:`export_compact` writes a trained :class:`ktflow.tag.ml.ModelBundle`
+(vocabulary ``TfidfVectorizer`` with char_wb n-grams plus a linear
+classifier) as a directory of plain arrays::
+
+    meta.json        labels, n-gram range, TF-IDF flags, probability mode
+    vocab.npy        sorted n-grams (fixed-width unicode); row i is feature i
+    idf.npy          float32 (n_features,)
+    coef.npy         float32 (n_features, n_columns)
+    intercept.npy    float32 (n_columns,)
+
+Each array is a separate ``.npy`` (not an ``.npz``, whose members cannot be
+memory-mapped). :class:`CompactTagger` loads them with
+``np.load(mmap_mode="r")``, so forked workers share the pages. It scores with
+NumPy only and reproduces ``predict_proba`` up to float32 rounding. Importing
+this module does not import scikit-learn.
+"""
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ktflow.tag.ml import ModelBundle
+
+# Bump when the artifact layout changes; older exports are then rejected.
+COMPACT_FORMAT = 1
+_META = "meta.json"
+# Words whose feature ids are kept between calls (cleared when full)
+_WORD_CACHE_SIZE = 200_000
+
+
+def _char_wb_ngrams(word: str, min_n: int, max_n: int) -> list[str]:
+    """N-grams of one word, as scikit-learn's ``analyzer="char_wb"`` makes them."""
+    w = f" {word} "
+    w_len = len(w)
+    ngrams: list[str] = []
+    for n in range(min_n, max_n + 1):
+        ngrams.extend([w[i : i + n] for i in range(max(1, w_len - n + 1))])
+        if w_len <= n:  # longer n-grams would repeat the whole word
+            break
+    return ngrams
+
+
+def _proba_mode(classifier: Any) -> str:
+    """``"softmax"`` or ``"ovr"``, matching the classifier's ``predict_proba``."""
+    if type(classifier).__name__ != "LogisticRegression":
+        return "ovr"  # SGDClassifier(log_loss) and friends normalize one-vs-rest sigmoids
+    multi_class = getattr(classifier, "multi_class", "auto")
+    if multi_class == "ovr" or classifier.solver == "liblinear":
+        return "ovr"
+    if multi_class in ("auto", "deprecated") and len(classifier.classes_) <= 2:  # noqa: PLR2004
+        return "ovr"
+    return "softmax"
+
+
+def export_compact(model: ModelBundle, out_dir: str | Path) -> Path:
+    """Write ``model`` as a compact artifact directory; returns ``out_dir``.
+
+    Only vocabulary-based ``char_wb`` vectorizers are supported (a
+    ``HashingVectorizer`` would need its hash function at inference time).
+    """
+    vec, clf = model.vectorizer, model.classifier
+    if not hasattr(vec, "vocabulary_") or getattr(vec, "analyzer", None) != "char_wb":
+        raise ValueError("Only fitted char_wb TfidfVectorizer bundles can be exported")
+    if vec.preprocessor is not None or vec.strip_accents:
+        raise ValueError("Custom preprocessors and accent stripping are not supported")
+    terms = np.array(list(vec.vocabulary_), dtype=f"<U{vec.ngram_range[1]}")
+    order = np.argsort(terms)
+    cols = np.fromiter((vec.vocabulary_[t] for t in terms[order]), dtype=np.int64)
+    use_idf = bool(getattr(vec, "use_idf", False))
+    idf = vec.idf_[cols] if use_idf else np.ones(len(cols))
+    labels = model.label_encoder.inverse_transform(clf.classes_)
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    np.save(out / "vocab.npy", terms[order])
+    np.save(out / "idf.npy", idf.astype(np.float32))
+    coef = clf.coef_.toarray() if hasattr(clf.coef_, "toarray") else clf.coef_  # sparsify()d
+    np.save(out / "coef.npy", np.ascontiguousarray(coef.T[cols], dtype=np.float32))
+    np.save(out / "intercept.npy", np.asarray(clf.intercept_, dtype=np.float32))
+    meta = {
+        "format": COMPACT_FORMAT,
+        "labels": [str(lab) for lab in labels],
+        "ngram_range": list(vec.ngram_range),
+        "lowercase": bool(vec.lowercase),
+        "use_idf": use_idf,
+        "sublinear_tf": bool(getattr(vec, "sublinear_tf", False)),
+        "norm": vec.norm,
+        "proba": _proba_mode(clf),
+    }
+    (out / _META).write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    return out
+
+
+class CompactTagger:
+    """NumPy scorer for an :func:`export_compact` artifact.
+
+    Exposes ``labels``, ``predict_proba`` and ``predict``, so it can stand in
+    for the joblib bundle in the hybrid tagger and cascade.
+    """
+
+    def __init__(self, path: str | Path, mmap: bool = True) -> None:
+        self.path = Path(path)
+        meta = json.loads((self.path / _META).read_text(encoding="utf-8"))
+        if meta.get("format") != COMPACT_FORMAT:
+            raise ValueError(
+                f"Compact model {self.path} has format {meta.get('format')}, "
+                f"expected {COMPACT_FORMAT}; re-export it"
+            )
+        self.meta = meta
+        self.labels: list[str] = list(meta["labels"])
+        mode = "r" if mmap else None
+        self.vocab = np.load(self.path / "vocab.npy", mmap_mode=mode)
+        self.idf = np.load(self.path / "idf.npy", mmap_mode=mode)
+        self.coef = np.load(self.path / "coef.npy", mmap_mode=mode)
+        self.intercept = np.load(self.path / "intercept.npy", mmap_mode=mode)
+        self._word_ids: dict[str, np.ndarray] = {}
+
+    def _lookup_words(self, words: list[str]) -> dict[str, np.ndarray]:
+        """Resolve the n-grams of ``words`` to feature ids in one batched search."""
+        min_n, max_n = self.meta["ngram_range"]
+        grams = [_char_wb_ngrams(w, min_n, max_n) for w in words]
+        query = np.array([g for gs in grams for g in gs], dtype=self.vocab.dtype)
+        pos = np.searchsorted(self.vocab, query)
+        pos[pos == len(self.vocab)] = 0
+        known = self.vocab[pos] == query if len(self.vocab) else np.zeros(len(query), bool)
+        bounds = np.cumsum([len(gs) for gs in grams])[:-1]
+        splits = zip(words, np.split(pos, bounds), np.split(known, bounds), strict=True)
+        return {w: p[k] for w, p, k in splits}
+
+    def _features(self, sentences: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sparse TF-IDF rows as ``(row, feature, value)`` triples."""
+        lower = self.meta["lowercase"]
+        # char_wb n-grams never cross word boundaries, so features are cached per word
+        words = [(s.lower() if lower else s).split() for s in sentences]
+        cache = self._word_ids
+        # Ids for this batch live in a local dict, so clearing the cache can't drop them
+        batch = {w: cache[w] for ws in words for w in ws if w in cache}
+        new = list({w for ws in words for w in ws if w not in batch})
+        if new:
+            found = self._lookup_words(new)
+            batch.update(found)
+            if len(cache) + len(found) > _WORD_CACHE_SIZE:
+                cache.clear()
+            cache.update(found)
+        ids = [batch[w] for ws in words for w in ws]
+        word_rows = np.repeat(np.arange(len(sentences)), [len(ws) for ws in words])
+        rows = np.repeat(word_rows, [len(i) for i in ids])
+        cols = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+        # Sum duplicate (row, feature) pairs into term counts
+        n_features = max(1, len(self.vocab))
+        keys, counts = np.unique(rows * n_features + cols, return_counts=True)
+        rows, cols = np.divmod(keys, n_features)
+        tf = counts.astype(np.float64)
+        if self.meta["sublinear_tf"]:
+            tf = 1.0 + np.log(tf)
+        if self.meta["use_idf"]:
+            tf *= self.idf[cols]
+        norm = self.meta["norm"]
+        if norm:
+            w = tf**2 if norm == "l2" else np.abs(tf)
+            totals = np.bincount(rows, weights=w, minlength=len(sentences))
+            totals = np.sqrt(totals) if norm == "l2" else totals
+            tf /= totals[rows]
+        return rows, cols, tf
+
+    def decision_function(self, sentences: list[str]) -> np.ndarray:
+        """Linear scores, shape ``(n, n_columns)`` (one column for binary models)."""
+        rows, cols, tf = self._features(sentences)
+        weights = self.coef[cols]
+        scores = np.empty((len(sentences), self.coef.shape[1]))
+        for c in range(self.coef.shape[1]):
+            scores[:, c] = np.bincount(rows, weights=weights[:, c] * tf, minlength=len(sentences))
+        return scores + self.intercept
+
+    def predict_proba(self, sentences: list[str]) -> np.ndarray:
+        """Class probabilities; columns follow ``self.labels``."""
+        d = self.decision_function(list(sentences))
+        if self.meta["proba"] == "softmax":
+            if d.shape[1] == 1:
+                d = np.hstack([-d, d])
+            e_x = np.exp(d - d.max(axis=1, keepdims=True))
+            return e_x / e_x.sum(axis=1, keepdims=True)
+        p = 1.0 / (1.0 + np.exp(-d))
+        if p.shape[1] == 1:
+            return np.hstack([1.0 - p, p])
+        return p / p.sum(axis=1, keepdims=True)
+
+    def predict(self, sentences: list[str]) -> list[str]:
+        return [self.labels[i] for i in self.predict_proba(sentences).argmax(axis=1)]
+
+
+def load_compact(path: str | Path) -> CompactTagger:
+    """Load a compact artifact with memory-mapped arrays."""
+    return CompactTagger(path)
+
+
+def load_model(path: str | Path) -> Any:
+    """Load a TF-IDF tagger: a compact artifact directory or a joblib ``ModelBundle``."""
+    if Path(path).is_dir():
+        return load_compact(path)
+    from ktflow.io.model import load_joblib
+
+    return load_joblib(path)
@@ -0,0 +1,299 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Content-addressed on-disk store of sentence embeddings.
+
+Embeddings are keyed by the encoder (a hash of its model directory, one
+subdirectory per model) and the SHA-256 of the normalized sentence. Each model
+directory holds:
+
+* ``vectors-<id>.npy``: an append-only ``float16`` array of shape
+  ``(rows, dim)``. Its header has a fixed width, so appending rows only
+  rewrites the row count, and readers memory-map it with
+  ``np.load(..., mmap_mode="r")``.
+* ``index.txt``: a JSON metadata line (format, dim, vectors file name),
+  then one sentence key per line. Line ``i`` is row ``i``.
+
+Rows are written before their keys, so a crash leaves at most some
+unreferenced rows, and those are dropped on the next open. Bytes past the row
+count in the header (a crash before the header update) are trimmed on open, and
+appends always start right after the last indexed row. Compaction writes a new
+vectors file and switches to it with an atomic rename of the index. A store
+directory supports one writer at a time (any number of readers).
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import unicodedata
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+import numpy as np
+
+from ktflow.io.hashing import sha256_file, sha256_json
+
+# Bump when the on-disk layout changes; older stores are then rejected.
+STORE_FORMAT = 1
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+_INDEX = "index.txt"
+_DTYPE = np.dtype("<f2")
+# Fixed .npy header size (multiple of 64, as numpy itself pads to)
+_HEADER_LEN = 128
+_KEY_LEN = 64
+
+
+def normalize_sentence(s: str) -> str:
+    """Whitespace-collapse and NFC-normalize ``s`` (case is kept: encoders are cased)."""
+    return unicodedata.normalize("NFC", " ".join(s.split()))
+
+
+def sentence_key(s: str) -> str:
+    """Hex SHA-256 of the normalized sentence."""
+    return hashlib.sha256(normalize_sentence(s).encode("utf-8")).hexdigest()
+
+
+def model_dir_hash(model_dir: str | Path) -> str:
+    """Hash of every file directly under ``model_dir`` (weights, config, tokenizer)."""
+    files = sorted(p for p in Path(model_dir).iterdir() if p.is_file())
+    return sha256_json({p.name: sha256_file(p) for p in files})
+
+
+def _npy_header(rows: int, dim: int) -> bytes:
+    d = f"{{'descr': '{_DTYPE.str}', 'fortran_order': False, 'shape': ({rows}, {dim}), }}"
+    body = d.ljust(_HEADER_LEN - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(body)) + body.encode("latin1")
+
+
+def _npy_rows(path: Path) -> int:
+    with path.open("rb") as f:
+        np.lib.format.read_magic(f)
+        shape, _, _ = np.lib.format.read_array_header_1_0(f)
+    return int(shape[0])
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped ``float16`` embedding store for one encoder.
+
+    ``root`` holds one subdirectory per ``model_key`` (see
+    :func:`model_dir_hash`). When an append pushes the store past
+    ``max_bytes``, it is compacted down to the newest rows that fit.
+    """
+
+    def __init__(
+        self, root: str | Path, model_key: str, max_bytes: int | None = DEFAULT_MAX_BYTES
+    ) -> None:
+        self.dir = Path(root) / model_key
+        self.max_bytes = max_bytes
+        self.dim: int | None = None
+        self._vectors_name: str | None = None
+        self._keys: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._mmap: np.ndarray | None = None
+        self._load()
+
+    # -- loading ---------------------------------------------------------------
+
+    def _load(self) -> None:
+        index = self.dir / _INDEX
+        if not index.exists():
+            return
+        with index.open("r", encoding="utf-8") as f:
+            meta = json.loads(f.readline())
+            keys = [line.rstrip("\n") for line in f]
+        if meta.get("format") != STORE_FORMAT:
+            raise ValueError(
+                f"Embedding store {self.dir} has format {meta.get('format')}, "
+                f"expected {STORE_FORMAT}; delete it to rebuild"
+            )
+        self.dim = int(meta["dim"])
+        self._vectors_name = str(meta["vectors"])
+        rows = self._check_vectors_file()
+        # A torn last line, or keys whose rows never landed, are dropped
+        valid = [k for k in keys if len(k) == _KEY_LEN]
+        n = min(rows, len(valid))
+        self._keys = valid[:n]
+        self._rows = {k: i for i, k in enumerate(self._keys)}
+        if n != len(keys) or n != rows:
+            self._rewrite(np.arange(n))
+
+    def _check_vectors_file(self) -> int:
+        """Row count of the vectors file, after trimming bytes past that count."""
+        assert self.dim is not None
+        path = self._vectors_path
+        rows = _npy_rows(path)
+        expected = _HEADER_LEN + rows * self.dim * _DTYPE.itemsize
+        size = path.stat().st_size
+        if size < expected:
+            raise ValueError(
+                f"Embedding store {self.dir} is truncated ({size} < {expected} bytes); "
+                "delete it to rebuild"
+            )
+        if size > expected:
+            with path.open("r+b") as f:
+                f.truncate(expected)
+        return rows
+
+    @property
+    def _vectors_path(self) -> Path:
+        assert self._vectors_name is not None
+        return self.dir / self._vectors_name
+
+    # -- lookups ---------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, sentence: str) -> bool:
+        return sentence_key(sentence) in self._rows
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate on-disk size (vectors plus index)."""
+        return len(self._keys) * ((self.dim or 0) * _DTYPE.itemsize + _KEY_LEN + 1)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Read-only memory map of all stored rows, shape ``(len(self), dim)``."""
+        if self._mmap is None or len(self._mmap) != len(self._keys):
+            if not self._keys:
+                return np.empty((0, self.dim or 0), dtype=_DTYPE)
+            self._mmap = np.load(self._vectors_path, mmap_mode="r")[: len(self._keys)]
+        return self._mmap
+
+    def rows(self, sentences: Iterable[str]) -> np.ndarray:
+        """Row index of each sentence in :attr:`vectors`, ``-1`` for misses."""
+        get = self._rows.get
+        return np.array([get(sentence_key(s), -1) for s in sentences], dtype=np.int64)
+
+    def get(self, sentence: str) -> np.ndarray | None:
+        """Zero-copy view of one sentence's embedding, or ``None`` on a miss."""
+        row = self._rows.get(sentence_key(sentence))
+        return None if row is None else self.vectors[row]
+
+    def embed(
+        self,
+        sentences: list[str],
+        encode: Callable[[list[str]], np.ndarray],
+        batch_size: int = 256,
+    ) -> np.ndarray:
+        """Return embeddings for ``sentences``, encoding and storing only misses.
+
+        Distinct misses go to ``encode`` in batches of ``batch_size``. Output
+        is ``float16`` in input order. When every sentence hits, it is a
+        zero-copy slice of the memory map if the rows are contiguous, and a
+        gathered copy otherwise. Calls with misses always return a copy.
+        """
+        keys = [sentence_key(s) for s in sentences]
+        missing: dict[str, str] = {}
+        for k, s in zip(keys, sentences, strict=True):
+            if k not in self._rows and k not in missing:
+                missing[k] = s
+        if not missing:
+            rows = np.array([self._rows[k] for k in keys], dtype=np.int64)
+            if len(rows) and rows[-1] - rows[0] == len(rows) - 1 and (np.diff(rows) == 1).all():
+                return self.vectors[rows[0] : rows[-1] + 1]
+            return self.vectors[rows]
+
+        # Copy this call's hits first: appending may evict them under the size limit
+        hit_keys = [k for k in dict.fromkeys(keys) if k not in missing]
+        hit_rows = np.array([self._rows[k] for k in hit_keys], dtype=np.int64)
+        found = dict(zip(hit_keys, self.vectors[hit_rows], strict=True)) if hit_keys else {}
+        todo = list(missing.items())
+        for start in range(0, len(todo), batch_size):
+            chunk = [k for k, _ in todo[start : start + batch_size]]
+            vecs = np.asarray(encode([missing[k] for k in chunk]), dtype=_DTYPE)
+            found.update(zip(chunk, vecs, strict=True))
+            self._append(chunk, vecs)
+        return np.stack([found[k] for k in keys])
+
+    # -- writes ----------------------------------------------------------------
+
+    def add(self, sentences: Iterable[str], vectors: np.ndarray) -> int:
+        """Store embeddings for sentences not already present; returns rows added."""
+        keys = [sentence_key(s) for s in sentences]
+        keep: dict[str, int] = {}
+        for i, k in enumerate(keys):
+            if k not in self._rows and k not in keep:
+                keep[k] = i
+        if keep:
+            self._append(list(keep), np.asarray(vectors)[list(keep.values())])
+        return len(keep)
+
+    def _append(self, keys: list[str], vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=_DTYPE)
+        if vectors.ndim != 2 or len(vectors) != len(keys):  # noqa: PLR2004
+            raise ValueError(f"Expected {len(keys)} row vectors, got shape {vectors.shape}")
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {vectors.shape[1]} != store dim {self.dim}")
+        if self._vectors_name is None:
+            self._start()
+        n = len(self._keys) + len(keys)
+        with self._vectors_path.open("r+b") as f:
+            # Drop anything a failed append left past the indexed rows
+            f.seek(_HEADER_LEN + len(self._keys) * self.dim * _DTYPE.itemsize)
+            f.truncate()
+            f.write(vectors.tobytes())
+            f.seek(0)
+            f.write(_npy_header(n, self.dim))
+        with (self.dir / _INDEX).open("a", encoding="utf-8") as f:
+            f.writelines(k + "\n" for k in keys)
+        for k in keys:
+            self._rows[k] = len(self._keys)
+            self._keys.append(k)
+        if self.max_bytes is not None and self.nbytes > self.max_bytes:
+            row_bytes = self.nbytes // len(self._keys)
+            cap = self.max_bytes // row_bytes
+            self._rewrite(np.arange(max(0, len(self._keys) - cap), len(self._keys)))
+
+    def _start(self) -> None:
+        """Create an empty vectors file and index."""
+        assert self.dim is not None
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._rewrite(np.arange(0))
+
+    def compact(self, keep: Iterable[str] | None = None) -> int:
+        """Rewrite the store, keeping only ``keep`` (default: everything).
+
+        Reclaims space from evicted or orphaned rows. Returns the number of
+        rows removed.
+        """
+        if self._vectors_name is None:
+            return 0
+        if keep is None:
+            rows = np.arange(len(self._keys))
+        else:
+            rows = np.unique(self.rows(keep))
+            rows = rows[rows >= 0]
+        before = len(self._keys)
+        self._rewrite(rows)
+        return before - len(self._keys)
+
+    def _rewrite(self, rows: np.ndarray) -> None:
+        """Write ``rows`` (ascending) to a new vectors file and switch the index to it."""
+        assert self.dim is not None
+        old = self._vectors_path if self._vectors_name else None
+        src = self.vectors if len(self._keys) else None
+        fd, tmp = tempfile.mkstemp(dir=self.dir, prefix="vectors-", suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            f.write(_npy_header(len(rows), self.dim))
+            for start in range(0, len(rows), 65536):
+                assert src is not None
+                f.write(np.ascontiguousarray(src[rows[start : start + 65536]]).tobytes())
+        keys = [self._keys[i] for i in rows]
+        meta = {"format": STORE_FORMAT, "dim": self.dim, "vectors": Path(tmp).name}
+        fd, tmp_index = tempfile.mkstemp(dir=self.dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(meta) + "\n")
+            f.writelines(k + "\n" for k in keys)
+        os.replace(tmp_index, self.dir / _INDEX)
+        self._mmap = None
+        self._vectors_name = Path(tmp).name
+        self._keys = keys
+        self._rows = {k: i for i, k in enumerate(keys)}
+        if old is not None and old != self._vectors_path:
+            old.unlink(missing_ok=True)
@@ -3,7 +3,12 @@ from __future__ import annotations
 
 """Hugging Face transformer-based tagger (sequence classification)."""
 
+import functools
 import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from collections.abc import Callable
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -16,6 +21,8 @@ from transformers import (
     TrainingArguments,
 )
 
+from ktflow.io.hashing import sha256_file, sha256_json
+
 
 @dataclass
 class HFModelBundle:
@@ -39,6 +46,84 @@ def _prepare_dataset(rows: list[dict], label_col: str) -> tuple[list[str], list[
     return texts, labels
 
 
+def _tokenizer_hash(tokenizer: Any) -> str:
+    """Hash of everything that affects token ids (vocab, normalizer, special tokens)."""
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        state: Any = backend.to_str()
+    else:
+        state = sorted(tokenizer.get_vocab().items())
+    return sha256_json({"cls": type(tokenizer).__name__, "state": state})
+
+
+class _TokenizedDataset:
+    """Pre-tokenized, unpadded examples stored as flat arrays plus offsets."""
+
+    def __init__(self, arrays: dict[str, np.ndarray]) -> None:
+        self.offsets = arrays["offsets"]
+        self.labels = arrays["labels"]
+        self.features = {k: v for k, v in arrays.items() if k not in ("offsets", "labels")}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __getitem__(self, idx: int) -> dict:
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        item: dict[str, Any] = {k: v[start:end].tolist() for k, v in self.features.items()}
+        item["labels"] = int(self.labels[idx])
+        return item
+
+
+def _tokenize_dataset(
+    texts: list[str], y: list[int], tokenizer: Any, max_length: int
+) -> dict[str, np.ndarray]:
+    """Tokenize all texts in one batched (fast-tokenizer) pass, without padding."""
+    enc = tokenizer(texts, truncation=True, max_length=max_length)
+    lengths = np.fromiter((len(ids) for ids in enc["input_ids"]), dtype=np.int64, count=len(texts))
+    arrays: dict[str, np.ndarray] = {
+        "offsets": np.concatenate(([0], np.cumsum(lengths))),
+        "labels": np.asarray(y, dtype=np.int64),
+    }
+    for key in enc.keys():
+        arrays[key] = np.fromiter(
+            (t for seq in enc[key] for t in seq), dtype=np.int32, count=int(lengths.sum())
+        )
+    return arrays
+
+
+def _cached_tokenize(
+    train_jsonl: str,
+    texts: list[str],
+    y: list[int],
+    tokenizer: Any,
+    max_length: int,
+    cache_dir: str | Path | None,
+    label2id: dict[str, int],
+) -> _TokenizedDataset:
+    """Tokenize once; reuse ``<cache_dir>/<key>.npz`` keyed by data + tokenizer hash."""
+    if cache_dir is None:
+        return _TokenizedDataset(_tokenize_dataset(texts, y, tokenizer, max_length))
+    key = sha256_json(
+        {
+            "data": sha256_file(train_jsonl),
+            "labels": label2id,
+            "tokenizer": _tokenizer_hash(tokenizer),
+            "max_length": max_length,
+        }
+    )
+    path = Path(cache_dir) / f"{key}.npz"
+    if path.exists():
+        with np.load(path) as npz:
+            return _TokenizedDataset({k: npz[k] for k in npz.files})
+    arrays = _tokenize_dataset(texts, y, tokenizer, max_length)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file first so concurrent runs never see a partial entry
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".npz", delete=False) as tmp:
+        np.savez(tmp, **arrays)
+    os.replace(tmp.name, path)
+    return _TokenizedDataset(arrays)
+
+
 def train_hf_classifier(
     train_jsonl: str,
     model_name: str,
@@ -48,7 +133,25 @@ def train_hf_classifier(
     batch_size: int = 32,
     lr: float = 2e-5,
     fp16: bool = True,
+    max_length: int = 256,
+    cache_dir: str | Path | None = None,
+    num_workers: int = 0,
+    threads: int | None = None,
 ) -> HFModelBundle:
+    """Fine-tune a sequence classifier on a JSONL dataset.
+
+    Texts are tokenized once in a batched pass (cached under ``cache_dir``,
+    keyed by the data and tokenizer hashes, when given) and padded per batch
+    by a collator; ``group_by_length`` batches similar lengths together.
+    ``num_workers`` and ``threads`` tune CPU data loading and intra-op threads;
+    ``fp16`` only applies when CUDA is available.
+    """
+    import torch
+    from transformers import DataCollatorWithPadding
+
+    if threads:
+        torch.set_num_threads(threads)
+
     rows = _read_jsonl(train_jsonl)
     texts, labels = _prepare_dataset(rows, label_col)
 
@@ -58,38 +161,30 @@ def train_hf_classifier(
     y = [label2id[lab] for lab in labels]
 
     tokenizer = AutoTokenizer.from_pretrained(model_name)
-
-    class Dataset:
-        def __init__(self, texts: list[str], y: list[int]):
-            self.texts = texts
-            self.y = y
-
-        def __len__(self) -> int:
-            return len(self.texts)
-
-        def __getitem__(self, idx: int) -> dict:
-            enc = tokenizer(self.texts[idx], truncation=True, padding="max_length", max_length=256)
-            enc["labels"] = self.y[idx]
-            return enc
-
-    dataset = Dataset(texts, y)
+    dataset = _cached_tokenize(train_jsonl, texts, y, tokenizer, max_length, cache_dir, label2id)
 
     model = AutoModelForSequenceClassification.from_pretrained(
         model_name, num_labels=len(unique_labels), id2label=id2label, label2id=label2id
     )
 
+    use_fp16 = fp16 and torch.cuda.is_available()
     training_args = TrainingArguments(
         output_dir=out_dir,
         per_device_train_batch_size=batch_size,
         learning_rate=lr,
         num_train_epochs=epochs,
-        fp16=fp16,
+        fp16=use_fp16,
+        group_by_length=True,
+        dataloader_num_workers=num_workers,
         logging_steps=50,
         save_strategy="epoch",
         report_to=[],
     )
 
-    trainer = Trainer(model=model, args=training_args, train_dataset=dataset)
+    collator = DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8 if use_fp16 else None)
+    trainer = Trainer(
+        model=model, args=training_args, train_dataset=dataset, data_collator=collator
+    )
     trainer.train()
 
     Path(out_dir).mkdir(parents=True, exist_ok=True)
@@ -101,36 +196,250 @@ def train_hf_classifier(
     return HFModelBundle(model_dir=Path(out_dir))
 
 
+def _load_labels(model_dir: str | Path) -> dict[int, str]:
+    with open(Path(model_dir) / "labels.json", encoding="utf-8") as f:
+        m = json.load(f)
+    return {int(k): v for k, v in m["id2label"].items()}
+
+
 def _load_hf(model_dir: str) -> tuple[Any, Any, dict[int, str]]:
     model = AutoModelForSequenceClassification.from_pretrained(model_dir)
     tokenizer = AutoTokenizer.from_pretrained(model_dir)
-    with open(Path(model_dir) / "labels.json", encoding="utf-8") as f:
-        m = json.load(f)
-    id2label = {int(k): v for k, v in m["id2label"].items()}
-    return model, tokenizer, id2label
+    return model, tokenizer, _load_labels(model_dir)
 
 
-def predict_hf(model_dir: str, sentences: list[str]) -> list[str]:
-    model, tokenizer, id2label = _load_hf(model_dir)
-    model.eval()
-    preds: list[str] = []
-    for s in sentences:
-        enc = tokenizer(s, return_tensors="pt", truncation=True, padding=True, max_length=256)
-        logits = model(**{k: v for k, v in enc.items()}).logits.detach().cpu().numpy()[0]
-        label = id2label[int(np.argmax(logits))]
-        preds.append(label)
-    return preds
+# Inference backends accepted by load_hf_tagger / predict_proba_hf
+HF_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+
+class _BucketedTagger(ABC):
+    """Shared length-bucketed batching for the HF inference backends.
+
+    Sentences are tokenized without padding, sorted by token length and run
+    in batches of similar length (each padded only to its own maximum);
+    results come back in input order. Subclasses implement ``_forward``.
+    """
+
+    tokenizer: Any
+    labels: list[str]
+    batch_size: int
+    max_length: int
+
+    @abstractmethod
+    def _forward(self, features: dict[str, list[list[int]]]) -> np.ndarray:
+        """Return logits for one batch of unpadded token features."""
+
+    def _bucketed(
+        self,
+        sentences: list[str],
+        forward: Callable[[dict[str, list[list[int]]]], np.ndarray],
+        width: int,
+    ) -> np.ndarray:
+        out = np.empty((len(sentences), width), dtype=np.float32)
+        if not sentences:
+            return out
+        enc = self.tokenizer(list(sentences), truncation=True, max_length=self.max_length)
+        # Stable sort keeps equal-length sentences in input order
+        order = np.argsort([len(ids) for ids in enc["input_ids"]], kind="stable")
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start : start + self.batch_size]
+            out[idx] = forward({k: [enc[k][i] for i in idx] for k in enc.keys()})
+        return out
 
+    def logits(self, sentences: list[str]) -> np.ndarray:
+        """Return raw logits, shape ``(len(sentences), n_labels)``."""
+        return self._bucketed(sentences, self._forward, len(self.labels))
 
-def predict_proba_hf(model_dir: str, sentences: list[str]) -> tuple[np.ndarray, list[str]]:
-    model, tokenizer, id2label = _load_hf(model_dir)
+    def predict_proba(self, sentences: list[str]) -> np.ndarray:
+        """Return softmax probabilities; columns follow ``self.labels``."""
+        logits = self.logits(sentences)
+        e_x = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return e_x / e_x.sum(axis=1, keepdims=True)
+
+    def predict(self, sentences: list[str]) -> list[str]:
+        return [self.labels[i] for i in self.logits(sentences).argmax(axis=1)]
+
+
+class HFTagger(_BucketedTagger):
+    """Inference session for a fine-tuned HF classifier (PyTorch).
+
+    Loads the model and tokenizer once and runs under
+    ``torch.inference_mode``. With ``int8=True`` the ``Linear`` layers are
+    dynamically quantized to int8 on load (CPU only).
+    """
+
+    def __init__(
+        self,
+        model_dir: str | Path,
+        batch_size: int = 64,
+        max_length: int = 256,
+        device: str | None = None,
+        int8: bool = False,
+    ) -> None:
+        import torch
+
+        self.model_dir = Path(model_dir)
+        self.batch_size = max(1, batch_size)
+        self.max_length = max_length
+        if int8:
+            device = "cpu"
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        model, self.tokenizer, self.id2label = _load_hf(str(model_dir))
+        model = model.to(self.device).eval()
+        if int8:
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.model = model
+        self.labels = [self.id2label[i] for i in sorted(self.id2label)]
+
+    def _forward(self, features: dict[str, list[list[int]]]) -> np.ndarray:
+        import torch
+
+        batch = self.tokenizer.pad(features, return_tensors="pt")
+        with torch.inference_mode():
+            batch = {k: v.to(self.device) for k, v in batch.items()}
+            return self.model(**batch).logits.float().cpu().numpy()
+
+    def _embed_forward(self, features: dict[str, list[list[int]]]) -> np.ndarray:
+        import torch
+
+        batch = self.tokenizer.pad(features, return_tensors="pt")
+        with torch.inference_mode():
+            batch = {k: v.to(self.device) for k, v in batch.items()}
+            hidden = self.model(**batch, output_hidden_states=True).hidden_states[-1]
+            mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            pooled = torch.nn.functional.normalize(pooled.float(), dim=1)
+            return pooled.cpu().numpy()
+
+    def embed(self, sentences: list[str]) -> np.ndarray:
+        """Return L2-normalized mean-pooled last-layer embeddings, ``(n, hidden_size)``.
+
+        Pair with :class:`ktflow.tag.embed_store.EmbeddingStore` to encode
+        each sentence only once: ``store.embed(sentences, tagger.embed)``.
+        """
+        return self._bucketed(sentences, self._embed_forward, self.model.config.hidden_size)
+
+
+class ONNXTagger(_BucketedTagger):
+    """Inference session for a classifier exported with :func:`export_onnx`.
+
+    ``model_dir`` is the export directory (ONNX graph, tokenizer files and
+    ``labels.json``). Runs on onnxruntime's CPU provider; ``threads`` sets
+    the intra-op thread count (default: onnxruntime's choice).
+    """
+
+    def __init__(
+        self,
+        model_dir: str | Path,
+        batch_size: int = 64,
+        max_length: int = 256,
+        int8: bool = False,
+        threads: int | None = None,
+    ) -> None:
+        import onnxruntime as ort
+
+        self.model_dir = Path(model_dir)
+        self.batch_size = max(1, batch_size)
+        self.max_length = max_length
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        path = self.model_dir / (ONNX_INT8_FILE if int8 else ONNX_FILE)
+        self.session = ort.InferenceSession(
+            str(path), sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.id2label = _load_labels(model_dir)
+        self.labels = [self.id2label[i] for i in sorted(self.id2label)]
+
+    def _forward(self, features: dict[str, list[list[int]]]) -> np.ndarray:
+        batch = self.tokenizer.pad(features, return_tensors="np")
+        feeds = {name: batch[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(["logits"], feeds)[0]
+
+
+def export_onnx(
+    model_dir: str | Path, out_dir: str | Path, int8: bool = False, opset: int = 17
+) -> list[Path]:
+    """Export a saved classifier to ONNX, optionally with an int8 copy.
+
+    ``out_dir`` receives ``model.onnx`` (dynamic batch and sequence axes), the
+    tokenizer files and ``labels.json``, so it can be passed to
+    :class:`ONNXTagger` directly. With ``int8=True`` onnxruntime's dynamic
+    quantization also writes ``model.int8.onnx``. Returns the written graphs.
+    """
+    import shutil
+
+    import torch
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    model, tokenizer, _ = _load_hf(str(model_dir))
     model.eval()
-    labels = [id2label[i] for i in sorted(id2label.keys())]
-    probs_list: list[np.ndarray] = []
-    for s in sentences:
-        enc = tokenizer(s, return_tensors="pt", truncation=True, padding=True, max_length=256)
-        logits = model(**{k: v for k, v in enc.items()}).logits.detach().cpu().numpy()[0]
-        e_x = np.exp(logits - np.max(logits))
-        probs = e_x / e_x.sum()
-        probs_list.append(probs)
-    return np.vstack(probs_list), labels
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    names = list(sample.keys())
+
+    class _Logits(torch.nn.Module):
+        # Positional inputs in tokenizer order; returns only the logits
+        def __init__(self) -> None:
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs: Any) -> Any:
+            return self.model(**dict(zip(names, inputs, strict=True))).logits
+
+    dynamic_axes: dict[str, dict[int, str]] = {n: {0: "batch", 1: "sequence"} for n in names}
+    dynamic_axes["logits"] = {0: "batch"}
+    fp32_path = out / ONNX_FILE
+    torch.onnx.export(
+        _Logits(),
+        tuple(sample[n] for n in names),
+        str(fp32_path),
+        input_names=names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=opset,
+        do_constant_folding=True,
+    )
+    tokenizer.save_pretrained(str(out))
+    shutil.copyfile(Path(model_dir) / "labels.json", out / "labels.json")
+    written = [fp32_path]
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = out / ONNX_INT8_FILE
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        written.append(int8_path)
+    return written
+
+
+@functools.lru_cache(maxsize=2)
+def load_hf_tagger(
+    model_dir: str, backend: str = "torch", batch_size: int = 64
+) -> HFTagger | ONNXTagger:
+    """Return a cached inference session for ``model_dir``.
+
+    ``backend`` is one of :data:`HF_BACKENDS`; the ONNX backends expect the
+    directory written by :func:`export_onnx`.
+    """
+    if backend not in HF_BACKENDS:
+        raise ValueError(f"Unknown HF backend {backend!r}; expected one of {HF_BACKENDS}")
+    if backend.startswith("onnx"):
+        return ONNXTagger(model_dir, batch_size=batch_size, int8=backend == "onnx-int8")
+    return HFTagger(model_dir, batch_size=batch_size, int8=backend == "torch-int8")
+
+
+def predict_hf(model_dir: str, sentences: list[str], backend: str = "torch") -> list[str]:
+    return load_hf_tagger(model_dir, backend).predict(sentences)
+
+
+def predict_proba_hf(
+    model_dir: str, sentences: list[str], backend: str = "torch"
+) -> tuple[np.ndarray, list[str]]:
+    tagger = load_hf_tagger(model_dir, backend)
+    return tagger.predict_proba(sentences), list(tagger.labels)
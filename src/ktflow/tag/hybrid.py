@@ -3,18 +3,85 @@ from __future__ import annotations
 
 """Hybrid rules+ML tagger."""
 
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
 
 import numpy as np
 
-from ktflow.tag.ml import ModelBundle, predict_proba
-from ktflow.tag.rules import tag_sentence_rules
+from ktflow.tag.rulepack import CompiledRulepack
+from ktflow.tag.rules import LABELS, UNK_CODE, tag_sentences_rules
+
+if TYPE_CHECKING:
+    from ktflow.tag.compact import CompactTagger
+    from ktflow.tag.hf import HFTagger, ONNXTagger
+    from ktflow.tag.knn import KNNTagger
+    from ktflow.tag.ml import ModelBundle
+
+# Anything scored by the hybrid: a TF-IDF bundle (joblib or compact), an HF inference
+# session or a k-NN tagger
+type HybridModel = ModelBundle | CompactTagger | HFTagger | ONNXTagger | KNNTagger
+
+
+def _score(model: HybridModel, texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(probs, class_labels)`` for ``texts`` in one batched call."""
+    if hasattr(model, "label_encoder"):
+        # Imported here so compact-model inference never loads scikit-learn
+        from ktflow.tag.ml import predict_proba
+
+        return predict_proba(model, texts), model.label_encoder.classes_
+    return model.predict_proba(texts), np.asarray(model.labels, dtype=object)
+
+
+def _top_margin(probs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the top class per row and its probability gap to the runner-up."""
+    order = np.argsort(probs, axis=1)[:, ::-1]
+    top = order[:, 0]
+    second = order[:, 1] if probs.shape[1] > 1 else top
+    rows = np.arange(len(probs))
+    return top, probs[rows, top] - probs[rows, second]
+
+
+def tag_sentences_hybrid(
+    sentences: Iterable[str],
+    model: HybridModel | None = None,
+    rules_first: bool = True,
+    confidence_gap: float = 0.25,
+    rulepack: CompiledRulepack | None = None,
+) -> list[str]:
+    """Batch hybrid tagging; see :func:`tag_sentence_hybrid` for the strategy.
+
+    Rules run over the whole batch first. Only rows the model must decide
+    (rule ``UNK`` rows, or every row when ``rules_first`` is false) are
+    scored, in a single ``predict_proba`` call, and the confidence-gap
+    fallback is applied to them as array operations. ``model`` may be a
+    TF-IDF :class:`ModelBundle` or :class:`ktflow.tag.compact.CompactTagger`,
+    an :class:`ktflow.tag.hf.HFTagger` or a :class:`ktflow.tag.knn.KNNTagger`.
+    """
+    texts = sentences if isinstance(sentences, list) else list(sentences)
+    codes = tag_sentences_rules(texts, rulepack=rulepack)
+    labels = np.asarray(LABELS, dtype=object)[codes]
+    if model is None or not texts:
+        return labels.tolist()
+
+    idx = np.flatnonzero(codes == UNK_CODE) if rules_first else np.arange(len(texts))
+    if idx.size == 0:
+        return labels.tolist()
+    probs, classes = _score(model, [texts[i] for i in idx])
+    top, gap = _top_margin(probs)
+    top_labels = classes[top]
+
+    # ML wins on a confident gap, or when there is no rule label to fall back to
+    use_ml = (gap >= confidence_gap) | (codes[idx] == UNK_CODE)
+    labels[idx[use_ml]] = top_labels[use_ml]
+    return labels.tolist()
 
 
 def tag_sentence_hybrid(
     s: str,
-    model: ModelBundle | None = None,
+    model: HybridModel | None = None,
     rules_first: bool = True,
     confidence_gap: float = 0.25,
+    rulepack: CompiledRulepack | None = None,
 ) -> str:
     """Hybrid tagging strategy.
 
@@ -23,27 +90,9 @@ def tag_sentence_hybrid(
     - Otherwise, use the ML model (if provided). If probability gap between top
       two classes exceeds ``confidence_gap``, return the top label; else fall
       back to rules. If still UNK, return ML top.
-    """
-    # Strong-rule shortcut
-    rule_label = tag_sentence_rules(s)
-    if rules_first and rule_label != "UNK":
-        # Treat any non-UNK hit as high confidence for now
-        return rule_label
+    - ``rulepack`` selects the rule set (default: built-in rules).
 
-    if model is None:
-        return rule_label
-
-    probs = predict_proba(model, [s])[0]
-    order = np.argsort(probs)[::-1]
-    top_idx, second_idx = order[0], order[1] if len(order) > 1 else (order[0], order[0])
-    gap = probs[top_idx] - probs[second_idx]
-    top_label = model.label_encoder.inverse_transform([top_idx])[0]
-
-    if gap >= confidence_gap:
-        return top_label
-
-    # fallback to rules
-    if rule_label != "UNK":
-        return rule_label
-
-    return top_label
+    For many sentences prefer :func:`tag_sentences_hybrid`, which scores them
+    in one model call.
+    """
+    return tag_sentences_hybrid([s], model, rules_first, confidence_gap, rulepack)[0]
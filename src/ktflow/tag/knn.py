@@ -0,0 +1,228 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Nearest-neighbour prototype tagger over sentence embeddings.
+
+A sentence is labeled by a similarity-weighted vote of its ``k`` nearest
+labeled examples (cosine similarity on L2-normalized embeddings). Examples
+added to the index count immediately; there is nothing to retrain.
+
+Search is exact by default: blocked ``float32`` matmuls whose similarity
+block is capped at ``_BLOCK_FLOATS`` entries. :meth:`KNNIndex.build_ivf` adds
+an IVF-style coarse quantizer for large indexes. Examples are clustered with
+spherical k-means, and each query scans only the members of its ``n_probe``
+closest lists.
+"""
+
+import json
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+
+import numpy as np
+
+DEFAULT_K = 10
+# Similarity-matrix budget per matmul block (float32 entries, 64 MiB)
+_BLOCK_FLOATS = 1 << 24
+
+Encoder = Callable[[list[str]], np.ndarray]
+
+
+def _normalize(X: np.ndarray) -> np.ndarray:
+    X = np.asarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.maximum(norms, 1e-12)
+
+
+def _top_k(S: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of the ``k`` largest entries per row, descending."""
+    k = min(k, S.shape[1])
+    part = np.argpartition(-S, k - 1, axis=1)[:, :k]
+    vals = np.take_along_axis(S, part, axis=1)
+    order = np.argsort(-vals, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(vals, order, axis=1)
+
+
+@dataclass
+class KNNIndex:
+    """Labeled, L2-normalized example embeddings with optional IVF lists.
+
+    ``codes`` index into ``labels``; new labels are appended, so existing
+    codes (and ``predict_proba`` columns) stay stable as examples are added.
+    """
+
+    vectors: np.ndarray
+    codes: np.ndarray
+    labels: list[str] = field(default_factory=list)
+    centroids: np.ndarray | None = None
+    lists: list[np.ndarray] | None = None
+    n_probe: int = 8
+
+    @classmethod
+    def empty(cls, dim: int) -> KNNIndex:
+        return cls(np.empty((0, dim), dtype=np.float32), np.empty(0, dtype=np.int32))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def add(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        """Append labeled examples; IVF lists (if built) are updated in place."""
+        X = _normalize(vectors)
+        if len(X) != len(labels):
+            raise ValueError(f"Got {len(X)} vectors for {len(labels)} labels")
+        lookup = {lab: i for i, lab in enumerate(self.labels)}
+        for lab in labels:
+            if lab not in lookup:
+                lookup[lab] = len(self.labels)
+                self.labels.append(lab)
+        codes = np.array([lookup[lab] for lab in labels], dtype=np.int32)
+        start = len(self.codes)
+        self.vectors = np.vstack([self.vectors, X]) if start else X
+        self.codes = np.concatenate([self.codes, codes])
+        if self.centroids is not None and self.lists is not None:
+            assign = self._assign(X)
+            for c in np.unique(assign):
+                members = start + np.flatnonzero(assign == c)
+                self.lists[c] = np.concatenate([self.lists[c], members])
+
+    def _assign(self, X: np.ndarray) -> np.ndarray:
+        """Nearest centroid of each row of ``X``."""
+        assert self.centroids is not None
+        if not len(X):
+            return np.empty(0, dtype=np.int64)
+        step = max(1, _BLOCK_FLOATS // len(self.centroids))
+        return np.concatenate(
+            [(X[s : s + step] @ self.centroids.T).argmax(axis=1) for s in range(0, len(X), step)]
+        )
+
+    def build_ivf(self, n_lists: int, n_probe: int = 8, n_iter: int = 10, seed: int = 0) -> None:
+        """Cluster the examples into ``n_lists`` lists (spherical k-means)."""
+        n_lists = max(1, min(n_lists, len(self)))
+        rng = np.random.default_rng(seed)
+        self.centroids = self.vectors[rng.choice(len(self), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assign = self._assign(self.vectors)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assign, self.vectors)
+            counts = np.bincount(assign, minlength=n_lists)
+            # Reseed empty lists from random examples
+            empty = np.flatnonzero(counts == 0)
+            sums[empty] = self.vectors[rng.choice(len(self), len(empty))]
+            self.centroids = _normalize(sums)
+        assign = self._assign(self.vectors)
+        self.lists = [np.flatnonzero(assign == c) for c in range(n_lists)]
+        self.n_probe = n_probe
+
+    def search(self, queries: np.ndarray, k: int = DEFAULT_K) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(sims, rows)`` of the ``k`` nearest examples, shape ``(m, k)``.
+
+        Missing neighbours (fewer than ``k`` candidates) have row ``-1`` and
+        similarity ``-inf``.
+        """
+        Q = _normalize(queries)
+        sims = np.full((len(Q), k), -np.inf, dtype=np.float32)
+        rows = np.full((len(Q), k), -1, dtype=np.int64)
+        if not len(self) or not len(Q):
+            return sims, rows
+        if self.centroids is None or self.lists is None:
+            step = max(1, _BLOCK_FLOATS // len(self))
+            for s in range(0, len(Q), step):
+                idx, vals = _top_k(Q[s : s + step] @ self.vectors.T, k)
+                rows[s : s + step, : idx.shape[1]] = idx
+                sims[s : s + step, : idx.shape[1]] = vals
+            return sims, rows
+        # Scan list by list: one matmul per list against all queries probing it
+        probe = min(self.n_probe, len(self.centroids))
+        probed, _ = _top_k(Q @ self.centroids.T, probe)
+        flat = probed.ravel()
+        order = np.argsort(flat, kind="stable")
+        bounds = np.searchsorted(flat[order], np.arange(len(self.lists) + 1))
+        for c, members in enumerate(self.lists):
+            queries_c = order[bounds[c] : bounds[c + 1]] // probe
+            if not members.size or not queries_c.size:
+                continue
+            step = max(1, _BLOCK_FLOATS // len(members))
+            for s in range(0, len(queries_c), step):
+                qs = queries_c[s : s + step]
+                cand_rows = np.hstack([rows[qs], np.broadcast_to(members, (len(qs), len(members)))])
+                cand_sims = np.hstack([sims[qs], Q[qs] @ self.vectors[members].T])
+                idx, vals = _top_k(cand_sims, k)
+                rows[qs] = np.take_along_axis(cand_rows, idx, axis=1)
+                sims[qs] = vals
+        return sims, rows
+
+    def vote(self, sims: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Turn neighbours into per-label probabilities (columns follow ``labels``).
+
+        Votes are weighted by similarity (clipped at 0), falling back to plain
+        counts when every neighbour is dissimilar and to uniform without any.
+        """
+        valid = rows >= 0
+        weights = np.where(valid, np.clip(sims, 0.0, None), 0.0)
+        weights = np.where(weights.sum(axis=1, keepdims=True) > 0, weights, valid.astype(float))
+        probs = np.zeros((len(rows), len(self.labels)), dtype=np.float64)
+        r, c = np.nonzero(valid)
+        np.add.at(probs, (r, self.codes[rows[r, c]]), weights[r, c])
+        totals = probs.sum(axis=1, keepdims=True)
+        uniform = 1.0 / max(1, len(self.labels))
+        return np.divide(probs, totals, out=np.full_like(probs, uniform), where=totals > 0)
+
+
+class KNNTagger:
+    """k-NN vote tagger; ``predict_proba``-compatible with the other taggers.
+
+    ``encode`` maps sentences to embeddings (e.g. :meth:`ktflow.tag.hf.HFTagger.embed`,
+    optionally wrapped by :meth:`ktflow.tag.embed_store.EmbeddingStore.embed`).
+    """
+
+    def __init__(self, index: KNNIndex, encode: Encoder, k: int = DEFAULT_K) -> None:
+        self.index = index
+        self.encode = encode
+        self.k = k
+
+    @property
+    def labels(self) -> list[str]:
+        return self.index.labels
+
+    def add(self, sentences: list[str], labels: Sequence[str]) -> None:
+        """Add labeled examples; they are used from the next call on."""
+        if sentences:
+            self.index.add(self.encode(sentences), labels)
+
+    def predict_proba(self, sentences: list[str]) -> np.ndarray:
+        """Return vote probabilities; columns follow ``self.labels``."""
+        if not sentences:
+            return np.zeros((0, len(self.labels)))
+        return self.index.vote(*self.index.search(self.encode(sentences), self.k))
+
+    def predict(self, sentences: list[str]) -> list[str]:
+        return [self.labels[i] for i in self.predict_proba(sentences).argmax(axis=1)]
+
+
+def build_knn_index(
+    train_jsonl: str,
+    encode: Encoder,
+    label_col: str = "layer",
+    text_col: str = "text",
+    batch_size: int = 1024,
+) -> KNNIndex:
+    """Embed a labeled JSONL (gold or answer key) into a :class:`KNNIndex`."""
+    texts: list[str] = []
+    labels: list[str] = []
+    with open(train_jsonl, encoding="utf-8") as f:
+        for raw_line in f:
+            line = raw_line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if row.get(label_col) and row[label_col] != "UNK":
+                texts.append(row[text_col])
+                labels.append(row[label_col])
+    index: KNNIndex | None = None
+    for start in range(0, len(texts), batch_size):
+        X = encode(texts[start : start + batch_size])
+        if index is None:
+            index = KNNIndex.empty(X.shape[1])
+        index.add(X, labels[start : start + batch_size])
+    if index is None:
+        raise ValueError(f"No labeled rows in {train_jsonl}")
+    return index
@@ -1,21 +1,28 @@
-# ruff: noqa: E402
+# ruff: noqa: E402, PLR0913
 from __future__ import annotations
 
 """Machine-learning tagger based on TF-IDF + Logistic Regression."""
 
-from collections.abc import Iterable
+import json
+import time
+from collections.abc import Iterable, Iterator, Sequence
 from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.feature_selection import chi2
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score
 from sklearn.preprocessing import LabelEncoder
 
 
 @dataclass
 class ModelBundle:
-    vectorizer: TfidfVectorizer
-    classifier: LogisticRegression
+    vectorizer: TfidfVectorizer | HashingVectorizer
+    classifier: LogisticRegression | SGDClassifier
     label_encoder: LabelEncoder
 
 
@@ -42,8 +49,93 @@ def featurize(
     return vectorizer, X
 
 
+def _chi2_scores(X: Any, y: np.ndarray) -> np.ndarray:
+    """Chi-squared score per feature against labels ``y`` or a class-weight matrix.
+
+    A 2-D ``y`` of shape ``(n_rows, n_classes)`` holds each row's weight per
+    class (e.g. soft labels); for one-hot rows this equals ``chi2(X, labels)``.
+    """
+    if y.ndim == 1:
+        return chi2(X, y)[0]
+    observed = np.asarray((X.T @ y).T)
+    expected = np.outer(y.sum(axis=0) / y.sum(), np.asarray(X.T @ y.sum(axis=1)).ravel())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ((observed - expected) ** 2 / expected).sum(axis=0)
+
+
+def fit_tfidf(
+    texts: list[str],
+    y: np.ndarray,
+    min_df: int | float = 1,
+    max_features: int | None = None,
+    chi2_k: int | None = None,
+    dtype: type = np.float64,
+) -> tuple[TfidfVectorizer, Any]:
+    """Fit the char_wb TF-IDF vectorizer of :func:`train_tfidf_lr`; returns ``(vec, X)``.
+
+    ``y`` is only used for ``chi2_k``: one label per text, or a
+    ``(len(texts), n_classes)`` matrix of class weights per text.
+    """
+    # Use hybrid char word TF-IDF by stacking two vectorizers
+    # Simpler: use a single char_wb vectorizer; empirically robust for short sents
+    params: dict[str, Any] = dict(
+        lowercase=True, analyzer="char_wb", ngram_range=(3, 5), dtype=dtype
+    )
+    vectorizer = TfidfVectorizer(min_df=min_df, max_features=max_features, **params)
+    X = vectorizer.fit_transform(texts)
+    if chi2_k is not None and chi2_k < X.shape[1]:
+        scores = np.nan_to_num(_chi2_scores(X, y))
+        keep = np.sort(np.argsort(scores, kind="stable")[::-1][:chi2_k])
+        vectorizer = TfidfVectorizer(vocabulary=vectorizer.get_feature_names_out()[keep], **params)
+        X = vectorizer.fit_transform(texts)
+    return vectorizer, X
+
+
+def fit_lr(
+    X: Any,
+    y: np.ndarray,
+    penalty: str = "l2",
+    C: float = 1.0,
+    l1_ratio: float = 0.5,
+    sample_weight: np.ndarray | None = None,
+) -> LogisticRegression:
+    """Fit the LogisticRegression of :func:`train_tfidf_lr` on features ``X``.
+
+    Weights follow the dtype of ``X``; L1/elastic-net weights are stored sparse.
+    """
+    if penalty == "l2":
+        clf = LogisticRegression(
+            max_iter=1000, random_state=42, n_jobs=None, multi_class="auto", C=C
+        )
+    else:
+        clf = LogisticRegression(
+            penalty=penalty,
+            solver="saga",
+            C=C,
+            l1_ratio=l1_ratio if penalty == "elasticnet" else None,
+            max_iter=1000,
+            random_state=42,
+        )
+    clf.fit(X, y, sample_weight=sample_weight)
+    if X.dtype == np.float32:
+        clf.coef_ = clf.coef_.astype(np.float32)
+        clf.intercept_ = clf.intercept_.astype(np.float32)
+    if penalty != "l2":
+        clf.sparsify()
+    return clf
+
+
 def train_tfidf_lr(
-    train_jsonl: str, label_col: str = "layer", text_col: str = "text"
+    train_jsonl: str,
+    label_col: str = "layer",
+    text_col: str = "text",
+    min_df: int | float = 1,
+    max_features: int | None = None,
+    chi2_k: int | None = None,
+    dtype: type = np.float64,
+    penalty: str = "l2",
+    C: float = 1.0,
+    l1_ratio: float = 0.5,
 ) -> ModelBundle:
     """Train a TF-IDF + LogisticRegression classifier on a JSONL dataset.
 
@@ -55,30 +147,133 @@ def train_tfidf_lr(
         Column name for labels (default: ``layer``).
     text_col: str
         Column name for sentence text (default: ``text``).
+    min_df, max_features:
+        Vocabulary pruning, passed to ``TfidfVectorizer``.
+    chi2_k:
+        Keep only the ``chi2_k`` n-grams with the highest chi-squared score
+        against the labels. The vectorizer is refit on that vocabulary, so
+        the bundle has no separate selector step.
+    dtype:
+        Feature dtype; ``np.float32`` also stores the coefficients as float32.
+    penalty, C, l1_ratio:
+        ``"l1"`` and ``"elasticnet"`` train with the ``saga`` solver and store
+        the (mostly zero) coefficients as a sparse matrix.
     """
-    import json
-
     texts: list[str] = []
     labels: list[str] = []
+    for text, label in _iter_labeled(train_jsonl, text_col, label_col):
+        texts.append(text)
+        labels.append(label)
+
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(labels)
+
+    vectorizer, X = fit_tfidf(texts, y, min_df, max_features, chi2_k, dtype)
+    clf = fit_lr(X, y, penalty, C, l1_ratio)
+    return ModelBundle(vectorizer=vectorizer, classifier=clf, label_encoder=label_encoder)
+
+
+def distill_tfidf_lr(
+    texts: Sequence[str],
+    soft_labels: np.ndarray,
+    classes: Sequence[str],
+    gold_texts: Sequence[str] = (),
+    gold_labels: Sequence[str] = (),
+    gold_weight: float = 1.0,
+    min_prob: float = 0.01,
+    min_df: int | float = 1,
+    max_features: int | None = None,
+    chi2_k: int | None = None,
+    dtype: type = np.float64,
+    penalty: str = "l2",
+    C: float = 1.0,
+    l1_ratio: float = 0.5,
+) -> ModelBundle:
+    """Train the TF-IDF + LogisticRegression tagger on a teacher's soft labels.
+
+    ``soft_labels`` is ``(len(texts), len(classes))`` teacher probabilities.
+    Each sentence becomes one row per class with probability ``>= min_prob``,
+    weighted by that probability, so the weighted log-loss is the
+    cross-entropy against the teacher's distribution. Optional gold rows are
+    added as hard labels with weight ``gold_weight``. The footprint options
+    are those of :func:`train_tfidf_lr`; ``chi2_k`` scores n-grams against
+    the same weights.
+    """
+    soft = np.asarray(soft_labels, dtype=np.float64)
+    if soft.shape != (len(texts), len(classes)):
+        raise ValueError(f"soft_labels shape {soft.shape} != ({len(texts)}, {len(classes)})")
+    rows, cols = np.nonzero(soft >= min_prob)
+    n_gold = len(gold_texts)
+    labels = np.concatenate([np.asarray(classes, dtype=object)[cols], list(gold_labels)])
+    # Fit on the labels actually present so classifier columns match the encoder
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(labels.astype(str))
+    weights = np.concatenate([soft[rows, cols], np.full(n_gold, gold_weight)])
+    sources = np.concatenate([rows, len(texts) + np.arange(n_gold)])
+
+    # Per-sentence class weights, so the vocabulary is fit once per sentence
+    class_weights = np.zeros((len(texts) + n_gold, len(label_encoder.classes_)))
+    np.add.at(class_weights, (sources, y), weights)
+    vectorizer, X_all = fit_tfidf(
+        [*texts, *gold_texts], class_weights, min_df, max_features, chi2_k, dtype
+    )
+    clf = fit_lr(X_all[sources], y, penalty, C, l1_ratio, sample_weight=weights)
+    return ModelBundle(vectorizer=vectorizer, classifier=clf, label_encoder=label_encoder)
+
+
+def _iter_labeled(train_jsonl: str, text_col: str, label_col: str) -> Iterator[tuple[str, str]]:
+    """Stream ``(text, label)`` pairs from a JSONL file, skipping blank lines."""
     with open(train_jsonl, encoding="utf-8") as f:
         for raw_line in f:
             line = raw_line.strip()
-            if not line:
-                continue
-            row = json.loads(line)
-            texts.append(row[text_col])
-            labels.append(row[label_col])
+            if line:
+                row = json.loads(line)
+                yield row[text_col], row[label_col]
 
-    label_encoder = LabelEncoder()
-    y = label_encoder.fit_transform(labels)
 
-    # Use hybrid char word TF-IDF by stacking two vectorizers
-    # Simpler: use a single char_wb vectorizer; empirically robust for short sents
-    vectorizer = TfidfVectorizer(lowercase=True, analyzer="char_wb", ngram_range=(3, 5), min_df=1)
-    X = vectorizer.fit_transform(texts)
+def train_hashing_sgd(
+    train_jsonl: str,
+    label_col: str = "layer",
+    text_col: str = "text",
+    chunk_size: int = 10_000,
+    epochs: int = 3,
+    n_features: int = 1 << 20,
+    alpha: float = 1e-5,
+    classes: Sequence[str] | None = None,
+) -> ModelBundle:
+    """Out-of-core variant of :func:`train_tfidf_lr` for large (silver) label sets.
 
-    clf = LogisticRegression(max_iter=1000, random_state=42, n_jobs=None, multi_class="auto")
-    clf.fit(X, y)
+    Features come from a stateless ``HashingVectorizer`` with the same char_wb
+    3-5 grams (L2-normalized term frequencies, no IDF). The classifier is a
+    logistic-loss ``SGDClassifier`` trained with ``partial_fit`` on chunks of
+    ``chunk_size`` rows, for ``epochs`` passes over the file. Only one chunk
+    is in memory at a time. Labels are collected in a first pass unless
+    ``classes`` is given. The returned :class:`ModelBundle` works with
+    :func:`predict`, :func:`predict_proba` and the hybrid tagger unchanged.
+    """
+    if classes is None:
+        classes = sorted({label for _, label in _iter_labeled(train_jsonl, text_col, label_col)})
+    label_encoder = LabelEncoder().fit(list(classes))
+    all_codes = np.arange(len(label_encoder.classes_))
+
+    vectorizer = HashingVectorizer(
+        lowercase=True,
+        analyzer="char_wb",
+        ngram_range=(3, 5),
+        n_features=n_features,
+        alternate_sign=False,
+        norm="l2",
+    )
+    clf = SGDClassifier(loss="log_loss", alpha=alpha, random_state=42)
+    rng = np.random.default_rng(42)
+    for _ in range(epochs):
+        rows = _iter_labeled(train_jsonl, text_col, label_col)
+        while chunk := list(islice(rows, chunk_size)):
+            # Shuffle within the chunk; SGD is sensitive to label-sorted input
+            order = rng.permutation(len(chunk))
+            X = vectorizer.transform([chunk[i][0] for i in order])
+            y = label_encoder.transform([chunk[i][1] for i in order])
+            clf.partial_fit(X, y, classes=all_codes)
 
     return ModelBundle(vectorizer=vectorizer, classifier=clf, label_encoder=label_encoder)
 
@@ -95,3 +290,31 @@ def predict_proba(model: ModelBundle, sentences: list[str]) -> np.ndarray:
     """Return class probabilities (n_samples x n_classes)."""
     X = model.vectorizer.transform(sentences)
     return model.classifier.predict_proba(X)
+
+
+def evaluate_model(path: str | Path, texts: list[str], labels: list[str]) -> dict[str, float]:
+    """Accuracy and footprint of a saved tagger (joblib bundle or compact directory).
+
+    Returns accuracy, macro F1, size on disk (MB), load time (ms), prediction
+    latency per 1k sentences (ms) and the number of non-zero weights.
+    """
+    from ktflow.tag.compact import load_model
+
+    p = Path(path)
+    files = list(p.iterdir()) if p.is_dir() else [p]
+    t0 = time.perf_counter()
+    model = load_model(p)
+    load_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    pred = model.predict(texts) if hasattr(model, "predict") else predict(model, texts)
+    pred_s = time.perf_counter() - t0
+
+    coef = model.coef if hasattr(model, "coef") else model.classifier.coef_
+    return {
+        "accuracy": float(accuracy_score(labels, pred)),
+        "macro_f1": float(f1_score(labels, pred, labels=sorted(set(labels)), average="macro")),
+        "size_mb": sum(f.stat().st_size for f in files) / 1e6,
+        "load_ms": 1e3 * load_s,
+        "ms_per_1k": 1e6 * pred_s / max(1, len(texts)),
+        "nonzero_weights": int(coef.nnz if hasattr(coef, "nnz") else np.count_nonzero(coef)),
+    }
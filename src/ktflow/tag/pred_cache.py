@@ -0,0 +1,160 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Persistent prediction cache for the model-backed taggers.
+
+Probabilities are stored in SQLite and keyed by ``(tagger hash, sentence
+key)``. The tagger hash covers the model files plus any settings that change
+its outputs (e.g. the HF backend). The sentence key is the SHA-256 of the exact
+string the model scores. It is not normalized, because whitespace or Unicode
+variants can get different n-grams and so different scores. Probabilities are
+stored as float64, so a cached row gives exactly the label a fresh call would.
+
+:class:`CachedTagger` wraps any scorer with ``labels``/``predict_proba``, or a
+TF-IDF bundle. Each batch is looked up in one query, and only distinct misses
+are scored, in one call. The new rows are then written back in one
+transaction. Boilerplate such as headers, footers and disclaimers is scored
+once per model, not once per occurrence.
+"""
+
+import hashlib
+import sqlite3
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from ktflow.io.hashing import sha256_file, sha256_json
+from ktflow.tag.embed_store import model_dir_hash
+
+# Stay under SQLite's bound-parameter limit in IN (...) lookups
+_LOOKUP_CHUNK = 500
+# Part of every tagger hash; bump when sentence keys change meaning
+_KEY_FORMAT = 2
+
+
+def text_key(text: str) -> bytes:
+    """SHA-256 of ``text`` exactly as the model sees it."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def tagger_hash(model_path: str | Path, **settings: Any) -> str:
+    """Identity of a model file or directory plus output-affecting ``settings``."""
+    p = Path(model_path)
+    digest = model_dir_hash(p) if p.is_dir() else sha256_file(p)
+    return sha256_json({"model": digest, "keys": _KEY_FORMAT, **settings})
+
+
+@dataclass
+class CacheStats:
+    lookups: int = 0
+    hits: int = 0
+    scored: int = 0
+    seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+class PredictionCache:
+    """SQLite table of probability rows keyed by tagger hash and sentence key."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30)
+        # WAL lets concurrent runs read while one writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS preds ("
+            "tagger TEXT NOT NULL, key BLOB NOT NULL, probs BLOB NOT NULL, "
+            "PRIMARY KEY (tagger, key)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def get_many(self, tagger: str, keys: list[bytes]) -> dict[bytes, np.ndarray]:
+        """Cached probability rows for the ``keys`` that are present."""
+        found: dict[bytes, np.ndarray] = {}
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT key, probs FROM preds WHERE tagger = ? AND key IN ({marks})",
+                [tagger, *chunk],
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float64)
+        return found
+
+    def put_many(self, tagger: str, keys: Iterable[bytes], probs: np.ndarray) -> None:
+        """Store one probability row per key, in a single transaction."""
+        rows = np.ascontiguousarray(probs, dtype=np.float64)
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO preds (tagger, key, probs) VALUES (?, ?, ?)",
+                ((tagger, key, row.tobytes()) for key, row in zip(keys, rows, strict=True)),
+            )
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM preds").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class CachedTagger:
+    """Scorer that answers from a :class:`PredictionCache` and scores only misses.
+
+    Exposes ``labels``, ``predict_proba`` and ``predict``, so it can stand in
+    for the wrapped model in the hybrid tagger, the cascade and the HF path.
+    """
+
+    def __init__(self, model: Any, cache: PredictionCache, tagger: str, name: str = "") -> None:
+        self.model = model
+        self.cache = cache
+        self.tagger = tagger
+        self.name = name or type(model).__name__
+        self.stats = CacheStats()
+        encoder = getattr(model, "label_encoder", None)
+        self.labels: list[str] = [
+            str(label) for label in (encoder.classes_ if encoder is not None else model.labels)
+        ]
+
+    def predict_proba(self, sentences: list[str]) -> np.ndarray:
+        from ktflow.tag.hybrid import _score
+
+        t0 = time.perf_counter()
+        keys = [text_key(s) for s in sentences]
+        cached = self.cache.get_many(self.tagger, list(dict.fromkeys(keys)))
+        # Score each distinct missing sentence once
+        missing: dict[bytes, str] = {}
+        for key, s in zip(keys, sentences, strict=True):
+            if key not in cached:
+                missing.setdefault(key, s)
+        if missing:
+            probs, _ = _score(self.model, list(missing.values()))
+            self.cache.put_many(self.tagger, missing, probs)
+            cached.update(zip(missing, np.asarray(probs, dtype=np.float64), strict=True))
+
+        self.stats.lookups += len(sentences)
+        self.stats.hits += sum(1 for key in keys if key not in missing)
+        self.stats.scored += len(missing)
+        self.stats.seconds += time.perf_counter() - t0
+        if not sentences:
+            return np.empty((0, len(self.labels)))
+        return np.vstack([cached[key] for key in keys])
+
+    def predict(self, sentences: list[str]) -> list[str]:
+        return [self.labels[i] for i in self.predict_proba(sentences).argmax(axis=1)]
+
+    def report(self) -> str:
+        st = self.stats
+        return (
+            f"prediction cache [{self.name}]: {st.hits}/{st.lookups} hits "
+            f"({100 * st.hit_rate:.1f}%), {st.scored} sentences scored, {st.seconds:.2f}s"
+        )
@@ -0,0 +1,328 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Declarative rulepacks for the rule-based tagger.
+
+A rulepack is a JSON-serializable dict describing, per layer, substring
+keywords, regexes and named heuristics, plus the layer priority::
+
+    {
+      "name": "default",
+      "version": 1,
+      "priority": ["M", "G", "St", "R", "L", "S"],
+      "layers": {
+        "R": {
+          "keywords": ["because", ...],
+          "regexes": [{"pattern": "\\bif\\b.*\\bthen\\b", "ignorecase": true,
+                       "requires": ["then"]}]
+        },
+        "S": {"keywords": [...], "heuristics": ["bare_term_list"]},
+        ...
+      }
+    }
+
+Keywords are matched as substrings of the stripped, lowercased sentence;
+regexes run on the original sentence, and ``requires`` lists substrings of
+the lowercased sentence that any match implies (a cheap exact prefilter).
+:func:`compile_rulepack` turns a spec into a :class:`CompiledRulepack` (one
+prefix-factored keyword regex for all layers) identified by the SHA-256 of
+the canonical spec; :func:`save_rulepack` persists it with joblib so worker
+processes can load it instead of rebuilding it.
+"""
+
+import json
+import re
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from ktflow.io.hashing import sha256_json
+from ktflow.io.model import load_joblib, save_joblib
+from ktflow.tag.rules import LABEL_CODES, LABELS, N_LAYERS, KTLabel, _is_bare_term_list
+
+# Bump when the compiled layout changes; stale artifacts are then rejected.
+RULEPACK_FORMAT = 1
+
+HEURISTICS: dict[str, Callable[[str], bool]] = {
+    "bare_term_list": _is_bare_term_list,
+}
+
+DEFAULT_RULEPACK: dict[str, Any] = {
+    "name": "default",
+    "version": 1,
+    "priority": ["M", "G", "St", "R", "L", "S"],
+    "layers": {
+        # M: Meta (assumptions/reframing)
+        "M": {
+            "keywords": [
+                "assume",
+                "assumption",
+                "assumptions",
+                "what if",
+                "reframe",
+                "hidden",
+                "bias",
+                "perspective",
+                "premise",
+                "underlying",
+                "frame",
+                "meta",
+            ],
+        },
+        # G: Generative (principles/transfer)
+        "G": {
+            "keywords": [
+                "in general",
+                "the principle",
+                "principle of",
+                "the rule",
+                "applies to",
+                "can be applied",
+                "generalize",
+                "generalise",
+                "transfer to",
+                "in other domains",
+            ],
+        },
+        # St: Structural (systems/feedbacks)
+        "St": {
+            "keywords": [
+                "overall",
+                "system works",
+                "integrat",
+                "feedback",
+                "loop",
+                "component",
+                "components",
+                "interact",
+                "structure",
+                "subsystem",
+                "dynamics",
+                "flows",
+                "flow of",
+                "architecture",
+            ],
+        },
+        # R: Relational (causal/associative links)
+        "R": {
+            "keywords": [
+                "because",
+                "therefore",
+                "thus",
+                "hence",
+                "affects",
+                "causes",
+                "leads to",
+                "results in",
+                "due to",
+                "impact",
+                "impacts",
+                "affect",
+                "drives",
+            ],
+            # "then" has no special case folds, so it is an exact prefilter
+            "regexes": [{"pattern": r"\bif\b.*\bthen\b", "ignorecase": True, "requires": ["then"]}],
+        },
+        # L: Literal (definitions)
+        "L": {
+            "keywords": [
+                "means",
+                "is defined as",
+                "defined as",
+                "refers to",
+                "is a ",
+                "is an ",
+                "is the ",
+            ],
+        },
+        # S: Symbol (form/terms)
+        "S": {
+            "keywords": ["what is", "list", "term", "terms"],
+            "heuristics": ["bare_term_list"],
+        },
+    },
+}
+
+
+def _trie_regex(node: dict[str, dict], end: str = "") -> str:
+    """Render a character trie as a regex; longer continuations are preferred."""
+    alts = [re.escape(ch) + _trie_regex(sub) for ch, sub in sorted(node.items()) if ch != end]
+    if end not in node:
+        return alts[0] if len(alts) == 1 else f"(?:{'|'.join(alts)})"
+    return f"(?:{'|'.join(alts)})?" if alts else ""
+
+
+def _prefix_layers(kw: str, owner: dict[str, KTLabel]) -> frozenset[KTLabel]:
+    """Layers of every keyword that is a prefix of ``kw`` (``kw`` included)."""
+    return frozenset(owner[p] for p in owner if kw.startswith(p))
+
+
+@dataclass
+class CompiledRulepack:
+    """A rulepack compiled into a single-pass matcher.
+
+    ``keyword_regex`` matches the longest keyword starting at a position.
+    Every other keyword matching there is a prefix of it, so
+    ``keyword_layer`` maps each keyword to the highest-priority layer among
+    its prefixes and ``keyword_prefix_layers`` to all of them.
+    """
+
+    name: str
+    version: int
+    sha256: str
+    spec: dict[str, Any]
+    priority: tuple[KTLabel, ...]
+    keyword_regex: re.Pattern[str]
+    keyword_layer: dict[str, KTLabel]
+    keyword_prefix_layers: dict[str, frozenset[KTLabel]]
+    regexes: dict[KTLabel, list[tuple[re.Pattern[str], tuple[str, ...]]]] = field(
+        default_factory=dict
+    )
+    heuristics: dict[KTLabel, list[Callable[[str], bool]]] = field(default_factory=dict)
+    format: int = RULEPACK_FORMAT
+
+    def _keyword_hits(self, s_lower: str) -> set[KTLabel]:
+        top = self.priority[0] if self.priority else None
+        hits: set[KTLabel] = set()
+        search = self.keyword_regex.search
+        layer = self.keyword_layer
+        m = search(s_lower)
+        while m is not None:
+            label = layer[m.group()]
+            if label == top:
+                # Highest priority; nothing else can change the outcome
+                return {label}
+            hits.add(label)
+            # Resume one character in, not at m.end(): keywords may overlap
+            m = search(s_lower, m.start() + 1)
+        return hits
+
+    def _fires(self, label: KTLabel, s: str, s_lower: str) -> bool:
+        """Whether a layer's regexes or heuristics fire (keywords aside)."""
+        for rx, requires in self.regexes.get(label, ()):
+            if all(r in s_lower for r in requires) and rx.search(s):
+                return True
+        return any(fn(s) for fn in self.heuristics.get(label, ()))
+
+    def tag(self, s: str) -> KTLabel:
+        """Return the highest-priority layer whose rules fire, else ``"UNK"``."""
+        if not s or not s.strip():
+            return "UNK"
+        s_lower = s.strip().lower()
+        hits = self._keyword_hits(s_lower)
+        for label in self.priority:
+            if label in hits or self._fires(label, s, s_lower):
+                return label
+        return "UNK"
+
+    def hit_row(self, s: str) -> list[bool]:
+        """Return which layers' rules fire for ``s``, in ``LABELS`` order."""
+        if not s or not s.strip():
+            return [False] * N_LAYERS
+        s_lower = s.strip().lower()
+        hits: set[KTLabel] = set()
+        search = self.keyword_regex.search
+        m = search(s_lower)
+        while m is not None:
+            hits.update(self.keyword_prefix_layers[m.group()])
+            m = search(s_lower, m.start() + 1)
+        return [
+            label in hits or (label in self.priority and self._fires(label, s, s_lower))
+            for label in LABELS[:N_LAYERS]
+        ]
+
+    def tag_codes(
+        self, sentences: Iterable[str], return_hits: bool = False
+    ) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+        """Batch version of :meth:`tag` returning ``int8`` codes (see ``tag_sentences_rules``)."""
+        texts = sentences if isinstance(sentences, list | tuple) else list(sentences)
+        codes = np.fromiter(
+            (LABEL_CODES[self.tag(s)] for s in texts), dtype=np.int8, count=len(texts)
+        )
+        if not return_hits:
+            return codes
+        hits = np.array([self.hit_row(s) for s in texts], dtype=bool).reshape(len(texts), N_LAYERS)
+        return codes, hits
+
+
+def compile_rulepack(spec: dict[str, Any]) -> CompiledRulepack:
+    """Validate ``spec`` and compile it into a :class:`CompiledRulepack`."""
+    layers: dict[str, dict[str, Any]] = spec.get("layers", {})
+    priority = tuple(spec.get("priority", list(layers)))
+    valid = set(LABELS[:N_LAYERS])
+    unknown = (set(layers) | set(priority)) - valid
+    if unknown:
+        raise ValueError(f"Unknown layers in rulepack: {sorted(unknown)}")
+    if set(layers) - set(priority):
+        raise ValueError(f"Layers missing from priority: {sorted(set(layers) - set(priority))}")
+
+    rank = {label: i for i, label in enumerate(priority)}
+    owner: dict[str, KTLabel] = {}
+    regexes: dict[KTLabel, list[tuple[re.Pattern[str], tuple[str, ...]]]] = {}
+    heuristics: dict[KTLabel, list[Callable[[str], bool]]] = {}
+    for label in priority:
+        layer = layers.get(label, {})
+        for raw in layer.get("keywords", []):
+            kw = raw.lower()
+            if kw and (kw not in owner or rank[label] < rank[owner[kw]]):
+                owner[kw] = label
+        for rx in layer.get("regexes", []):
+            flags = re.IGNORECASE if rx.get("ignorecase") else 0
+            requires = tuple(r.lower() for r in rx.get("requires", []))
+            regexes.setdefault(label, []).append((re.compile(rx["pattern"], flags), requires))
+        for name in layer.get("heuristics", []):
+            if name not in HEURISTICS:
+                raise ValueError(f"Unknown heuristic {name!r}; known: {sorted(HEURISTICS)}")
+            heuristics.setdefault(label, []).append(HEURISTICS[name])
+
+    trie: dict[str, dict] = {}
+    for kw in owner:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    # An empty alternation would match everywhere; use a never-matching regex
+    keyword_regex = re.compile(_trie_regex(trie) if trie else r"(?!)")
+    prefix_layers = {kw: _prefix_layers(kw, owner) for kw in owner}
+    return CompiledRulepack(
+        name=str(spec.get("name", "unnamed")),
+        version=int(spec.get("version", 1)),
+        sha256=sha256_json(spec),
+        spec=spec,
+        priority=priority,
+        keyword_regex=keyword_regex,
+        keyword_layer={kw: min(ls, key=rank.__getitem__) for kw, ls in prefix_layers.items()},
+        keyword_prefix_layers=prefix_layers,
+        regexes=regexes,
+        heuristics=heuristics,
+    )
+
+
+def save_rulepack(pack: CompiledRulepack, path: str | Path) -> None:
+    """Persist a compiled rulepack (joblib)."""
+    save_joblib(pack, path)
+
+
+def load_rulepack(path: str | Path) -> CompiledRulepack:
+    """Load a rulepack: ``.json`` specs are compiled, anything else is a saved artifact.
+
+    Saved artifacts are checked against their spec hash and the current
+    compiled format; a mismatch raises ``ValueError``.
+    """
+    p = Path(path)
+    if p.suffix == ".json":
+        with p.open("r", encoding="utf-8") as f:
+            return compile_rulepack(json.load(f))
+    pack = load_joblib(p)
+    if not isinstance(pack, CompiledRulepack):
+        raise ValueError(f"Not a compiled rulepack: {p}")
+    if pack.format != RULEPACK_FORMAT:
+        raise ValueError(
+            f"Rulepack {p} has format {pack.format}, expected {RULEPACK_FORMAT}; recompile it"
+        )
+    if pack.sha256 != sha256_json(pack.spec):
+        raise ValueError(f"Rulepack {p} does not match its content hash")
+    return pack
@@ -5,20 +5,42 @@ from __future__ import annotations
 
 Returns a single label from {"S", "L", "R", "St", "G", "M", "UNK"} for an
 input sentence. Priority (highest wins): M > G > St > R > L > S > UNK.
+
+The rules themselves (keywords, regexes, heuristics, priority) are a
+declarative rulepack, compiled once into a single-pass matcher; see
+``ktflow.tag.rulepack``. Pass ``rulepack=`` to use a different rule set.
+
+:func:`tag_sentences_rules` tags a batch and returns compact ``int8`` label
+codes (see :data:`LABELS`) for array-based flow counting and evaluation.
 """
 
+import functools
 import re
-from typing import Literal
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Literal, overload
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ktflow.tag.rulepack import CompiledRulepack
 
 KTLabel = Literal["S", "L", "R", "St", "G", "M", "UNK"]
 
+# Fixed label-code table: code i <-> LABELS[i]. Layers come first, so the
+# per-layer hit matrix columns line up with codes 0..5.
+LABELS: tuple[KTLabel, ...] = ("S", "L", "R", "St", "G", "M", "UNK")
+LABEL_CODES: dict[KTLabel, int] = {label: i for i, label in enumerate(LABELS)}
+UNK_CODE = LABEL_CODES["UNK"]
+N_LAYERS = UNK_CODE
+
+_VERB_REGEX = re.compile(r"\b(is|are|was|were|be|am|being|been|do|does|did|has|have|had)\b")
 
-def _has(patterns: list[str], s_lower: str) -> bool:
-    return any(p in s_lower for p in patterns)
 
+@functools.cache
+def _default_rulepack() -> CompiledRulepack:
+    from ktflow.tag.rulepack import DEFAULT_RULEPACK, compile_rulepack
 
-def _has_regex(regexes: list[str], text: str) -> bool:
-    return any(re.search(rx, text, flags=re.IGNORECASE) for rx in regexes)
+    return compile_rulepack(DEFAULT_RULEPACK)
 
 
 def _is_bare_term_list(s: str) -> bool:
@@ -34,137 +56,72 @@ def _is_bare_term_list(s: str) -> bool:
     MAX_LIST_SENTENCE_LEN = 160
     if s.count(",") >= MIN_LIST_ITEMS and len(s) < MAX_LIST_SENTENCE_LEN:
         # If there are many commas and no obvious verbs, treat as list
-        if not re.search(
-            r"\b(is|are|was|were|be|am|being|been|do|does|did|has|have|had)\b", s_lower
-        ):
+        if not _VERB_REGEX.search(s_lower):
             return True
     return False
 
 
-def tag_sentence_rules(s: str) -> KTLabel:  # noqa: PLR0911
+def tag_sentence_rules(s: str, rulepack: CompiledRulepack | None = None) -> KTLabel:
     """Tag a sentence into a KT layer using simple rules.
 
     Parameters
     ----------
     s: str
         Sentence text.
+    rulepack: CompiledRulepack | None
+        Rules to apply; defaults to the built-in rulepack.
 
     Returns
     -------
     KTLabel
         One of: "S", "L", "R", "St", "G", "M", "UNK".
     """
-    if not s or not s.strip():
-        return "UNK"
-
-    s_lower = s.strip().lower()
-
-    # M: Meta (assumptions/reframing)
-    if _has(
-        [
-            "assume",
-            "assumption",
-            "assumptions",
-            "what if",
-            "reframe",
-            "hidden",
-            "bias",
-            "perspective",
-            "premise",
-            "underlying",
-            "frame",
-            "meta",
-        ],
-        s_lower,
-    ):
-        return "M"
-
-    # G: Generative (principles/transfer)
-    if _has(
-        [
-            "in general",
-            "the principle",
-            "principle of",
-            "the rule",
-            "applies to",
-            "can be applied",
-            "generalize",
-            "generalise",
-            "transfer to",
-            "in other domains",
-        ],
-        s_lower,
-    ):
-        return "G"
-
-    # St: Structural (systems/feedbacks)
-    if _has(
-        [
-            "overall",
-            "system works",
-            "integrat",
-            "feedback",
-            "loop",
-            "component",
-            "components",
-            "interact",
-            "structure",
-            "subsystem",
-            "dynamics",
-            "flows",
-            "flow of",
-            "architecture",
-        ],
-        s_lower,
-    ):
-        return "St"
-
-    # R: Relational (causal/associative links)
-    if _has(
-        [
-            "because",
-            "therefore",
-            "thus",
-            "hence",
-            "affects",
-            "causes",
-            "leads to",
-            "results in",
-            "due to",
-            "impact",
-            "impacts",
-            "affect",
-            "drives",
-        ],
-        s_lower,
-    ) or _has_regex([r"\bif\b.*\bthen\b"], s):
-        return "R"
-
-    # L: Literal (definitions)
-    if _has(
-        [
-            "means",
-            "is defined as",
-            "defined as",
-            "refers to",
-            "is a ",
-            "is an ",
-            "is the ",
-        ],
-        s_lower,
-    ):
-        return "L"
-
-    # S: Symbol (form/terms)
-    if _has(
-        [
-            "what is",
-            "list",
-            "term",
-            "terms",
-        ],
-        s_lower,
-    ) or _is_bare_term_list(s):
-        return "S"
-
-    return "UNK"
+    return (rulepack or _default_rulepack()).tag(s)
+
+
+@overload
+def tag_sentences_rules(
+    sentences: Iterable[str],
+    return_hits: Literal[False] = ...,
+    rulepack: CompiledRulepack | None = ...,
+) -> np.ndarray: ...
+
+
+@overload
+def tag_sentences_rules(
+    sentences: Iterable[str],
+    return_hits: Literal[True],
+    rulepack: CompiledRulepack | None = ...,
+) -> tuple[np.ndarray, np.ndarray]: ...
+
+
+def tag_sentences_rules(
+    sentences: Iterable[str],
+    return_hits: bool = False,
+    rulepack: CompiledRulepack | None = None,
+) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+    """Tag a batch of sentences, returning ``int8`` label codes.
+
+    Parameters
+    ----------
+    sentences: Iterable[str]
+        Sentence texts.
+    return_hits: bool
+        Also return a boolean ``(n, 6)`` matrix with one column per layer
+        (``LABELS[:6]`` order) marking every layer whose rules fire, not just
+        the winning one.
+    rulepack: CompiledRulepack | None
+        Rules to apply; defaults to the built-in rulepack.
+
+    Returns
+    -------
+    np.ndarray | tuple[np.ndarray, np.ndarray]
+        Codes into :data:`LABELS` (``UNK_CODE`` when nothing fires), plus the
+        hit matrix when ``return_hits`` is true.
+    """
+    return (rulepack or _default_rulepack()).tag_codes(sentences, return_hits=return_hits)
+
+
+def decode_labels(codes: Iterable[int]) -> list[KTLabel]:
+    """Map label codes back to label strings."""
+    return [LABELS[c] for c in codes]
@@ -0,0 +1,181 @@
+# ruff: noqa: E402
+from __future__ import annotations
+
+"""Cross-validated hyperparameter search for the TF-IDF + LR tagger.
+
+A search space maps :func:`ktflow.tag.ml.train_tfidf_lr` options to candidate
+values. Vectorizer options (:data:`VECTORIZER_PARAMS`) and classifier options
+(:data:`CLASSIFIER_PARAMS`) are searched together, as a full grid or as
+``n_iter`` random draws from it.
+
+Work is split into one task per (vectorizer setting, fold). A task featurizes
+its fold once and then fits every classifier setting sampled with that
+vectorizer setting, so features are never recomputed per classifier. Tasks run
+in a process pool. The initializer hands each worker the dataset once, rather
+than with every task.
+"""
+
+import io
+import itertools
+import random
+import time
+from collections import defaultdict
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+import joblib
+import numpy as np
+from sklearn.metrics import f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import LabelEncoder
+
+from ktflow.tag.ml import ModelBundle, fit_lr, fit_tfidf
+
+VECTORIZER_PARAMS = ("min_df", "max_features", "chi2_k", "dtype")
+CLASSIFIER_PARAMS = ("penalty", "C", "l1_ratio")
+
+DEFAULT_SPACE: dict[str, list[Any]] = {
+    "min_df": [1, 2],
+    "chi2_k": [None, 20_000],
+    "C": [0.5, 1.0, 4.0],
+}
+
+Params = dict[str, Any]
+
+# Set once per worker process by _init_worker
+_WORKER_DATA: tuple[list[str], np.ndarray] | None = None
+
+
+def _init_worker(texts: list[str], y: np.ndarray) -> None:
+    """Pool initializer: keep the training set for this process."""
+    global _WORKER_DATA  # noqa: PLW0603
+    _WORKER_DATA = (texts, y)
+
+
+@dataclass
+class Trial:
+    """Cross-validated result for one parameter setting."""
+
+    params: Params
+    f1: list[float] = field(default_factory=list)
+    ms_per_1k: list[float] = field(default_factory=list)
+    size_mb: list[float] = field(default_factory=list)
+
+    @property
+    def macro_f1(self) -> float:
+        return float(np.mean(self.f1))
+
+
+def search_space(
+    space: dict[str, Sequence[Any]], n_iter: int | None = None, seed: int = 42
+) -> list[Params]:
+    """The grid over ``space``, or ``n_iter`` distinct random settings from it."""
+    unknown = set(space) - set(VECTORIZER_PARAMS) - set(CLASSIFIER_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown tuning parameters: {sorted(unknown)}")
+    names = sorted(space)
+    grid = [
+        dict(zip(names, values, strict=True))
+        for values in itertools.product(*(space[n] for n in names))
+    ]
+    if n_iter is not None and n_iter < len(grid):
+        grid = random.Random(seed).sample(grid, n_iter)
+    return grid
+
+
+def _split(params: Params) -> tuple[Params, Params]:
+    vec = {k: v for k, v in params.items() if k in VECTORIZER_PARAMS}
+    clf = {k: v for k, v in params.items() if k in CLASSIFIER_PARAMS}
+    return vec, clf
+
+
+def _run_fold(
+    vec_params: Params, clf_params: list[Params], train: np.ndarray, test: np.ndarray
+) -> list[tuple[float, float, float]]:
+    """Featurize one fold, then fit and score every classifier setting on it.
+
+    Returns ``(macro F1, ms per 1k sentences, pickled size in MB)`` per setting.
+    """
+    assert _WORKER_DATA is not None, "worker not initialized"
+    texts, y = _WORKER_DATA
+    train_texts = [texts[i] for i in train]
+    test_texts = [texts[i] for i in test]
+    vectorizer, X = fit_tfidf(train_texts, y[train], **vec_params)
+    results = []
+    for params in clf_params:
+        clf = fit_lr(X, y[train], **params)
+        t0 = time.perf_counter()
+        pred = clf.predict(vectorizer.transform(test_texts))
+        ms = 1e6 * (time.perf_counter() - t0) / max(1, len(test_texts))
+        buf = io.BytesIO()
+        joblib.dump((vectorizer, clf), buf)
+        f1 = f1_score(y[test], pred, labels=np.unique(y), average="macro", zero_division=0)
+        results.append((float(f1), ms, buf.tell() / 1e6))
+    return results
+
+
+def cross_validate(  # noqa: PLR0913
+    texts: list[str],
+    labels: list[str],
+    candidates: list[Params],
+    folds: int = 5,
+    workers: int = 1,
+    seed: int = 42,
+) -> list[Trial]:
+    """Score ``candidates`` with stratified k-fold CV; returns trials, best first.
+
+    Ties on macro F1 go to the smaller model.
+    """
+    y = LabelEncoder().fit_transform(labels)
+    splits = list(StratifiedKFold(folds, shuffle=True, random_state=seed).split(texts, y))
+    # Group classifier settings under their vectorizer setting
+    groups: dict[tuple, list[Trial]] = defaultdict(list)
+    for params in candidates:
+        vec, _ = _split(params)
+        groups[tuple(sorted(vec.items()))].append(Trial(params))
+
+    tasks = [
+        (dict(key), [_split(t.params)[1] for t in trials], train, test, trials)
+        for key, trials in groups.items()
+        for train, test in splits
+    ]
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(texts, y)) as ex:
+            futures = [ex.submit(_run_fold, *task[:4]) for task in tasks]
+            outcomes = [f.result() for f in futures]
+    else:
+        _init_worker(texts, y)
+        outcomes = [_run_fold(*task[:4]) for task in tasks]
+
+    for task, results in zip(tasks, outcomes, strict=True):
+        for trial, (f1, ms, mb) in zip(task[4], results, strict=True):
+            trial.f1.append(f1)
+            trial.ms_per_1k.append(ms)
+            trial.size_mb.append(mb)
+    trials = [t for group in groups.values() for t in group]
+    return sorted(trials, key=lambda t: (-t.macro_f1, np.mean(t.size_mb)))
+
+
+def fit_best(texts: list[str], labels: list[str], params: Params) -> ModelBundle:
+    """Refit ``params`` on all rows; same bundle as :func:`train_tfidf_lr`."""
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(labels)
+    vec, clf = _split(params)
+    vectorizer, X = fit_tfidf(texts, y, **vec)
+    return ModelBundle(
+        vectorizer=vectorizer, classifier=fit_lr(X, y, **clf), label_encoder=label_encoder
+    )
+
+
+def leaderboard(trials: list[Trial], top: int | None = None) -> str:
+    """Table of mean (± std) macro F1, latency and model size per trial."""
+    lines = [f"{'rank':>4s} {'macro F1':>15s} {'ms/1k':>8s} {'MB':>7s}  params"]
+    for rank, t in enumerate(trials[:top], 1):
+        params = " ".join(f"{k}={getattr(v, '__name__', v)}" for k, v in sorted(t.params.items()))
+        lines.append(
+            f"{rank:4d} {t.macro_f1:8.4f} ±{np.std(t.f1):.3f} {np.mean(t.ms_per_1k):8.1f} "
+            f"{np.mean(t.size_mb):7.2f}  {params}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import numpy as np
+
+from ktflow.tag.cascade import Cascade, Stage, StageStats
+
+
+class _Fixed:
+    """Scorer returning preset probabilities per sentence (uniform if unknown)."""
+
+    labels = ["L", "R"]
+
+    def __init__(self, probs: dict[str, list[float]]) -> None:
+        self.probs = probs
+        self.calls: list[list[str]] = []
+
+    def predict_proba(self, texts: list[str]) -> np.ndarray:
+        self.calls.append(list(texts))
+        return np.array([self.probs.get(t, [0.5, 0.5]) for t in texts])
+
+
+def test_cascade_escalates_low_margins_and_tracks_stats() -> None:
+    cheap = _Fixed({"sure": [0.9, 0.1], "unsure": [0.55, 0.45], "meh": [0.4, 0.6]})
+    costly = _Fixed({"unsure": [0.1, 0.9], "meh": [0.2, 0.8]})
+    cascade = Cascade([Stage("cheap", cheap, margin=0.5), Stage("costly", costly)])
+
+    texts = ["Assume it.", "sure", "unsure", "meh"]
+    assert cascade.tag(texts) == ["M", "L", "R", "R"]
+    assert cheap.calls == [["sure", "unsure", "meh"]]
+    assert costly.calls == [["unsure", "meh"]]
+    rules, first, last = cascade.stats
+    assert (rules.seen, rules.decided) == (4, 1)
+    assert (first.seen, first.decided, last.seen, last.decided) == (3, 1, 2, 2)
+    assert "costly" in cascade.report()
+
+
+def test_cascade_budget_keeps_least_confident_rows() -> None:
+    cheap = _Fixed({"a": [0.45, 0.55], "b": [0.7, 0.3], "c": [0.6, 0.4], "d": [0.3, 0.7]})
+    costly = _Fixed({"a": [0.9, 0.1], "b": [0.1, 0.9], "c": [0.1, 0.9], "d": [0.9, 0.1]})
+    cascade = Cascade([Stage("cheap", cheap, margin=1.0), Stage("costly", costly, budget=0.5)])
+
+    # Budget 0.5 of 4 rows: only the two lowest-margin rows ("a", "c") escalate
+    assert cascade.tag(["a", "b", "c", "d"]) == ["L", "L", "R", "R"]
+    assert costly.calls == [["a", "c"]]
+    assert cascade.stats[-1].over_budget == 2  # noqa: PLR2004
+
+
+def test_cascade_merge_sums_worker_stats() -> None:
+    cheap = _Fixed({"sure": [0.9, 0.1]})
+    workers = [Cascade([Stage("cheap", cheap, margin=0.5)]) for _ in range(2)]
+    workers[0].tag(["Assume it.", "sure"])
+    workers[1].tag(["sure", "other"])
+
+    merged = Cascade([], stats=[StageStats(st.name) for st in workers[0].stats])
+    for w in workers:
+        merged.merge(w.stats, w.total)
+    rules, cheap_stats = merged.stats
+    assert merged.total == 4  # noqa: PLR2004
+    assert (rules.seen, rules.decided) == (4, 1)
+    assert (cheap_stats.seen, cheap_stats.decided) == (3, 3)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import ktflow
+from ktflow.io.model import save_joblib
+from ktflow.tag.compact import export_compact, load_compact, load_model
+from ktflow.tag.hybrid import tag_sentences_hybrid
+from ktflow.tag.ml import predict, predict_proba, train_hashing_sgd, train_tfidf_lr
+
+TEXTS = [
+    "Assume Y.",
+    "In general, X.",
+    "ÉCOLE naïve façade",
+    "",
+    "a",
+    "x\ty\n\nz  Done!!!",
+    "Totally unseen words here.",
+]
+
+
+def _train(tmp_path: Path, rows: list[dict[str, str]]) -> Path:
+    path = tmp_path / "train.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize(
+    "layers",
+    [["M", "G", "L", "R"], ["M", "G", "M", "G"]],
+    ids=["multiclass", "binary"],
+)
+def test_compact_matches_bundle(tmp_path: Path, layers: list[str]) -> None:
+    texts = ["Assume X.", "In general, the principle holds.", "A photon.", "Because A then B."]
+    rows = [{"text": t, "layer": lab} for t, lab in zip(texts, layers, strict=True)]
+    model = train_tfidf_lr(str(_train(tmp_path, rows)))
+    compact = load_compact(export_compact(model, tmp_path / "compact"))
+
+    assert isinstance(compact.coef, np.memmap)
+    np.testing.assert_allclose(compact.predict_proba(TEXTS), predict_proba(model, TEXTS), atol=1e-6)
+    assert compact.predict(TEXTS) == predict(model, TEXTS)
+    # Second call hits the per-word cache
+    assert compact.predict(TEXTS) == predict(model, TEXTS)
+    assert tag_sentences_hybrid(TEXTS, model=compact) == tag_sentences_hybrid(TEXTS, model=model)
+
+
+def test_hashing_bundles_are_rejected(tmp_path: Path) -> None:
+    rows = [{"text": "Assume X.", "layer": "M"}, {"text": "A loop.", "layer": "St"}]
+    model = train_hashing_sgd(str(_train(tmp_path, rows)), n_features=1 << 8)
+    with pytest.raises(ValueError, match="char_wb TfidfVectorizer"):
+        export_compact(model, tmp_path / "compact")
+
+
+def test_compact_inference_does_not_import_sklearn(tmp_path: Path) -> None:
+    rows = [{"text": "Assume X.", "layer": "M"}, {"text": "A loop.", "layer": "St"}]
+    model = train_tfidf_lr(str(_train(tmp_path, rows)))
+    export_compact(model, tmp_path / "compact")
+    save_joblib(model, tmp_path / "model.joblib")
+    assert load_model(tmp_path / "model.joblib").classifier is not None
+
+    code = (
+        "import sys\n"
+        "from ktflow.tag.compact import load_model\n"
+        "from ktflow.tag.hybrid import tag_sentences_hybrid\n"
+        f"model = load_model({str(tmp_path / 'compact')!r})\n"
+        "print(tag_sentences_hybrid(['Assume Y.', 'Loop.'], model=model))\n"
+        "assert not any(m.startswith('sklearn') for m in sys.modules), 'sklearn imported'\n"
+    )
+    src = str(Path(ktflow.__file__).parents[1])
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([src, os.environ.get("PYTHONPATH", "")])}
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+
+def test_word_cache_overflow_keeps_batch_ids(tmp_path: Path, monkeypatch) -> None:
+    rows = [{"text": "Assume X.", "layer": "M"}, {"text": "A loop.", "layer": "St"}]
+    model = train_tfidf_lr(str(_train(tmp_path, rows)))
+    compact = load_compact(export_compact(model, tmp_path / "compact"))
+    monkeypatch.setattr("ktflow.tag.compact._WORD_CACHE_SIZE", 4)
+
+    texts = ["Assume loop one.", "Another two three four five six.", "Assume loop seven."]
+    for batch in (texts[:1], texts, texts[::-1]):
+        np.testing.assert_allclose(
+            compact.predict_proba(batch), predict_proba(model, batch), atol=1e-6
+        )
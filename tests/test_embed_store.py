@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ktflow.tag.embed_store import EmbeddingStore, sentence_key
+
+DIM = 4
+
+
+class _Encoder:
+    """Deterministic fake encoder that records what it was asked to encode."""
+
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def __call__(self, sentences: list[str]) -> np.ndarray:
+        self.calls.append(list(sentences))
+        return np.array([[len(s), s.count("a"), s.count(" "), 1.0] for s in sentences])
+
+
+def test_embed_encodes_only_misses_and_persists(tmp_path: Path) -> None:
+    enc = _Encoder()
+    store = EmbeddingStore(tmp_path, "m1")
+    first = store.embed(["a cat", "a dog", "a cat"], enc, batch_size=1)
+    assert enc.calls == [["a cat"], ["a dog"]]
+    np.testing.assert_array_equal(first, enc(["a cat", "a dog", "a cat"]))
+
+    # Reopen: whitespace variants hit, rows come back as memmap views
+    store = EmbeddingStore(tmp_path, "m1")
+    enc.calls.clear()
+    again = store.embed(["a  cat ", "a dog"], enc)
+    assert enc.calls == [] and len(store) == 2  # noqa: PLR2004
+    assert np.shares_memory(again, store.vectors)
+    assert np.shares_memory(store.get("a dog"), store.vectors)
+    assert store.get("unseen") is None
+    assert "a cat" in store and sentence_key("a cat") == sentence_key(" a\tcat")
+
+    store.embed(["banana"], enc)
+    assert enc.calls == [["banana"]]
+    assert EmbeddingStore(tmp_path, "m2").rows(["a cat"]).tolist() == [-1]
+
+
+def test_compaction_size_limit_and_torn_index(tmp_path: Path) -> None:
+    enc = _Encoder()
+    store = EmbeddingStore(tmp_path, "m")
+    words = [f"w{i} a" for i in range(10)]
+    store.embed(words, enc)
+    assert store.compact(keep=words[5:]) == 5  # noqa: PLR2004
+    assert store.rows(words).tolist() == [-1] * 5 + list(range(5))
+    assert len(list(store.dir.glob("vectors-*.npy"))) == 1
+    np.testing.assert_array_equal(store.vectors, enc(words[5:]))
+
+    # A torn trailing index line is dropped on open
+    with (store.dir / "index.txt").open("a", encoding="utf-8") as f:
+        f.write("abc")
+    store = EmbeddingStore(tmp_path, "m")
+    assert len(store) == 5  # noqa: PLR2004
+    np.testing.assert_array_equal(store.embed(words[5:], enc), enc(words[5:]))
+
+    # Over the size limit the oldest rows are evicted
+    row_bytes = store.nbytes // len(store)
+    small = EmbeddingStore(tmp_path, "small", max_bytes=3 * row_bytes)
+    out = small.embed(words, enc, batch_size=4)
+    np.testing.assert_array_equal(out, enc(words))
+    assert len(small) == 3 and small.rows(words[-3:]).tolist() == [0, 1, 2]  # noqa: PLR2004
+
+
+def test_embed_keeps_hits_evicted_by_the_same_call(tmp_path: Path) -> None:
+    enc = _Encoder()
+    # Room for three rows: every call below evicts older ones, including its own hits
+    row_bytes = DIM * 2 + 64 + 1
+    store = EmbeddingStore(tmp_path, "m1", max_bytes=3 * row_bytes)
+    store.embed(["a", "bb", "ccc"], enc)
+    for batch in (["a", "dddd", "eeeee"], ["eeeee", "ffffff", "a", "g a"], ["dddd", "hh"]):
+        np.testing.assert_array_equal(store.embed(batch, enc), enc(batch))
+
+
+def test_partial_append_is_trimmed(tmp_path: Path) -> None:
+    enc = _Encoder()
+    store = EmbeddingStore(tmp_path, "m")
+    store.embed(["a", "bb"], enc)
+    vectors = store.dir / store._vectors_name
+    # Crash after writing a row but before the header update
+    with vectors.open("ab") as f:
+        f.write(b"\x01" * (DIM * 2 + 3))
+
+    store = EmbeddingStore(tmp_path, "m")
+    assert len(store) == 2  # noqa: PLR2004
+    store.embed(["ccc"], enc)
+    np.testing.assert_array_equal(EmbeddingStore(tmp_path, "m").vectors, enc(["a", "bb", "ccc"]))
+
+    # The same leftovers are also dropped by an append from an open store
+    with vectors.open("ab") as f:
+        f.write(b"\x01" * 5)
+    store.embed(["dddd"], enc)
+    np.testing.assert_array_equal(store.vectors, enc(["a", "bb", "ccc", "dddd"]))
+
+    with vectors.open("r+b") as f:
+        f.truncate(vectors.stat().st_size - 1)
+    with pytest.raises(ValueError, match="truncated"):
+        EmbeddingStore(tmp_path, "m")
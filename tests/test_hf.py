@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from ktflow.tag.hf import HFTagger, _cached_tokenize  # noqa: E402
+
+pytestmark = pytest.mark.slow
+
+LABELS = ["L", "M", "R"]
+
+
+def _tiny_model_dir(tmp_path: Path) -> Path:
+    """Save a randomly initialised one-layer BERT classifier with a toy vocab."""
+    out = tmp_path / "tiny"
+    out.mkdir()
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab += "the a is model loop assume because it works over time data".split()
+    (out / "vocab.txt").write_text("\n".join(vocab) + "\n", encoding="utf-8")
+    tokenizer = transformers.BertTokenizerFast(vocab_file=str(out / "vocab.txt"))
+    config = transformers.BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        num_labels=len(LABELS),
+        id2label=dict(enumerate(LABELS)),
+        label2id={lab: i for i, lab in enumerate(LABELS)},
+    )
+    torch.manual_seed(0)
+    transformers.BertForSequenceClassification(config).save_pretrained(out)
+    tokenizer.save_pretrained(out)
+    id2label = {str(i): lab for i, lab in enumerate(LABELS)}
+    (out / "labels.json").write_text(json.dumps({"id2label": id2label}), encoding="utf-8")
+    return out
+
+
+def test_hf_tagger_bucketed_batches_keep_order(tmp_path: Path) -> None:
+    tagger = HFTagger(_tiny_model_dir(tmp_path), batch_size=2, device="cpu")
+    texts = [
+        "the model works over time because it is a loop",
+        "assume",
+        "the data",
+        "it works",
+        "a model is a loop over the data",
+    ]
+    batched = tagger.logits(texts)
+    single = np.vstack([tagger.logits([t]) for t in texts])
+    np.testing.assert_allclose(batched, single, atol=1e-5)
+    assert tagger.predict(texts) == [LABELS[i] for i in single.argmax(axis=1)]
+    np.testing.assert_allclose(tagger.predict_proba(texts).sum(axis=1), 1.0, rtol=1e-6)
+
+
+def test_onnx_backend_matches_torch(tmp_path: Path) -> None:
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    from ktflow.tag.hf import ONNXTagger, export_onnx, predict_proba_hf
+
+    model_dir = _tiny_model_dir(tmp_path)
+    export_onnx(model_dir, tmp_path / "onnx", int8=True)
+    texts = [
+        "the model works over time because it is a loop",
+        "assume",
+        "the data",
+        "it works",
+        "a model is a loop over the data",
+    ]
+    torch_probs, labels = predict_proba_hf(str(model_dir), texts)
+    onnx_probs, onnx_labels = predict_proba_hf(str(tmp_path / "onnx"), texts, backend="onnx")
+    assert onnx_labels == labels
+    np.testing.assert_allclose(onnx_probs, torch_probs, atol=1e-4)
+    assert (onnx_probs.argmax(axis=1) == torch_probs.argmax(axis=1)).all()
+
+    int8 = ONNXTagger(tmp_path / "onnx", batch_size=2, int8=True)
+    int8_probs = int8.predict_proba(texts)
+    assert int8_probs.shape == torch_probs.shape
+    np.testing.assert_allclose(int8_probs.sum(axis=1), 1.0, rtol=1e-5)
+
+
+def test_onnx_tagger_logits_match_hf_tagger(tmp_path: Path) -> None:
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    from ktflow.tag.hf import ONNXTagger, export_onnx
+
+    model_dir = _tiny_model_dir(tmp_path)
+    export_onnx(model_dir, tmp_path / "onnx")
+    texts = ["assume", "the model works over time because it is a loop", "it works"]
+    hf = HFTagger(model_dir, batch_size=2, device="cpu")
+    onnx = ONNXTagger(tmp_path / "onnx", batch_size=2)
+    assert onnx.labels == hf.labels
+    np.testing.assert_allclose(onnx.logits(texts), hf.logits(texts), atol=1e-4)
+
+
+def test_pretokenized_dataset_is_cached(tmp_path: Path) -> None:
+    tokenizer = transformers.AutoTokenizer.from_pretrained(_tiny_model_dir(tmp_path))
+    train = tmp_path / "train.jsonl"
+    train.write_text('{"text": "the data", "layer": "L"}\n', encoding="utf-8")
+    texts = ["the model works over time", "assume", "it is a loop"]
+    cache = tmp_path / "tok"
+
+    first = _cached_tokenize(str(train), texts, [0, 1, 2], tokenizer, 4, cache, {"L": 0})
+    assert len(list(cache.glob("*.npz"))) == 1
+    again = _cached_tokenize(str(train), texts, [0, 1, 2], tokenizer, 4, cache, {"L": 0})
+    for i, text in enumerate(texts):
+        expected = dict(tokenizer(text, truncation=True, max_length=4))
+        assert first[i] == again[i] == {**expected, "labels": i}
+    # A different max_length is a different cache entry
+    _cached_tokenize(str(train), texts, [0, 1, 2], tokenizer, 8, cache, {"L": 0})
+    assert len(list(cache.glob("*.npz"))) == 2  # noqa: PLR2004
@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
-from ktflow.tag.hybrid import tag_sentence_hybrid
+from ktflow.tag.hybrid import tag_sentence_hybrid, tag_sentences_hybrid
 from ktflow.tag.ml import train_tfidf_lr
 
 
@@ -31,3 +31,25 @@ def test_hybrid_rules_first(tmp_path: Path) -> None:
         "Totally ambiguous.", model=model, rules_first=True, confidence_gap=0.0
     )
     assert label2 in {"L", "M"}
+
+
+def test_hybrid_batch_matches_single(tmp_path: Path) -> None:
+    train_path = tmp_path / "train.jsonl"
+    rows = [
+        {"text": "A is a thing.", "layer": "L"},
+        {"text": "Assume X.", "layer": "M"},
+        {"text": "X causes Y.", "layer": "R"},
+    ]
+    train_path.write_text("\n".join(json.dumps(r) for r in rows), encoding="utf-8")
+    model = train_tfidf_lr(str(train_path))
+    texts = ["Assume the premise.", "Totally ambiguous.", "It is a cat.", "", "Red blue."]
+
+    for rules_first in (True, False):
+        for gap in (0.0, 0.5, 2.0):
+            batch = tag_sentences_hybrid(texts, model, rules_first, gap)
+            assert batch == [tag_sentence_hybrid(t, model, rules_first, gap) for t in texts]
+    # An unreachable gap falls back to rules, and to the ML top label only on UNK
+    batch = tag_sentences_hybrid(texts, model, rules_first=False, confidence_gap=2.0)
+    assert batch[0] == "M"
+    assert batch[1] in {"L", "M", "R"}
+    assert tag_sentences_hybrid(texts, model=None) == ["M", "UNK", "L", "UNK", "UNK"]
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from ktflow.ingest import pdf as pdf_mod
+from ktflow.ingest.cache import ExtractionCache
+from ktflow.ingest.pdf import (
+    _extract_cascade,
+    _sample_indices,
+    _shard_ranges,
+    extract_text_from_pdf,
+    iter_pages,
+    probe_pdf,
+)
+
+CONTROL_PDF = Path(__file__).resolve().parents[1] / "data" / "raw" / "kt_control_v1.pdf"
+
+
+def test_shard_ranges_cover_pages_in_order() -> None:
+    ranges = _shard_ranges(10, 4)
+    assert ranges == [(0, 3), (3, 6), (6, 8), (8, 10)]
+    assert _shard_ranges(2, 8) == [(0, 1), (1, 2)]
+
+
+@pytest.mark.slow
+def test_parallel_extraction_matches_serial() -> None:
+    serial = extract_text_from_pdf(str(CONTROL_PDF))
+    parallel = extract_text_from_pdf(str(CONTROL_PDF), workers=2)
+    assert parallel == serial
+
+
+def test_parallel_extraction_matches_serial_small(tmp_path: Path) -> None:
+    pdf = tmp_path / "three.pdf"
+    _write_text_pdf(
+        pdf,
+        [f"Page {n} of the knowledge transfer notes for the billing service." for n in (1, 2, 3)],
+    )
+    serial = extract_text_from_pdf(str(pdf))
+    assert "Page 3" in serial
+    assert extract_text_from_pdf(str(pdf), workers=2) == serial
+    assert list(iter_pages(str(pdf), workers=2)) == list(iter_pages(str(pdf)))
+
+
+def test_extraction_cache_roundtrip_and_lru(tmp_path: Path) -> None:
+    cache = ExtractionCache(tmp_path, max_bytes=10**9)
+    cache.put("aa" * 32, "first")
+    cache.put("bb" * 32, "second")
+    assert cache.get("aa" * 32) == "first"
+    assert cache.get("cc" * 32) is None
+
+    # Make "bb" the least recently used, then shrink the budget to one entry
+    old = cache._path("bb" * 32)
+    os.utime(old, (0, 0))
+    cache.max_bytes = cache._path("aa" * 32).stat().st_size
+    assert cache.evict() == 1
+    assert cache.get("bb" * 32) is None
+    assert cache.get("aa" * 32) == "first"
+
+
+def test_corrupt_page_entry_is_a_miss(tmp_path: Path) -> None:
+    cache = ExtractionCache(tmp_path)
+    with cache.writer("aa" * 32) as w:
+        w.write_page("Page one.")
+        w.write_page("Page two.")
+    assert list(cache.get_pages("aa" * 32) or []) == ["Page one.", "Page two."]
+
+    path = cache._path("aa" * 32)
+    path.write_bytes(path.read_bytes()[:-8])  # drop the gzip trailer
+    assert cache.get_pages("aa" * 32) is None
+    assert not path.exists()
+
+
+def test_put_scans_only_when_over_budget(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ExtractionCache(tmp_path, max_bytes=10**9)
+    scans: list[int] = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda: scans.append(1) or evict())
+    for i in range(5):
+        cache.put(f"{i:02d}" * 32, "text")
+    assert len(scans) == 1  # the first write seeds the running total
+
+    cache.max_bytes = cache._path("00" * 32).stat().st_size * 5
+    cache.put("ff" * 32, "text")
+    assert len(scans) == 2  # noqa: PLR2004
+    assert cache.get("00" * 32) is None
+    assert cache.get("ff" * 32) == "text"
+
+
+def test_extract_uses_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    calls: list[int] = []
+
+    def fake_cascade(path: Path, **kwargs: object) -> tuple[list[str], dict]:
+        calls.append(1)
+        return ["Extracted", "text."], {}
+
+    monkeypatch.setattr(pdf_mod, "_extract_cascade", fake_cascade)
+    cache = ExtractionCache(tmp_path / "cache")
+    assert extract_text_from_pdf(str(pdf), cache=cache) == "Extracted text."
+    assert extract_text_from_pdf(str(pdf), cache=cache) == "Extracted text."
+    assert len(calls) == 1
+    # Different settings are a different key
+    extract_text_from_pdf(str(pdf), cache=cache, ocr_lang="deu")
+    assert len(calls) == 2  # noqa: PLR2004
+
+
+def test_ocr_only_sparse_pages(monkeypatch: pytest.MonkeyPatch) -> None:
+    dense = " ".join(["This page has a healthy text layer."] * 10)
+    monkeypatch.setattr(pdf_mod, "probe_pdf", lambda p: pdf_mod.ProbeResult(backend="pdfminer"))
+    monkeypatch.setattr(pdf_mod, "_extract_pages_with_pdfminer", lambda p, workers: [dense, ""])
+    requested: list[list[int] | None] = []
+
+    def fake_ocr(path: Path, lang: str, pages: list[int] | None, workers: int) -> tuple:
+        requested.append(pages)
+        return {1: "Scanned page text."}, [{"page": 2, "chars": 18, "seconds": 0.1}]
+
+    monkeypatch.setattr(pdf_mod, "_extract_with_tesseract", fake_ocr)
+    pages, info = _extract_cascade(Path("x.pdf"), ocr=False, ocr_lang="eng", workers=1)
+    assert requested == [[1]]
+    assert pages == [dense, "Scanned page text."]
+    assert info["ocr_pages"][0]["page"] == 2  # noqa: PLR2004
+
+
+def test_iter_pages_streams_and_caches(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    calls: list[int] = []
+
+    def fake_pages(path: Path, *, ocr: bool, ocr_lang: str) -> Iterator[str]:
+        calls.append(1)
+        yield "Page one."
+        yield ""
+        yield "Page three."
+
+    monkeypatch.setattr(pdf_mod, "_iter_page_texts", fake_pages)
+    cache = ExtractionCache(tmp_path / "cache")
+
+    # An abandoned stream must not leave a (partial) cache entry behind
+    stream = iter_pages(str(pdf), cache=cache)
+    assert next(stream) == (1, "Page one.")
+    stream.close()
+
+    expected = [(1, "Page one."), (2, ""), (3, "Page three.")]
+    assert list(iter_pages(str(pdf), cache=cache)) == expected
+    assert list(iter_pages(str(pdf), cache=cache)) == expected
+    assert len(calls) == 2  # noqa: PLR2004
+
+
+def test_streaming_and_whole_document_share_cache_entries(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pdf = tmp_path / "doc.pdf"
+    _write_text_pdf(
+        pdf, [f"Page {n} of the notes for the billing service, in full." for n in (1, 2, 3, 4)]
+    )
+    cache = ExtractionCache(tmp_path / "cache")
+    pages = list(iter_pages(str(pdf), cache=cache))
+
+    def no_extraction(*args: object, **kwargs: object) -> None:
+        raise AssertionError("expected a cache hit")
+
+    monkeypatch.setattr(pdf_mod, "_extract_cascade", no_extraction)
+    monkeypatch.setattr(pdf_mod, "_iter_page_texts", no_extraction)
+    assert extract_text_from_pdf(str(pdf), cache=cache) == " ".join(t for _, t in pages)
+    assert list(iter_pages(str(pdf), workers=2, cache=cache)) == pages
+    assert len(list((tmp_path / "cache").glob("*/*"))) == 1
+
+
+def _stream(content: bytes) -> bytes:
+    return b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+
+
+def _write_image_only_pdf(path: Path) -> None:
+    """Write a one-page PDF whose only content is a 1x1 image (a 'scan')."""
+    content = b"q 612 0 0 792 0 0 cm /Im0 Do Q"
+    _write_pdf(
+        path,
+        [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /XObject << /Im0 5 0 R >> >> /Contents 4 0 R >>",
+            _stream(content),
+            b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray "
+            b"/BitsPerComponent 8 /Length 1 >>\nstream\n\x80\nendstream",
+        ],
+    )
+
+
+def _write_text_pdf(path: Path, pages: list[str]) -> None:
+    """Write a PDF with one line of Helvetica text per page."""
+    n = len(pages)
+    kids = b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(n))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, n),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(_stream(b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode("latin-1")))
+    _write_pdf(path, objects)
+
+
+def _write_pdf(path: Path, objects: list[bytes]) -> None:
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % n + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(bytes(out))
+
+
+def test_probe_routes_scans_to_ocr(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    scan = tmp_path / "scan.pdf"
+    _write_image_only_pdf(scan)
+    monkeypatch.setattr(pdf_mod, "_ocr_tools_available", lambda: True)
+    result = probe_pdf(scan)
+    assert result.backend == "ocr"
+    assert result.pages == 1
+    assert result.images == 1
+    assert result.fonts == 0
+
+    monkeypatch.setattr(pdf_mod, "_ocr_tools_available", lambda: False)
+    assert probe_pdf(scan).backend == "pdfminer"
+
+
+def test_probe_keeps_text_pdfs_on_pdfminer() -> None:
+    result = probe_pdf(CONTROL_PDF)
+    assert result.backend == "pdfminer"
+    assert result.fonts > 0
+    assert _sample_indices(7, 3) == [0, 3, 6]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_empty_text_pdf_raises_on_both_paths(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, workers: int
+) -> None:
+    scan = tmp_path / "scan.pdf"
+    _write_image_only_pdf(scan)
+    monkeypatch.setattr(pdf_mod, "_ocr_tools_available", lambda: False)
+    monkeypatch.setattr(pdf_mod, "_extract_pages_with_pdftotext", lambda p: None)
+    stream = iter_pages(str(scan), workers=workers)
+    with pytest.raises(ValueError, match="Failed to extract text"):
+        next(stream)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_short_documents_fall_back_to_pdftotext_on_both_paths(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, workers: int
+) -> None:
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    alt = ["Layout text of page one, " * 5, "", "and page three " * 5]
+    monkeypatch.setattr(pdf_mod, "probe_pdf", lambda p: pdf_mod.ProbeResult(backend="pdfminer"))
+    monkeypatch.setattr(pdf_mod, "_iter_pdfminer_pages", lambda p: iter(["", "Short.", ""]))
+    monkeypatch.setattr(pdf_mod, "_extract_pages_with_pdfminer", lambda p, workers: ["", "Short."])
+    monkeypatch.setattr(pdf_mod, "_extract_pages_with_pdftotext", lambda p: alt)
+    monkeypatch.setattr(pdf_mod, "_ocr_tools_available", lambda: False)
+    monkeypatch.setattr(pdf_mod, "_extract_with_tesseract", lambda *a, **k: None)
+    assert [text for _, text in iter_pages(str(pdf), workers=workers)] == alt
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from ktflow.tag.hybrid import tag_sentences_hybrid
+from ktflow.tag.knn import KNNIndex, KNNTagger, build_knn_index
+
+VOCAB = ["loop", "feedback", "assume", "premise", "means", "defined", "because", "causes"]
+
+
+def _encode(texts: list[str]) -> np.ndarray:
+    """Bag-of-words over a toy vocabulary (stand-in for a sentence encoder)."""
+    return np.array([[t.lower().count(w) for w in VOCAB] for t in texts], dtype=np.float32)
+
+
+def test_knn_tagger_votes_and_updates_without_retraining(tmp_path: Path) -> None:
+    rows = [
+        {"text": "A feedback loop.", "layer": "St"},
+        {"text": "Loop and feedback again.", "layer": "St"},
+        {"text": "Assume the premise.", "layer": "M"},
+        {"text": "Unlabeled.", "layer": "UNK"},
+    ]
+    train = tmp_path / "gold.jsonl"
+    train.write_text("\n".join(json.dumps(r) for r in rows), encoding="utf-8")
+    tagger = KNNTagger(build_knn_index(str(train), _encode), _encode, k=2)
+    assert tagger.labels == ["St", "M"]
+
+    texts = ["the loop", "a premise", "it means x"]
+    probs = tagger.predict_proba(texts)
+    assert probs.shape == (3, 2)
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0)
+    assert tagger.predict(texts[:2]) == ["St", "M"]
+
+    tagger.add(["X is defined as what it means."], ["L"])
+    assert tagger.predict(["it means x"]) == ["L"]
+    # Plugs into the hybrid: rules decide "Assume ...", k-NN the rule misses
+    texts = ["Assume it.", "It got defined yesterday."]
+    assert tag_sentences_hybrid(texts, model=tagger) == ["M", "L"]
+
+
+def test_ivf_search_matches_exact_when_probing_all_lists() -> None:
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 16))
+    index = KNNIndex.empty(16)
+    index.add(X, [str(i % 4) for i in range(500)])
+    Q = rng.normal(size=(20, 16))
+    exact = index.search(Q, k=5)
+
+    index.build_ivf(n_lists=8, n_probe=8)
+    ivf = index.search(Q, k=5)
+    np.testing.assert_array_equal(ivf[1], exact[1])
+    np.testing.assert_allclose(ivf[0], exact[0], rtol=1e-5)
+
+    # Examples added after clustering are searchable right away
+    index.add(Q[:1], ["new"])
+    assert index.search(Q[:1], k=1)[1][0, 0] == len(X)
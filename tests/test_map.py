@@ -1,6 +1,13 @@
 from __future__ import annotations
 
-from ktflow.map.graph import build_flow_counts, find_motifs
+import numpy as np
+
+from ktflow.map.graph import (
+    build_flow_counts,
+    build_flow_matrix,
+    find_motifs,
+    flow_matrix_to_counts,
+)
 
 
 def test_build_flow_counts() -> None:
@@ -31,3 +38,12 @@ def test_find_motifs() -> None:
     # Expected motifs: L-G-M and G-M-St
     assert motifs.get("L-G-M") == 1
     assert motifs.get("G-M-St") == 1
+
+
+def test_build_flow_matrix_matches_counts() -> None:
+    labels = ["S", "L", "R", "R", "L", "M"]
+    names = ["S", "L", "R", "St", "G", "M", "UNK"]
+    codes = np.array([names.index(lbl) for lbl in labels], dtype=np.int8)
+    for window in (1, 2, 10):
+        matrix = build_flow_matrix(codes, n_labels=len(names), window=window)
+        assert flow_matrix_to_counts(matrix, names) == build_flow_counts(labels, window=window)
@@ -3,7 +3,25 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
-from ktflow.tag.ml import predict, train_tfidf_lr
+import numpy as np
+from sklearn.feature_selection import chi2
+from sklearn.preprocessing import label_binarize
+
+from ktflow.io.model import save_joblib
+from ktflow.tag.compact import export_compact
+from ktflow.tag.hybrid import tag_sentences_hybrid
+from ktflow.tag.ml import (
+    _chi2_scores,
+    distill_tfidf_lr,
+    evaluate_model,
+    predict,
+    predict_proba,
+    train_hashing_sgd,
+    train_tfidf_lr,
+)
+
+# Vocabulary size kept by chi2_k in the footprint tests
+MAX_FEATURES = 20
 
 
 def test_ml_train_predict(tmp_path: Path) -> None:
@@ -22,3 +40,80 @@ def test_ml_train_predict(tmp_path: Path) -> None:
     preds = predict(model, ["Assume Y.", "In general, X."])
     assert preds[0] in {"M"}
     assert preds[1] in {"G"}
+
+
+def test_distill_from_soft_labels() -> None:
+    texts = ["Assume X.", "Assume Y.", "A loop of feedback.", "Feedback loop again."]
+    classes = ["M", "St", "G"]
+    # G never clears min_prob, so it must not appear as a student class
+    soft = np.array([[0.9, 0.095, 0.005], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.1, 0.9, 0.0]])
+    model = distill_tfidf_lr(
+        texts, soft, classes, gold_texts=["Loop feedback."], gold_labels=["St"], min_prob=0.01
+    )
+    assert list(model.label_encoder.classes_) == ["M", "St"]
+    assert predict(model, ["Assume Z.", "A feedback loop."]) == ["M", "St"]
+    assert predict_proba(model, ["Assume Z."]).shape == (1, 2)
+
+
+def test_distill_passes_footprint_options_through() -> None:
+    texts = ["Assume X.", "Assume the premise.", "A feedback loop.", "The loop feeds back."]
+    soft = np.array([[0.9, 0.1], [0.8, 0.2], [0.1, 0.9], [0.0, 1.0]])
+    model = distill_tfidf_lr(
+        texts, soft, ["M", "St"], chi2_k=MAX_FEATURES, dtype=np.float32, penalty="l1", C=100.0
+    )
+    assert len(model.vectorizer.vocabulary_) == MAX_FEATURES
+    assert model.classifier.coef_.dtype == np.float32
+    assert predict(model, ["Assume Y.", "Another loop."]) == ["M", "St"]
+
+
+def test_weighted_chi2_matches_sklearn_on_hard_labels() -> None:
+    X = np.array([[1.0, 0.0, 2.0], [0.5, 1.0, 0.0], [0.0, 3.0, 1.0], [2.0, 0.0, 0.0]])
+    y = np.array([0, 1, 2, 0])
+    onehot = label_binarize(y, classes=[0, 1, 2]).astype(float)
+    np.testing.assert_allclose(_chi2_scores(X, onehot), chi2(X, y)[0])
+    np.testing.assert_allclose(_chi2_scores(X, y), chi2(X, y)[0])
+
+
+def test_streaming_trainer_is_a_drop_in_bundle(tmp_path: Path) -> None:
+    rows = [
+        {"text": "Assume X.", "layer": "M"},
+        {"text": "Assume the premise holds.", "layer": "M"},
+        {"text": "A feedback loop.", "layer": "St"},
+        {"text": "The loop feeds back.", "layer": "St"},
+    ] * 5
+    train_path = tmp_path / "train.jsonl"
+    train_path.write_text("\n".join(json.dumps(r) for r in rows) + "\n\n", encoding="utf-8")
+
+    model = train_hashing_sgd(str(train_path), chunk_size=3, epochs=5, n_features=1 << 12)
+    assert list(model.label_encoder.classes_) == ["M", "St"]
+    assert predict(model, ["Assume Y.", "Another loop."]) == ["M", "St"]
+    np.testing.assert_allclose(predict_proba(model, ["Assume Y."]).sum(axis=1), 1.0)
+    assert tag_sentences_hybrid(["Totally ambiguous loop."], model=model) == ["St"]
+
+
+def test_footprint_options_shrink_the_model(tmp_path: Path) -> None:
+    rows = [
+        {"text": "Assume X.", "layer": "M"},
+        {"text": "Assume the premise holds.", "layer": "M"},
+        {"text": "A feedback loop.", "layer": "St"},
+        {"text": "The loop feeds back.", "layer": "St"},
+    ] * 3
+    train_path = tmp_path / "train.jsonl"
+    train_path.write_text("\n".join(json.dumps(r) for r in rows) + "\n", encoding="utf-8")
+
+    full = train_tfidf_lr(str(train_path))
+    small = train_tfidf_lr(
+        str(train_path), chi2_k=MAX_FEATURES, dtype=np.float32, penalty="l1", C=100.0
+    )
+    assert len(small.vectorizer.vocabulary_) == MAX_FEATURES < len(full.vectorizer.vocabulary_)
+    assert small.classifier.coef_.dtype == np.float32
+    assert small.classifier.coef_.nnz < MAX_FEATURES  # sparsified
+    assert predict(small, ["Assume Y.", "Another loop."]) == ["M", "St"]
+
+    save_joblib(small, tmp_path / "small.joblib")
+    texts, labels = ["Assume Y.", "Another loop."], ["M", "St"]
+    stats = evaluate_model(tmp_path / "small.joblib", texts, labels)
+    assert stats["accuracy"] == stats["macro_f1"] == 1.0
+    assert stats["nonzero_weights"] == small.classifier.coef_.nnz
+    compact = export_compact(small, tmp_path / "compact")
+    assert evaluate_model(compact, texts, labels)["accuracy"] == 1.0
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from ktflow.tag.cascade import Cascade, Stage
+from ktflow.tag.hybrid import tag_sentences_hybrid
+from ktflow.tag.pred_cache import CachedTagger, PredictionCache, tagger_hash
+
+
+class _Counting:
+    """Scorer with preset probabilities that records every sentence it scores."""
+
+    labels = ["L", "R"]
+
+    def __init__(self) -> None:
+        self.scored: list[str] = []
+
+    def predict_proba(self, texts: list[str]) -> np.ndarray:
+        self.scored.extend(texts)
+        return np.array([[0.9, 0.1] if "left" in t else [0.2, 0.8] for t in texts])
+
+
+def test_cached_tagger_scores_each_distinct_sentence_once(tmp_path: Path) -> None:
+    db = tmp_path / "preds.sqlite"
+    model = _Counting()
+    cached = CachedTagger(model, PredictionCache(db), "tagger-a")
+    texts = ["Boilerplate footer, left.", "Other text.", "Boilerplate footer, left."]
+
+    first = cached.predict_proba(texts)
+    assert model.scored == ["Boilerplate footer, left.", "Other text."]
+    np.testing.assert_array_equal(first[0], first[2])
+    assert cached.predict(texts) == ["L", "R", "L"]
+    # The second call is answered from the cache
+    assert len(model.scored) == 2  # noqa: PLR2004
+    assert (cached.stats.lookups, cached.stats.scored) == (6, 2)
+
+    # Persisted across connections; other tagger hashes do not share entries
+    again = CachedTagger(_Counting(), PredictionCache(db), "tagger-a")
+    np.testing.assert_array_equal(again.predict_proba(texts), first)
+    assert again.stats.hit_rate == 1.0
+    other = _Counting()
+    CachedTagger(other, PredictionCache(db), "tagger-b").predict_proba(texts[:1])
+    assert other.scored == texts[:1]
+
+
+def test_cache_keys_on_the_exact_scored_string(tmp_path: Path) -> None:
+    model = _Counting()
+    cached = CachedTagger(model, PredictionCache(tmp_path / "p.sqlite"), "t")
+    nfc, nfd = "Caf\u00e9 left.", "Cafe\u0301 left."
+    cached.predict_proba([nfc, nfd, "Caf\u00e9  left."])
+    # Unicode and whitespace variants can score differently, so each is scored
+    assert model.scored == [nfc, nfd, "Caf\u00e9  left."]
+
+
+def test_cached_tagger_drops_into_hybrid_and_cascade(tmp_path: Path) -> None:
+    model = _Counting()
+    cached = CachedTagger(model, PredictionCache(tmp_path / "p.sqlite"), "t")
+    texts = ["Assume X.", "Some left thing.", "Some right thing."]
+    assert tag_sentences_hybrid(texts, model=cached) == ["M", "L", "R"]
+    assert Cascade([Stage("tfidf", cached)]).tag(texts) == ["M", "L", "R"]
+    assert model.scored == texts[1:]
+    assert "2/4 hits" in cached.report()
+
+
+def test_tagger_hash_covers_files_and_settings(tmp_path: Path) -> None:
+    (tmp_path / "weights.bin").write_bytes(b"abc")
+    base = tagger_hash(tmp_path, backend="onnx")
+    assert base != tagger_hash(tmp_path, backend="onnx-int8")
+    (tmp_path / "weights.bin").write_bytes(b"abd")
+    assert base != tagger_hash(tmp_path, backend="onnx")
+    assert tagger_hash(tmp_path / "weights.bin") != tagger_hash(tmp_path)
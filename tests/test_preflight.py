@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from cli.preflight import _align_by_text
+from cli.preflight import _align_by_span, _align_by_text
 
 
 def test_preflight_align_and_metrics(tmp_path: Path) -> None:
@@ -18,3 +18,17 @@ def test_preflight_align_and_metrics(tmp_path: Path) -> None:
     y_true, y_pred = _align_by_text(pred, gold)
     assert y_true == ["L", "M"]
     assert y_pred == ["L", "M"]
+
+
+def test_preflight_align_by_span() -> None:
+    pred = [
+        {"doc_id": "d", "span": [0, 13], "text": "A is a thing.", "layer": "L"},
+        {"doc_id": "d", "span": [14, 23], "text": "Assume X!", "layer": "M"},
+    ]
+    gold = [
+        {"doc_id": "d", "span": [14, 23], "text": "Assume X.", "layer": "M"},
+        {"doc_id": "e", "span": [0, 13], "text": "A is a thing.", "layer": "S"},
+    ]
+    y_true, y_pred = _align_by_span(pred, gold)
+    assert y_true == ["M"]
+    assert y_pred == ["M"]
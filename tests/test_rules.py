@@ -1,7 +1,18 @@
 from __future__ import annotations
 
+import json
+from pathlib import Path
+
+import numpy as np
 import pytest
-from ktflow.tag.rules import tag_sentence_rules
+from ktflow.tag.rulepack import DEFAULT_RULEPACK, compile_rulepack, load_rulepack, save_rulepack
+from ktflow.tag.rules import (
+    LABELS,
+    UNK_CODE,
+    decode_labels,
+    tag_sentence_rules,
+    tag_sentences_rules,
+)
 
 
 @pytest.mark.parametrize(
@@ -14,7 +25,51 @@ from ktflow.tag.rules import tag_sentence_rules
         ("A photon is a quantum of electromagnetic radiation.", "L"),
         ("Terms: mass, energy, momentum.", "S"),
         ("This is unclear.", "UNK"),
+        # Overlapping keywords: "what is" (S) overlaps "is a " (L); L wins
+        ("So what is a vector?", "L"),
+        ("Components interact, and thus the metadata changes.", "M"),
     ],
 )
 def test_tag_sentence_rules(text: str, expected: str) -> None:
     assert tag_sentence_rules(text) == expected
+
+
+def test_tag_sentences_rules_codes_and_hits() -> None:
+    texts = [
+        "Assume the model is linear.",
+        "A photon is a quantum of electromagnetic radiation.",
+        "This is unclear.",
+        "",
+    ]
+    codes, hits = tag_sentences_rules(texts, return_hits=True)
+    assert codes.dtype == np.int8
+    assert decode_labels(codes) == [tag_sentence_rules(t) for t in texts]
+    assert hits.shape == (len(texts), len(LABELS) - 1)
+    # "Assume ... is linear" fires only M; the winning layer is always a hit
+    assert hits[0].tolist() == [label == "M" for label in LABELS[:-1]]
+    assert all(hits[i, c] for i, c in enumerate(codes) if c != UNK_CODE)
+    assert not hits[3].any()
+
+
+def test_rulepack_roundtrip_and_override(tmp_path: Path) -> None:
+    pack = compile_rulepack(DEFAULT_RULEPACK)
+    path = tmp_path / "default.joblib"
+    save_rulepack(pack, path)
+    loaded = load_rulepack(path)
+    assert loaded.sha256 == pack.sha256
+    texts = ["Assume the model is linear.", "Terms: mass, energy, momentum.", "It is red."]
+    assert tag_sentences_rules(texts, rulepack=loaded).tolist() == (
+        tag_sentences_rules(texts).tolist()
+    )
+
+    # A JSON spec that only knows one layer
+    spec = {"name": "colors", "priority": ["L"], "layers": {"L": {"keywords": ["red"]}}}
+    (tmp_path / "colors.json").write_text(json.dumps(spec), encoding="utf-8")
+    colors = load_rulepack(tmp_path / "colors.json")
+    assert colors.sha256 != pack.sha256
+    assert decode_labels(tag_sentences_rules(texts, rulepack=colors)) == ["UNK", "UNK", "L"]
+
+    loaded.spec["priority"] = ["S"]  # tampered artifact no longer matches its hash
+    save_rulepack(loaded, path)
+    with pytest.raises(ValueError):
+        load_rulepack(path)
@@ -1,6 +1,16 @@
 from __future__ import annotations
 
-from ktflow.segment.sentence import split_sentences
+import pytest
+
+from ktflow.segment.edu import EduSegmenter, edu_spans, split_edus
+from ktflow.segment.sentence import (
+    _iter_spans,
+    iter_sentences,
+    sentence_spans,
+    split_sentences,
+    stream_segments,
+    stream_sentences,
+)
 
 
 def test_split_sentences_basic() -> None:
@@ -21,3 +31,87 @@ def test_split_sentences_whitespace() -> None:
     text = "A.  B\nC \n D."
     sents = split_sentences(text)
     assert sents == ["A.", "B C D."]
+
+
+def test_stream_sentences_carries_over_pages() -> None:
+    pages = [
+        (1, "First sentence. Second sentence spans"),
+        (2, "two pages. Third"),
+        (3, ""),
+        (4, "sentence ends here. Last one."),
+    ]
+    doc = " ".join(t for _, t in pages if t)
+    segs = list(stream_sentences(pages))
+    assert [s.text for s in segs] == split_sentences(doc)
+    assert all(doc[s.start : s.end] == s.text for s in segs)
+    assert [(s.page, s.text) for s in segs] == [
+        (1, "First sentence."),
+        (1, "Second sentence spans two pages."),
+        (2, "Third sentence ends here."),
+        (4, "Last one."),
+    ]
+
+
+def test_sentence_spans_slice_shared_buffer() -> None:
+    spans = sentence_spans("One.  Two!\nThree")
+    assert spans.text == "One. Two! Three"
+    assert list(spans.spans()) == [(0, 4), (5, 9), (10, 15)]
+    assert spans[1] == "Two!"
+    assert spans.starts.itemsize == 4  # noqa: PLR2004
+
+
+def test_edu_spans_keep_source_text() -> None:
+    text = "The model is linear but recursive, and it adapts over time to feedback."
+    spans = edu_spans(text)
+    assert all(spans.text[s:e] == seg for (s, e), seg in zip(spans.spans(), spans, strict=True))
+    assert list(spans) == split_edus(text)
+
+
+def test_stream_segments_caps_text_without_boundaries() -> None:
+    page = " ".join(["row cell value"] * 10)
+    pages = [(n, page) for n in range(1, 201)]
+    doc = " ".join(page for _, page in pages)
+    seen: list[int] = []
+
+    def split(text: str) -> list[tuple[int, int]]:
+        seen.append(len(text))
+        return list(_iter_spans(text))
+
+    segs = list(stream_segments(pages, split, max_carry=1000))
+    # Each re-split covers at most the cap plus one page, not the whole prefix
+    assert max(seen) <= 1000 + 2 * len(page)
+    assert len(segs) > 1
+    assert " ".join(seg.text for seg in segs) == doc
+    assert all(doc[seg.start : seg.end] == seg.text for seg in segs)
+    assert segs[1].page > 1
+
+
+def test_iter_sentences_offsets_and_raw_input() -> None:
+    segs = list(iter_sentences("One. Two? Three"))
+    assert [(s.start, s.end, s.text) for s in segs] == [
+        (0, 4, "One."),
+        (5, 9, "Two?"),
+        (10, 15, "Three"),
+    ]
+    raw = list(iter_sentences("One.\n\n Two?", normalized=False))
+    assert [s.text for s in raw] == ["One.", "Two?"]
+    paged = list(iter_sentences([(1, "One. Two"), (2, "continues. Three.")]))
+    assert [(s.page, s.text) for s in paged] == [
+        (1, "One."),
+        (1, "Two continues."),
+        (2, "Three."),
+    ]
+
+
+def test_edu_segmenter_parallel_matches_serial() -> None:
+    pytest.importorskip("pysbd")
+    text = " ".join(
+        f"Section {i} describes the model, and it adapts over time to feedback. "
+        f"Dr. Smith notes result {i}, but the data is sparse."
+        for i in range(40)
+    )
+    serial = EduSegmenter()
+    with EduSegmenter(workers=2, chunk_chars=300) as parallel:
+        assert list(parallel.spans(text).spans()) == list(serial.spans(text).spans())
+        pages = [(p, text[i : i + 500].strip()) for p, i in enumerate(range(0, len(text), 500), 1)]
+        assert list(parallel.stream(pages)) == list(serial.stream(pages))
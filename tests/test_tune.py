@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from ktflow.tag.ml import predict
+from ktflow.tag.tune import cross_validate, fit_best, leaderboard, search_space
+
+TEXTS = [
+    "Assume X.",
+    "Assume the premise holds.",
+    "Assume nothing else.",
+    "Assume a model.",
+    "A feedback loop.",
+    "The loop feeds back.",
+    "Another loop closes.",
+    "Loops within loops.",
+]
+LABELS = ["M"] * 4 + ["St"] * 4
+
+
+def test_search_space_grid_and_random_draws() -> None:
+    space = {"min_df": [1, 2], "C": [0.5, 1.0, 4.0]}
+    assert len(search_space(space)) == 6  # noqa: PLR2004
+    draws = search_space(space, n_iter=4, seed=0)
+    assert len(draws) == 4  # noqa: PLR2004
+    assert len({tuple(sorted(d.items())) for d in draws}) == 4  # noqa: PLR2004
+    with pytest.raises(ValueError, match="Unknown tuning parameters"):
+        search_space({"ngram": [3]})
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cross_validate_ranks_trials_and_refits_best(workers: int) -> None:
+    candidates = search_space({"chi2_k": [None, 10], "dtype": [np.float32], "C": [1.0, 10.0]})
+    trials = cross_validate(TEXTS, LABELS, candidates, folds=2, workers=workers)
+
+    assert sorted(map(str, (t.params for t in trials))) == sorted(map(str, candidates))
+    assert all(len(t.f1) == len(t.size_mb) == 2 for t in trials)  # noqa: PLR2004
+    assert [t.macro_f1 for t in trials] == sorted((t.macro_f1 for t in trials), reverse=True)
+    assert "chi2_k=10" in leaderboard(trials)
+
+    model = fit_best(TEXTS, LABELS, trials[0].params)
+    assert predict(model, ["Assume Y.", "A loop again."]) == ["M", "St"]